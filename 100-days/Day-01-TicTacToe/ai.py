@@ -0,0 +1,281 @@
+"""
+Computer opponent: negamax search with alpha-beta pruning.
+
+Positions are cached in a transposition table keyed on the canonical form of
+the board under the 8 rotations/reflections of the square, so mirrored
+positions are only searched once. Iterative deepening keeps a best move
+ready at all times; small boards are solved outright well inside the time
+budget, larger ones stop at whatever depth the budget allows.
+"""
+
+import random
+import time
+
+import solved
+
+WIN_SCORE = 1_000_000
+WIN_THRESHOLD = WIN_SCORE // 2
+EXACT, LOWER, UPPER = 0, 1, 2
+MAX_TABLE_SIZE = 1 << 20
+
+
+class SearchTimeout(Exception):
+    """Raised inside the search when the time budget is spent"""
+
+
+def _symmetries(size):
+    """The 8 dihedral maps of an N x N board, as (row, col) -> (row, col)"""
+    n = size - 1
+    return (
+        lambda r, c: (r, c),
+        lambda r, c: (c, n - r),
+        lambda r, c: (n - r, n - c),
+        lambda r, c: (n - c, r),
+        lambda r, c: (r, n - c),
+        lambda r, c: (n - r, c),
+        lambda r, c: (c, r),
+        lambda r, c: (n - c, n - r),
+    )
+
+
+class Geometry:
+    """Per-board-shape tables shared by every search on that shape."""
+
+    def __init__(self, size, win_length, stride):
+        self.size = size
+        self.win_length = win_length
+        self.stride = stride
+        cells = [(r, c) for r in range(size) for c in range(size)]
+
+        def index(r, c):
+            return r * stride + c
+
+        # perms[s][i] is where symmetry s sends cell i; inverse undoes it
+        self.perms = []
+        self.inverse = []
+        for sym in _symmetries(size):
+            perm = [0] * (size * stride)
+            inv = [0] * (size * stride)
+            for r, c in cells:
+                i, j = index(r, c), index(*sym(r, c))
+                perm[i] = j
+                inv[j] = i
+            self.perms.append(perm)
+            self.inverse.append(inv)
+
+        # Zobrist keys, pre-permuted so all 8 symmetric hashes update together
+        rng = random.Random(size * 1000 + win_length)
+        base = [[rng.getrandbits(64) for _ in range(size * stride)] for _ in range(2)]
+        self.zobrist = [[None] * (size * stride) for _ in range(2)]
+        for p in range(2):
+            for r, c in cells:
+                i = index(r, c)
+                self.zobrist[p][i] = tuple(base[p][perm[i]] for perm in self.perms)
+
+        # Every k-long segment, used by the static evaluation
+        self.windows = []
+        k = win_length
+        for dr, dc in ((0, 1), (1, 0), (1, 1), (1, -1)):
+            for r, c in cells:
+                end_r, end_c = r + dr * (k - 1), c + dc * (k - 1)
+                if 0 <= end_r < size and 0 <= end_c < size:
+                    mask = 0
+                    for i in range(k):
+                        mask |= 1 << index(r + dr * i, c + dc * i)
+                    self.windows.append(mask)
+        # The windows through each cell: all a move there can change
+        self.cell_windows = [()] * (size * stride)
+        for r, c in cells:
+            i = index(r, c)
+            self.cell_windows[i] = tuple(w for w in self.windows if w >> i & 1)
+
+        # Try central cells first: they sit on the most lines
+        mid = (size - 1) / 2
+        self.move_order = sorted(
+            (index(r, c) for r, c in cells),
+            key=lambda i: max(abs(i // stride - mid), abs(i % stride - mid)),
+        )
+        self.weights = [0] + [4 ** n for n in range(1, k + 1)]
+
+
+_geometry_cache = {}
+
+
+def geometry_for(game):
+    key = (game.size, game.win_length)
+    if key not in _geometry_cache:
+        _geometry_cache[key] = Geometry(game.size, game.win_length, game.stride)
+    return _geometry_cache[key]
+
+
+class AlphaBetaPlayer:
+    """
+    Picks moves for whichever side is to move in a TicTacToe game.
+
+    The transposition table survives between moves, so later moves of the
+    same game start with most of the tree already known. Classic 3x3 games
+    skip the search and read the precomputed table in solved.py instead.
+    """
+
+    def __init__(self, time_limit=1.0, max_depth=None, use_table=True):
+        self.time_limit = time_limit
+        self.max_depth = max_depth
+        self.use_table = use_table
+        self.table = {}
+        self.nodes = 0
+        self.depth_reached = 0
+
+    def choose_move(self, game):
+        """Return the (row, col) to play in `game`, which is left untouched"""
+        moves = list(game.legal_moves())
+        if not moves:
+            raise ValueError("no legal moves")
+        if len(moves) == 1:
+            return moves[0]
+        if self.use_table and solved.supports(game):
+            return solved.load_table().choose_move(game)
+
+        self.game = game
+        self.geo = geometry_for(game)
+        if len(self.table) > MAX_TABLE_SIZE:
+            self.table.clear()
+        self.deadline = time.perf_counter() + self.time_limit
+        self.nodes = 0
+
+        boards = list(game.boards)
+        if not boards[0] | boards[1]:
+            return game.position(self.geo.move_order[0])
+
+        hashes = [0] * 8
+        for p in range(2):
+            b = boards[p]
+            while b:
+                low = b & -b
+                keys = self.geo.zobrist[p][low.bit_length() - 1]
+                hashes = [h ^ z for h, z in zip(hashes, keys)]
+                b ^= low
+
+        score = sum(self._window_score(w, boards) for w in self.geo.windows)
+        empties = len(moves)
+        max_depth = min(empties, self.max_depth or empties)
+        best = None
+        for depth in range(1, max_depth + 1):
+            try:
+                result, move = self._negamax(boards, hashes, score, game.turn, depth, 0,
+                                            -WIN_SCORE - 1, WIN_SCORE + 1)
+            except SearchTimeout:
+                break
+            best = move
+            self.depth_reached = depth
+            if abs(result) > WIN_THRESHOLD:
+                break  # Forced result found, deeper search can't change it
+
+        if best is None:
+            best = self._candidates(boards[0] | boards[1], None)[0]
+        return game.position(best)
+
+    # -----------------------------
+    # Search
+    # -----------------------------
+
+    def _negamax(self, boards, hashes, static, turn, depth, ply, alpha, beta):
+        """
+        Return (score, best move) from the point of view of `turn`.
+
+        `static` is the evaluation of `boards` from X's side, kept up to date
+        move by move so leaves never rescan the whole board.
+        """
+        self.nodes += 1
+        if not self.nodes & 1023 and time.perf_counter() > self.deadline:
+            raise SearchTimeout()
+
+        game = self.game
+        geo = self.geo
+        occupied = boards[0] | boards[1]
+        if occupied == game.full_board:
+            return 0, None
+
+        key = min(hashes)
+        sym = hashes.index(key)
+        entry = self.table.get(key)
+        tt_move = None
+        if entry is not None:
+            e_depth, flag, score, canon_move = entry
+            tt_move = geo.inverse[sym][canon_move] if canon_move is not None else None
+            if score > WIN_THRESHOLD:
+                score -= ply
+            elif score < -WIN_THRESHOLD:
+                score += ply
+            if e_depth >= depth:
+                if flag == EXACT:
+                    return score, tt_move
+                if flag == LOWER and score >= beta:
+                    return score, tt_move
+                if flag == UPPER and score <= alpha:
+                    return score, tt_move
+
+        moves = self._candidates(occupied, tt_move)
+        mine = boards[turn]
+
+        # An immediate win ends the search of this node outright
+        if mine.bit_count() >= game.win_length - 1:
+            for move in moves:
+                if game.is_win_at(mine | 1 << move, move):
+                    return WIN_SCORE - ply - 1, move
+
+        if depth == 0:
+            return (static if turn == 0 else -static), None
+
+        alpha_orig = alpha
+        best_score = -WIN_SCORE - 1
+        best_move = moves[0]
+        zobrist = geo.zobrist[turn]
+        for move in moves:
+            child = list(boards)
+            child[turn] = mine | 1 << move
+            keys = zobrist[move]
+            child_hashes = [h ^ z for h, z in zip(hashes, keys)]
+            child_static = static
+            for w in geo.cell_windows[move]:
+                child_static += self._window_score(w, child) - self._window_score(w, boards)
+            score = -self._negamax(child, child_hashes, child_static, turn ^ 1, depth - 1,
+                                   ply + 1, -beta, -alpha)[0]
+            if score > best_score:
+                best_score, best_move = score, move
+            if score > alpha:
+                alpha = score
+            if alpha >= beta:
+                break
+
+        stored = best_score
+        if stored > WIN_THRESHOLD:
+            stored += ply
+        elif stored < -WIN_THRESHOLD:
+            stored -= ply
+        if best_score <= alpha_orig:
+            flag = UPPER
+        elif best_score >= beta:
+            flag = LOWER
+        else:
+            flag = EXACT
+        self.table[key] = (depth, flag, stored, geo.perms[sym][best_move])
+        return best_score, best_move
+
+    def _candidates(self, occupied, first):
+        """Empty cells worth trying, best guesses first"""
+        free = self.game.nearby_free(occupied)
+        moves = [i for i in self.geo.move_order if free >> i & 1]
+        if first is not None and first in moves:
+            moves.remove(first)
+            moves.insert(0, first)
+        return moves
+
+    def _window_score(self, mask, boards):
+        """Score of one segment from X's side: open lines weighted by fill"""
+        a = (mask & boards[0]).bit_count()
+        b = (mask & boards[1]).bit_count()
+        if a and not b:
+            return self.geo.weights[a]
+        if b and not a:
+            return -self.geo.weights[b]
+        return 0
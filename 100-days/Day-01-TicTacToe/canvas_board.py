@@ -0,0 +1,82 @@
+"""
+Canvas board renderer.
+
+Draws the whole grid on one tk.Canvas instead of one tk.Button per cell.
+The grid lines are drawn once; after that render() compares the engine's
+bitboards with what is on screen and only touches the cells that changed,
+so a move or a reset costs work proportional to the marks involved, not
+to the board size.
+"""
+
+import tkinter as tk
+
+MARK_COLORS = ("#ff4d4d", "#4da6ff")  # X, O
+
+
+class CanvasBoard(tk.Canvas):
+    """An N x N board view; clicks are reported as on_click(row, col)."""
+
+    def __init__(self, master, game, on_click=None, cell=None, bg="#333", line="#2b2b2b"):
+        if cell is None:
+            cell = max(16, min(100, 600 // game.size))
+        side = cell * game.size
+        super().__init__(master, width=side, height=side, bg=bg,
+                         highlightthickness=0, bd=0)
+        self.game = game
+        self.cell = cell
+        self.on_click = on_click
+        self._shown = [0, 0]   # Bitboards currently drawn
+        self._items = {}       # Bit index -> canvas item ids
+
+        for i in range(1, game.size):
+            self.create_line(i * cell, 0, i * cell, side, fill=line, width=2)
+            self.create_line(0, i * cell, side, i * cell, fill=line, width=2)
+        self.bind("<Button-1>", self._clicked)
+
+    def cell_at(self, x, y):
+        """(row, col) under canvas pixel (x, y), or None outside the grid"""
+        row, col = int(y // self.cell), int(x // self.cell)
+        if 0 <= row < self.game.size and 0 <= col < self.game.size:
+            return row, col
+        return None
+
+    def _clicked(self, event):
+        pos = self.cell_at(event.x, event.y)
+        if pos is not None and self.on_click:
+            self.on_click(*pos)
+
+    def render(self):
+        """Redraw only the cells whose contents differ from the last frame"""
+        boards = self.game.boards
+        dirty = (boards[0] ^ self._shown[0]) | (boards[1] ^ self._shown[1])
+        while dirty:
+            low = dirty & -dirty
+            index = low.bit_length() - 1
+            for item in self._items.pop(index, ()):
+                self.delete(item)
+            if boards[0] & low:
+                self._items[index] = self._draw_mark(index, 0)
+            elif boards[1] & low:
+                self._items[index] = self._draw_mark(index, 1)
+            dirty ^= low
+        self._shown = [boards[0], boards[1]]
+
+    def _draw_mark(self, index, player):
+        row, col = self.game.position(index)
+        pad = max(3, self.cell // 5)
+        x0, y0 = col * self.cell + pad, row * self.cell + pad
+        x1, y1 = (col + 1) * self.cell - pad, (row + 1) * self.cell - pad
+        width = max(2, self.cell // 12)
+        color = MARK_COLORS[player]
+        if player == 0:
+            return (self.create_line(x0, y0, x1, y1, fill=color, width=width),
+                    self.create_line(x0, y1, x1, y0, fill=color, width=width))
+        return (self.create_oval(x0, y0, x1, y1, outline=color, width=width),)
+
+    def flash(self, row, col, color="#3d5c3d", ms=1000):
+        """Briefly shade one cell (used for hints)"""
+        c = self.cell
+        item = self.create_rectangle(col * c + 1, row * c + 1, (col + 1) * c - 1, (row + 1) * c - 1,
+                                     fill=color, width=0)
+        self.tag_lower(item)
+        self.after(ms, lambda: self.delete(item))
@@ -0,0 +1,162 @@
+"""
+Headless Tic Tac Toe engine.
+
+Each player's marks live in an integer bitboard, so the game can be played,
+checked and simulated without any Tk widgets. Boards are N x N with a
+configurable k-in-a-row win length (3x3 / 3 is classic Tic Tac Toe,
+15x15 / 5 is Gomoku).
+
+Cells are stored with a stride of N + 1: the extra, always-empty column
+stops horizontal and diagonal runs from wrapping onto the next row, so a
+run can be followed with plain shifts.
+"""
+
+SYMBOLS = ("X", "O")
+DRAW = "draw"
+
+
+class TicTacToe:
+    """State of one round: two bitboards plus whose turn it is."""
+
+    def __init__(self, size=3, win_length=None):
+        if win_length is None:
+            win_length = size
+        if size < 1 or not 1 <= win_length <= size:
+            raise ValueError(f"invalid board {size}x{size} with {win_length} in a row")
+
+        self.size = size
+        self.win_length = win_length
+        self.stride = size + 1
+        self.full_board = 0
+        for r in range(size):
+            self.full_board |= ((1 << size) - 1) << (r * self.stride)
+        # Horizontal, vertical, diagonal, anti-diagonal
+        self.directions = (1, self.stride, self.stride + 1, self.stride - 1)
+        self.reset()
+
+    def reset(self):
+        """Clear the board; Player 1 (X) always starts"""
+        self.boards = [0, 0]
+        self.turn = 0
+        self.result = None
+        self.last_move = None
+        self.history = []  # (row, col) of every move, in order
+
+    def copy(self):
+        """Independent snapshot of this game (e.g. for a search thread)"""
+        other = TicTacToe.__new__(TicTacToe)
+        other.__dict__.update(self.__dict__)
+        other.boards = list(self.boards)
+        other.history = list(self.history)
+        return other
+
+    @property
+    def current_player(self):
+        return SYMBOLS[self.turn]
+
+    @property
+    def occupied(self):
+        return self.boards[0] | self.boards[1]
+
+    @property
+    def is_over(self):
+        return self.result is not None
+
+    def index(self, row, col):
+        """Bit index of a cell"""
+        return row * self.stride + col
+
+    def position(self, index):
+        """(row, col) of a bit index"""
+        return divmod(index, self.stride)
+
+    def cell(self, row, col):
+        """Return "X", "O" or "" for the given cell"""
+        bit = 1 << self.index(row, col)
+        if self.boards[0] & bit:
+            return SYMBOLS[0]
+        if self.boards[1] & bit:
+            return SYMBOLS[1]
+        return ""
+
+    def is_empty(self, row, col):
+        return not self.occupied >> self.index(row, col) & 1
+
+    def legal_moves(self):
+        """Yield (row, col) of every empty cell while the game is running"""
+        if self.result is not None:
+            return
+        free = self.full_board & ~self.occupied
+        while free:
+            low = free & -free
+            yield self.position(low.bit_length() - 1)
+            free ^= low
+
+    def nearby_free(self, occupied=None):
+        """
+        Bitmask of empty cells worth considering as moves.
+
+        On boards where lines are shorter than the board (Gomoku style) only
+        cells touching an existing mark count; far-away moves are almost never
+        good and would make searches branch explosively.
+        """
+        if occupied is None:
+            occupied = self.occupied
+        free = self.full_board & ~occupied
+        if occupied and self.win_length < self.size:
+            near = occupied
+            for step in self.directions:
+                near |= occupied << step | occupied >> step
+            free &= near
+        return free
+
+    def is_win_at(self, board, index):
+        """
+        True if the stone at `index` completes a line on `board`.
+
+        Only the four lines through that cell are followed, and each walk
+        stops at the first gap, so this costs O(k) whatever the board size.
+        """
+        need = self.win_length - 1
+        for step in self.directions:
+            run = 0
+            i = index + step
+            while run < need and board >> i & 1:
+                run += 1
+                i += step
+            i = index - step
+            while run < need and i >= 0 and board >> i & 1:
+                run += 1
+                i -= step
+            if run >= need:
+                return True
+        return False
+
+    def play(self, row, col):
+        """
+        Place the current player's mark and switch turns.
+
+        Returns the winning symbol, DRAW, or None if the game goes on.
+        Raises ValueError for an occupied cell or a finished game.
+        """
+        if self.result is not None:
+            raise ValueError("game is already over")
+        if not (0 <= row < self.size and 0 <= col < self.size):
+            raise ValueError(f"cell ({row}, {col}) is off the board")
+        index = self.index(row, col)
+        bit = 1 << index
+        if self.occupied & bit:
+            raise ValueError(f"cell ({row}, {col}) is already taken")
+
+        board = self.boards[self.turn] | bit
+        self.boards[self.turn] = board
+        self.last_move = (row, col)
+        self.history.append(self.last_move)
+
+        if self.is_win_at(board, index):
+            self.result = SYMBOLS[self.turn]
+        elif self.occupied == self.full_board:
+            self.result = DRAW
+
+        self.turn ^= 1
+        return self.result
@@ -0,0 +1,157 @@
+"""
+Load test for server.py.
+
+Opens N simulated players on localhost. Each joins a match, plays random
+legal moves as fast as the server answers and rejoins when a match ends,
+until the requested number of matches has been played.
+Move latency is the time from sending a move until the server's state
+update for it comes back.
+
+Examples:
+    python loadtest.py --serve --players 2000 --games 5
+    python loadtest.py --port 8765 --players 500 --size 15 --win 5
+"""
+
+import argparse
+import asyncio
+import json
+import random
+import time
+
+from engine import TicTacToe
+from server import DEFAULT_HOST, DEFAULT_PORT, encode, serve
+
+
+async def simulated_player(host, port, size, win, stats, rng):
+    """Play matches back to back until cancelled"""
+    reader, writer = await asyncio.open_connection(host, port)
+    game = TicTacToe(size, win)
+    me = None
+    sent_at = None
+    join = encode({"type": "join", "size": size, "win": win})
+
+    def play_random():
+        nonlocal sent_at
+        row, col = rng.choice(list(game.legal_moves()))
+        sent_at = time.perf_counter()
+        writer.write(encode({"type": "move", "row": row, "col": col}))
+
+    writer.write(join)
+    try:
+        while True:
+            line = await reader.readline()
+            if not line:
+                break
+            message = json.loads(line)
+            kind = message["type"]
+
+            if kind == "start":
+                game.reset()
+                me = message["you"]
+                if me == "X":
+                    play_random()
+            elif kind == "state":
+                if message["player"] == me and sent_at is not None:
+                    stats.latencies.append(time.perf_counter() - sent_at)
+                    sent_at = None
+                game.play(*message["last"])
+                if message["result"] is not None:
+                    if me == "X":  # Count each match once
+                        stats.match_finished()
+                    writer.write(join)
+                elif message["turn"] == me:
+                    play_random()
+            elif kind == "end":
+                writer.write(join)
+            elif kind == "error":
+                raise RuntimeError(message["message"])
+            await writer.drain()
+    finally:
+        writer.close()
+
+
+class Stats:
+    """Shared counters; `done` fires once enough matches have finished."""
+
+    def __init__(self, target):
+        self.target = target
+        self.matches = 0
+        self.latencies = []
+        self.done = asyncio.Event()
+
+    def match_finished(self):
+        self.matches += 1
+        if self.matches >= self.target:
+            self.done.set()
+
+
+def percentile(sorted_values, fraction):
+    if not sorted_values:
+        return 0.0
+    index = min(len(sorted_values) - 1, int(fraction * len(sorted_values)))
+    return sorted_values[index]
+
+
+async def run(args):
+    listener = None
+    if args.serve:
+        listener, _ = await serve(args.host, args.port)
+
+    stats = Stats(args.players // 2 * args.games)
+    rng = random.Random(args.seed)
+    start = time.perf_counter()
+    players = [
+        asyncio.create_task(simulated_player(args.host, args.port, args.size, args.win,
+                                             stats, random.Random(rng.getrandbits(32))))
+        for _ in range(args.players)
+    ]
+    # Matchmaking pairs players arbitrarily, so rather than each playing an
+    # exact number of games everyone plays until the total is reached
+    done = asyncio.create_task(stats.done.wait())
+    await asyncio.wait(players + [done], return_when=asyncio.FIRST_COMPLETED)
+    elapsed = time.perf_counter() - start
+    for task in players + [done]:
+        task.cancel()
+    outcomes = await asyncio.gather(*players, return_exceptions=True)
+    errors = [e for e in outcomes if isinstance(e, Exception)
+              and not isinstance(e, asyncio.CancelledError)]
+
+    if listener is not None:
+        listener.close()
+        await listener.wait_closed()
+    if errors:
+        raise errors[0]
+
+    latencies = stats.latencies
+    latencies.sort()
+    print(f"{args.players} players, {stats.matches:,} matches, "
+          f"{len(latencies):,} moves in {elapsed:.2f}s ({len(latencies) / elapsed:,.0f} moves/s)")
+    print(f"Move latency: p50 {percentile(latencies, 0.50) * 1000:.2f} ms, "
+          f"p99 {percentile(latencies, 0.99) * 1000:.2f} ms, "
+          f"max {latencies[-1] * 1000 if latencies else 0:.2f} ms")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Load test the Tic Tac Toe server")
+    parser.add_argument("--host", default=DEFAULT_HOST)
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT)
+    parser.add_argument("--serve", action="store_true",
+                        help="run the server in this process instead of connecting to one")
+    parser.add_argument("--players", type=int, default=200, help="simulated players (even)")
+    parser.add_argument("--games", type=int, default=3,
+                        help="matches per pair of players (total = players / 2 * games)")
+    parser.add_argument("--size", type=int, default=3)
+    parser.add_argument("--win", type=int, default=None)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+    if args.players < 2:
+        parser.error("--players must be at least 2")
+    if args.games < 1:
+        parser.error("--games must be at least 1")
+    if args.players % 2:
+        parser.error("--players must be even so every player gets an opponent")
+    asyncio.run(run(args))
+
+
+if __name__ == "__main__":
+    main()
@@ -1,20 +1,21 @@
+import argparse
+import queue
+import threading
 import tkinter as tk
 from tkinter import messagebox
 
+import solved
+from ai import AlphaBetaPlayer
+from canvas_board import CanvasBoard
+from engine import DRAW, TicTacToe
+from matchlog import DEFAULT_PATH as DEFAULT_LOG, MatchLog
+from mcts import ParallelMCTSPlayer
+from net_client import NetworkClient
+
 # -----------------------------
 # Tic Tac Toe Game with Score
 # -----------------------------
 
-# Initialize main window
-root = tk.Tk()
-root.title("Tic Tac Toe")
-root.configure(bg="#2b2b2b")  # Dark background
-
-# Game variables
-current_player = "X"
-player1_score = 0
-player2_score = 0
-
 # -----------------------------
 # Functions
 # -----------------------------
@@ -23,55 +24,148 @@ def check_winner():
     """Check if someone has won or if it's a draw"""
     global player1_score, player2_score
 
-    # All possible winning combinations (rows, cols, diagonals)
-    wins = [
-        [buttons[0][0], buttons[0][1], buttons[0][2]],
-        [buttons[1][0], buttons[1][1], buttons[1][2]],
-        [buttons[2][0], buttons[2][1], buttons[2][2]],
-        [buttons[0][0], buttons[1][0], buttons[2][0]],
-        [buttons[0][1], buttons[1][1], buttons[2][1]],
-        [buttons[0][2], buttons[1][2], buttons[2][2]],
-        [buttons[0][0], buttons[1][1], buttons[2][2]],
-        [buttons[0][2], buttons[1][1], buttons[2][0]]
-    ]
-
-    # Check all win conditions
-    for combo in wins:
-        if combo[0]["text"] == combo[1]["text"] == combo[2]["text"] != "":
-            winner = combo[0]["text"]
-            if winner == "X":
+    if game.result is None:
+        return
+
+    match_log.record(game.size, game.win_length, game.history, game.result)
+    if game.result == DRAW:
+        messagebox.showinfo("Game Over", "It's a Draw!")
+    elif game.result == "X":
+        player1_score += 1
+        messagebox.showinfo("Game Over", "Player 1 (X) Wins!")
+    else:
+        player2_score += 1
+        messagebox.showinfo("Game Over", "Player 2 (O) Wins!")
+    update_score()
+    reset_board()
+
+def button_click(row, col):
+    """Handle button click for the current player"""
+    if net is not None:
+        # Online the server is the referee: ask it, and draw when it answers
+        if my_symbol == game.current_player and not game.is_over and game.is_empty(row, col):
+            net.send({"type": "move", "row": row, "col": col})
+        return
+    if ai_thinking or (ai_player and game.current_player == "O"):
+        return  # Not the human's turn
+    if game.is_over or not game.is_empty(row, col):
+        return
+
+    place_mark(row, col)
+    if ai_player and game.current_player == "O":  # Round may have just ended
+        start_ai_turn()
+
+def place_mark(row, col):
+    """Play a move in the engine and show it on the board"""
+    player = game.current_player
+    game.play(row, col)  # Also switches player
+    if board_canvas is not None:
+        board_canvas.render()
+    else:
+        buttons[row][col]["text"] = player
+        buttons[row][col]["fg"] = "#ff4d4d" if player == "X" else "#4da6ff"
+    check_winner()
+
+def start_ai_turn():
+    """Search for the computer's move without blocking the Tk main loop"""
+    global ai_thinking
+    ai_thinking = True
+    status_label.config(text="Computer is thinking...")
+    snapshot, this_round = game.copy(), round_id
+
+    def search():
+        ai_moves.put((this_round, ai_player.choose_move(snapshot)))
+
+    threading.Thread(target=search, daemon=True).start()
+    root.after(20, poll_ai_move)
+
+def poll_ai_move():
+    """Pick up the computer's move once the search thread has finished"""
+    global ai_thinking
+    try:
+        this_round, (row, col) = ai_moves.get_nowait()
+    except queue.Empty:
+        root.after(20, poll_ai_move)
+        return
+
+    ai_thinking = False
+    status_label.config(text="")
+    if this_round == round_id:
+        place_mark(row, col)
+
+def show_hint():
+    """Highlight the best move and say how the round ends with perfect play"""
+    if game.is_over or ai_thinking:
+        return
+    table = solved.load_table()
+    row, col = table.best_move(game)
+    outcome = table.outcome(game)
+    forecast = "a draw" if outcome == DRAW else f"{outcome} wins"
+    status_label.config(text=f"Hint: ({row + 1}, {col + 1}) - {forecast}")
+    if board_canvas is not None:
+        board_canvas.flash(row, col)
+    else:
+        buttons[row][col].config(bg="#3d5c3d")
+        root.after(1000, lambda: buttons[row][col].config(bg="#333"))
+
+def poll_network():
+    """Apply whatever the server has sent since the last poll"""
+    global my_symbol, player1_score, player2_score
+    for message in net.poll():
+        kind = message["type"]
+        if kind == "waiting":
+            status_label.config(text="Waiting for an opponent...")
+        elif kind == "start":
+            my_symbol = message["you"]
+            clear_board()
+            status_label.config(text=f"Match {message['match']}: you are {my_symbol}")
+        elif kind == "state":
+            if message["result"] is not None:
+                my_symbol = None
+            place_mark(*message["last"])  # Ends the round through check_winner
+        elif kind == "end":
+            my_symbol = None
+            match_log.record(game.size, game.win_length, game.history, message["result"])
+            if message["result"] == "X":
                 player1_score += 1
-                messagebox.showinfo("Game Over", "Player 1 (X) Wins!")
             else:
                 player2_score += 1
-                messagebox.showinfo("Game Over", "Player 2 (O) Wins!")
             update_score()
+            messagebox.showinfo("Game Over", f"{message['result']} wins: {message['reason']}")
             reset_board()
+        elif kind == "error":
+            status_label.config(text=f"Server: {message['message']}")
+        elif kind == "disconnected":
+            status_label.config(text="Disconnected from server")
             return
+    root.after(30, poll_network)
 
-    # Check for draw (all filled)
-    if all(button["text"] != "" for row in buttons for button in row):
-        messagebox.showinfo("Game Over", "It's a Draw!")
-        reset_board()
+def flush_match_log():
+    """Write out a finished game that is waiting in the log's buffer"""
+    match_log.flush_if_due()
+    root.after(int(match_log.flush_interval * 1000), flush_match_log)
 
-def button_click(row, col):
-    """Handle button click for the current player"""
-    global current_player
-
-    if buttons[row][col]["text"] == "":  # If empty
-        buttons[row][col]["text"] = current_player
-        buttons[row][col]["fg"] = "#ff4d4d" if current_player == "X" else "#4da6ff"
-        check_winner()
-        # Switch player
-        current_player = "O" if current_player == "X" else "X"
+def clear_board():
+    """Empty the engine and the board view"""
+    game.reset()  # Always start with Player 1
+    if board_canvas is not None:
+        board_canvas.render()  # Erases just the marks that were drawn
+    else:
+        for row in buttons:
+            for button in row:
+                button.config(text="", bg="#333")
+    status_label.config(text="")
 
 def reset_board():
     """Clear the board for a new round"""
-    global current_player
-    for row in buttons:
-        for button in row:
-            button.config(text="")
-    current_player = "X"  # Always start with Player 1
+    global round_id
+    if net is not None and my_symbol is not None:
+        status_label.config(text="Finish this match first")
+        return
+    round_id += 1
+    clear_board()
+    if net is not None:
+        net.send({"type": "join", "size": game.size, "win": game.win_length})
 
 def update_score():
     """Update score labels"""
@@ -82,39 +176,131 @@ def update_score():
 # UI Setup
 # -----------------------------
 
-# Frames (Left = game board, Right = score)
-frame_board = tk.Frame(root, bg="#2b2b2b")
-frame_board.grid(row=0, column=0, padx=20, pady=20)
-
-frame_score = tk.Frame(root, bg="#2b2b2b")
-frame_score.grid(row=0, column=1, padx=20, pady=20)
-
-# Score labels
-player1_label = tk.Label(frame_score, text=f"Player 1 (X): {player1_score}",
-                         font=("Arial", 14), fg="white", bg="#2b2b2b")
-player1_label.pack(pady=10)
-
-player2_label = tk.Label(frame_score, text=f"Player 2 (O): {player2_score}",
-                         font=("Arial", 14), fg="white", bg="#2b2b2b")
-player2_label.pack(pady=10)
-
-# Reset button
-reset_btn = tk.Button(frame_score, text="Reset Board", font=("Arial", 12),
-                      command=reset_board, bg="#444", fg="white")
-reset_btn.pack(pady=20)
-
-# Game board buttons (3x3 grid)
-buttons = []
-for r in range(3):
-    row = []
-    for c in range(3):
-        btn = tk.Button(frame_board, text="", width=6, height=3,
-                        font=("Arial", 24, "bold"),
-                        bg="#333", fg="white",
-                        command=lambda r=r, c=c: button_click(r, c))
-        btn.grid(row=r, column=c, padx=5, pady=5)
-        row.append(btn)
-    buttons.append(row)
-
-# Run the main loop
-root.mainloop()
\ No newline at end of file
+# Guarded so worker processes (which re-import this file) never open a window
+if __name__ == "__main__":
+    # Board settings (e.g. --size 15 --win 5 for Gomoku)
+    parser = argparse.ArgumentParser(description="Tic Tac Toe")
+    parser.add_argument("--size", type=int, default=3, help="board size N (N x N)")
+    parser.add_argument("--win", type=int, default=None,
+                        help="marks in a row needed to win (default: N)")
+    parser.add_argument("--ai", nargs="?", const="minimax", choices=("minimax", "mcts"),
+                        help="let the computer play Player 2 (O); mcts suits big boards")
+    parser.add_argument("--think", type=float, default=1.0,
+                        help="computer thinking time per move in seconds")
+    parser.add_argument("--workers", type=int, default=None,
+                        help="processes for the mcts player (default: all cores)")
+    parser.add_argument("--connect", metavar="HOST:PORT", default=None,
+                        help="play online against another client via server.py")
+    parser.add_argument("--log", default=DEFAULT_LOG, metavar="PATH",
+                        help="match log that keeps the scores between runs")
+    parser.add_argument("--renderer", choices=("auto", "buttons", "canvas"), default="auto",
+                        help="one button per cell, or a single canvas (auto: canvas above 5x5)")
+    args = parser.parse_args()
+
+    # Computer opponent: searches on a worker thread, answers through a queue.
+    # Created before Tk so forked search workers don't inherit the display.
+    if args.ai == "mcts":
+        ai_player = ParallelMCTSPlayer(workers=args.workers, time_limit=args.think)
+    elif args.ai:
+        ai_player = AlphaBetaPlayer(time_limit=args.think)
+    else:
+        ai_player = None
+    if args.connect and ai_player:
+        parser.error("--ai and --connect can't be combined")
+    ai_moves = queue.Queue()
+    ai_thinking = False
+    round_id = 0  # Bumped on reset so a stale AI answer is ignored
+
+    # Initialize main window
+    root = tk.Tk()
+    root.title("Tic Tac Toe" if args.size == 3 else f"Tic Tac Toe {args.size}x{args.size}")
+    root.configure(bg="#2b2b2b")  # Dark background
+
+    # Game variables
+    game = TicTacToe(args.size, args.win)
+
+    # Online play: the server owns the game, this window is just a client
+    net = None
+    my_symbol = None  # Our side in the current online match
+    if args.connect:
+        host, _, port = args.connect.rpartition(":")
+        net = NetworkClient(host or "127.0.0.1", int(port))
+
+    # Every finished game is logged; the scores carry over between runs
+    match_log = MatchLog(args.log)
+    player1_score, player2_score, _ = match_log.stats.scores(game.size, game.win_length)
+
+    # Frames (Left = game board, Right = score)
+    frame_board = tk.Frame(root, bg="#2b2b2b")
+    frame_board.grid(row=0, column=0, padx=20, pady=20)
+
+    frame_score = tk.Frame(root, bg="#2b2b2b")
+    frame_score.grid(row=0, column=1, padx=20, pady=20)
+
+    # Score labels
+    player1_label = tk.Label(frame_score, text=f"Player 1 (X): {player1_score}",
+                             font=("Arial", 14), fg="white", bg="#2b2b2b")
+    player1_label.pack(pady=10)
+
+    player2_label = tk.Label(frame_score, text=f"Player 2 (O): {player2_score}",
+                             font=("Arial", 14), fg="white", bg="#2b2b2b")
+    player2_label.pack(pady=10)
+
+    # Reset button
+    reset_btn = tk.Button(frame_score, text="Reset Board", font=("Arial", 12),
+                          command=reset_board, bg="#444", fg="white")
+    reset_btn.pack(pady=20)
+
+    # Hints come from the solved table, which only covers the classic board
+    if solved.supports(game):
+        hint_btn = tk.Button(frame_score, text="Hint", font=("Arial", 12),
+                             command=show_hint, bg="#444", fg="white")
+        hint_btn.pack(pady=(0, 10))
+
+    status_label = tk.Label(frame_score, text="", font=("Arial", 11, "italic"),
+                            fg="#aaaaaa", bg="#2b2b2b")
+    status_label.pack(pady=10)
+
+    # Game board: one canvas for big boards, a grid of buttons otherwise
+    use_canvas = args.renderer == "canvas" or (args.renderer == "auto" and game.size > 5)
+    buttons = []
+    board_canvas = None
+    if use_canvas:
+        board_canvas = CanvasBoard(frame_board, game, on_click=button_click)
+        board_canvas.pack()
+    else:
+        # N x N buttons, shrinking the cells on bigger boards
+        cell_scale = min(1.0, 3 / game.size)
+        cell_font = ("Arial", max(8, int(24 * cell_scale)), "bold")
+        cell_pad = 5 if game.size <= 5 else 1
+
+        for r in range(game.size):
+            row = []
+            for c in range(game.size):
+                btn = tk.Button(frame_board, text="", width=max(2, int(6 * cell_scale)),
+                                height=max(1, int(3 * cell_scale)),
+                                font=cell_font,
+                                bg="#333", fg="white",
+                                command=lambda r=r, c=c: button_click(r, c))
+                btn.grid(row=r, column=c, padx=cell_pad, pady=cell_pad)
+                row.append(btn)
+            buttons.append(row)
+
+    def on_close():
+        """Stop any search worker processes along with the window"""
+        if hasattr(ai_player, "close"):
+            ai_player.close()
+        if net is not None:
+            net.close()
+        match_log.close()
+        root.destroy()
+
+    if net is not None:
+        net.send({"type": "join", "size": game.size, "win": game.win_length})
+        poll_network()
+
+    root.protocol("WM_DELETE_WINDOW", on_close)
+    flush_match_log()
+
+    # Run the main loop
+    root.mainloop()
@@ -0,0 +1,248 @@
+"""
+Persistent match log.
+
+Every finished game is appended to a compact binary log:
+
+    file header   b"TTTLOG1\\n"
+    per game      <size:u8> <win:u8> <result:u8> <moves:u16>  then one u16
+                  cell (row * size + col) per move, in order
+
+Writes are buffered and fsync'd in batches, so logging costs a buffer
+append per game. Scores and per-opening statistics are rebuilt on start-up
+from a snapshot (the statistics plus the log offset they cover) and the
+part of the log written after it, so restarts stay fast however long the
+log gets. A torn or corrupt record (e.g. after a crash) ends the log: it
+and anything after it are dropped.
+"""
+
+import json
+import os
+import struct
+import time
+
+from engine import DRAW, SYMBOLS
+
+MAGIC = b"TTTLOG1\n"
+HEADER = struct.Struct("<BBBH")
+RESULT_CODES = {DRAW: 0, SYMBOLS[0]: 1, SYMBOLS[1]: 2}
+RESULTS = (DRAW, SYMBOLS[0], SYMBOLS[1])
+DEFAULT_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "matches.log")
+
+
+def encode_record(size, win, cells, result):
+    """Pack one game; `cells` are row * size + col for each move"""
+    return HEADER.pack(size, win, RESULT_CODES[result], len(cells)) + \
+        struct.pack(f"<{len(cells)}H", *cells)
+
+
+def iter_records(data, offset=0):
+    """
+    Yield (end offset, size, win, cells, result) for each whole record.
+
+    Stops quietly at a truncated or corrupt record.
+    """
+    end = len(data)
+    while offset + HEADER.size <= end:
+        size, win, code, n = HEADER.unpack_from(data, offset)
+        stop = offset + HEADER.size + 2 * n
+        if stop > end or code >= len(RESULTS):
+            return
+        cells = struct.unpack_from(f"<{n}H", data, offset + HEADER.size)
+        offset = stop
+        yield offset, size, win, cells, RESULTS[code]
+
+
+class MatchStats:
+    """Win/draw counts and opening statistics per board shape."""
+
+    def __init__(self, shapes=None):
+        # "NxK" -> {"X": n, "O": n, "draw": n, "openings": {cell: {"X": n, ...}}}
+        self.shapes = shapes or {}
+
+    @staticmethod
+    def _blank():
+        return {SYMBOLS[0]: 0, SYMBOLS[1]: 0, DRAW: 0}
+
+    def _shape(self, size, win):
+        key = f"{size}x{win}"
+        if key not in self.shapes:
+            self.shapes[key] = dict(self._blank(), openings={})
+        return self.shapes[key]
+
+    def add(self, size, win, cells, result):
+        shape = self._shape(size, win)
+        shape[result] += 1
+        if cells:
+            opening = shape["openings"].setdefault(str(cells[0]), self._blank())
+            opening[result] += 1
+
+    def merge(self, other):
+        for key, theirs in other.shapes.items():
+            size, win = map(int, key.split("x"))
+            mine = self._shape(size, win)
+            for result in RESULTS:
+                mine[result] += theirs[result]
+            for cell, counts in theirs["openings"].items():
+                opening = mine["openings"].setdefault(cell, self._blank())
+                for result in RESULTS:
+                    opening[result] += counts[result]
+
+    def scores(self, size, win):
+        """(X wins, O wins, draws) for one board shape"""
+        shape = self.shapes.get(f"{size}x{win}", self._blank())
+        return shape[SYMBOLS[0]], shape[SYMBOLS[1]], shape[DRAW]
+
+    def openings(self, size, win):
+        """{(row, col): {"X": n, "O": n, "draw": n}} for one board shape"""
+        shape = self.shapes.get(f"{size}x{win}")
+        if not shape:
+            return {}
+        return {divmod(int(cell), size): counts for cell, counts in shape["openings"].items()}
+
+
+class MatchLog:
+    """
+    Append-only game log with batched fsync and snapshot-based recovery.
+
+    Records are flushed once `batch_size` games are pending or
+    `flush_interval` seconds have passed since the last flush, and a new
+    snapshot is written every `snapshot_every` games. The interval is
+    checked as games arrive; owners that can sit idle call flush_if_due()
+    on a timer so the last game is not held back.
+    """
+
+    def __init__(self, path=DEFAULT_PATH, batch_size=1000, flush_interval=1.0,
+                 snapshot_every=100000):
+        self.path = path
+        self.snapshot_path = path + ".snapshot"
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.snapshot_every = snapshot_every
+        self.stats = MatchStats()
+        self._buffer = bytearray()
+        self._pending = 0
+        self._since_snapshot = 0
+        self._last_flush = time.monotonic()
+
+        offset = self._recover()
+        self._file = open(path, "r+b" if offset else "wb")
+        if not offset:
+            self._file.write(MAGIC)
+            offset = len(MAGIC)
+        # Drop a torn record left by a crash before appending after it
+        self._file.truncate(offset)
+        self._file.seek(offset)
+        self.offset = offset
+
+    def _recover(self):
+        """Load the snapshot, replay the log tail; return the end of valid data"""
+        try:
+            f = open(self.path, "rb")
+        except FileNotFoundError:
+            return 0
+        with f:
+            if f.read(len(MAGIC)) != MAGIC:
+                raise ValueError(f"{self.path} is not a match log")
+            log_size = os.fstat(f.fileno()).st_size
+
+            start = len(MAGIC)
+            try:
+                with open(self.snapshot_path) as snap_file:
+                    snap = json.load(snap_file)
+                if len(MAGIC) <= snap["offset"] <= log_size:
+                    self.stats = MatchStats(snap["stats"])
+                    start = snap["offset"]
+            except (OSError, ValueError, KeyError):
+                pass
+
+            # Only the games written after the snapshot are read back
+            f.seek(start)
+            tail = f.read()
+
+        end = 0
+        for end, size, win, cells, result in iter_records(tail):
+            self.stats.add(size, win, cells, result)
+            self._since_snapshot += 1
+        return start + end
+
+    def record(self, size, win, moves, result):
+        """Log one finished game; `moves` are (row, col) pairs in order"""
+        cells = [r * size + c for r, c in moves]
+        self.stats.add(size, win, cells, result)
+        self.append_encoded(encode_record(size, win, cells, result), 1)
+
+    def append_encoded(self, data, games, stats=None):
+        """
+        Log games already packed with encode_record (e.g. by worker
+        processes), merging their statistics if given.
+        """
+        if stats is not None:
+            self.stats.merge(stats)
+        self._buffer += data
+        self._pending += games
+        self._since_snapshot += games
+        if (self._pending >= self.batch_size or
+                time.monotonic() - self._last_flush >= self.flush_interval):
+            self.flush()
+
+    def flush_if_due(self):
+        """Flush games that have been buffered for `flush_interval` seconds"""
+        if self._pending and time.monotonic() - self._last_flush >= self.flush_interval:
+            self.flush()
+
+    def flush(self):
+        """Write and fsync everything buffered"""
+        self._write_buffer()
+        self._pending = 0
+        self._last_flush = time.monotonic()
+        if self._since_snapshot >= self.snapshot_every:
+            self.snapshot()
+
+    def _write_buffer(self):
+        if self._buffer:
+            self._file.write(self._buffer)
+            self._file.flush()
+            os.fsync(self._file.fileno())
+            self.offset += len(self._buffer)
+            self._buffer.clear()
+
+    def snapshot(self):
+        """Save the statistics for everything up to the current log offset"""
+        self._write_buffer()
+        tmp = self.snapshot_path + ".tmp"
+        with open(tmp, "w") as f:
+            json.dump({"offset": self.offset, "stats": self.stats.shapes}, f)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp, self.snapshot_path)
+        self._since_snapshot = 0
+
+    def close(self):
+        self.flush()
+        if self._since_snapshot:
+            self.snapshot()
+        self._file.close()
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Summarise a match log")
+    parser.add_argument("path", nargs="?", default=DEFAULT_PATH)
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    log = MatchLog(args.path)
+    loaded = time.perf_counter() - start
+    for key, shape in sorted(log.stats.shapes.items()):
+        size, win = map(int, key.split("x"))
+        x, o, draw = log.stats.scores(size, win)
+        total = x + o + draw
+        print(f"{key}: {total:,} games  X {x:,}  O {o:,}  draws {draw:,}")
+        openings = sorted(log.stats.openings(size, win).items(),
+                          key=lambda item: -sum(item[1].values()))
+        for (row, col), counts in openings[:10]:
+            n = sum(counts.values())
+            print(f"  open ({row}, {col}): {n:>10,} games, X wins {100 * counts['X'] / n:5.1f}%")
+    print(f"Loaded in {loaded * 1000:.1f} ms")
+    log.close()
@@ -0,0 +1,274 @@
+"""
+Monte Carlo Tree Search player.
+
+Plain UCT: walk down the tree picking the child with the best upper
+confidence bound, add one new node, finish the game with random moves and
+credit the result back up the path.
+
+The tree is kept between moves: the next search starts from the node for
+the position actually reached, with its statistics intact. For more
+playouts per second, ParallelMCTSPlayer runs one independent tree per
+worker process from the same position (root parallelism) and sums the root
+visit counts before choosing.
+"""
+
+import math
+import multiprocessing
+import os
+import random
+import time
+
+from engine import DRAW, SYMBOLS
+
+EXPLORATION = math.sqrt(2)
+
+
+class Node:
+    """One position in the search tree, reached by `move` (a bit index)."""
+
+    __slots__ = ("move", "parent", "children", "untried", "mover", "wins", "visits")
+
+    def __init__(self, move, parent, mover, untried):
+        self.move = move
+        self.parent = parent
+        self.mover = mover          # Player index who played `move`
+        self.untried = untried      # Bit indices not expanded yet
+        self.children = []
+        self.wins = 0.0             # From the mover's point of view
+        self.visits = 0
+
+    def best_child(self, exploration=EXPLORATION):
+        log_n = math.log(self.visits)
+        return max(
+            self.children,
+            key=lambda ch: ch.wins / ch.visits + exploration * math.sqrt(log_n / ch.visits),
+        )
+
+
+def _free_cells(game, rng):
+    """Candidate cells of `game` as a shuffled list of bit indices"""
+    free = game.nearby_free()
+    cells = []
+    while free:
+        low = free & -free
+        cells.append(low.bit_length() - 1)
+        free ^= low
+    rng.shuffle(cells)
+    return cells
+
+
+def random_playout(game, rng):
+    """
+    Finish `game` (modified in place) with uniformly random moves.
+
+    Shuffling the empty cells once and playing them in order is the same
+    as drawing a random empty cell every turn, without the repeated scans.
+    """
+    if game.result is not None:
+        return game.result
+    free = game.full_board & ~game.occupied
+    cells = []
+    while free:
+        low = free & -free
+        cells.append(low.bit_length() - 1)
+        free ^= low
+    rng.shuffle(cells)
+
+    boards = game.boards
+    turn = game.turn
+    for index in cells:
+        board = boards[turn] | 1 << index
+        boards[turn] = board
+        if game.is_win_at(board, index):
+            game.result = SYMBOLS[turn]
+            game.turn = turn ^ 1
+            return game.result
+        turn ^= 1
+    game.turn = turn
+    game.result = DRAW
+    return DRAW
+
+
+class MCTSPlayer:
+    """
+    Picks moves by running UCT iterations until a budget runs out.
+
+    With `time_limit` set the budget is wall-clock seconds per move,
+    otherwise it is a fixed number of `iterations`.
+    """
+
+    def __init__(self, iterations=1000, time_limit=None, seed=None, reuse_tree=True):
+        self.iterations = iterations
+        self.time_limit = time_limit
+        self.reuse_tree = reuse_tree
+        self.rng = random.Random(seed)
+        self.root = None
+        self.root_boards = None
+        self.playouts = 0
+
+    def choose_move(self, game):
+        """Return the (row, col) to play in `game`, which is left untouched"""
+        stats = self.search(game)
+        best = max(stats, key=lambda move: stats[move][0])
+        return game.position(best)
+
+    def search(self, game):
+        """
+        Grow the tree for `game` within the budget.
+
+        Returns {move: (visits, wins)} for the root's children, where
+        `move` is a bit index and wins are from the side to move.
+        """
+        if game.is_over:
+            raise ValueError("no legal moves")
+        root = self._root_for(game)
+        if not root.children and len(root.untried) == 1:
+            return {root.untried[0]: (1, 0.0)}
+
+        deadline = time.perf_counter() + self.time_limit if self.time_limit else None
+        done = 0
+        while True:
+            if deadline is None:
+                if done >= self.iterations:
+                    break
+            elif not done & 15 and time.perf_counter() > deadline:
+                break
+            self._iterate(root, game)
+            done += 1
+        self.playouts = done
+        return {ch.move: (ch.visits, ch.wins) for ch in root.children}
+
+    def _root_for(self, game):
+        """
+        Reuse the subtree for `game` if it grew out of the last search.
+
+        Every mark added since then must match a child link one level
+        down, alternating players; anything else starts a fresh tree.
+        """
+        node = self.root if self.reuse_tree else None
+        shape = (game.size, game.win_length)
+        if node is not None:
+            prev_shape, prev = self.root_boards
+            if prev_shape != shape or prev[0] & ~game.boards[0] or prev[1] & ~game.boards[1]:
+                node = None
+            else:
+                added = [game.boards[0] & ~prev[0], game.boards[1] & ~prev[1]]
+                while node is not None and (added[0] or added[1]):
+                    player = node.mover ^ 1
+                    low = added[player] & -added[player]
+                    if not low:
+                        node = None
+                        break
+                    added[player] ^= low
+                    index = low.bit_length() - 1
+                    node = next((ch for ch in node.children if ch.move == index), None)
+
+        if node is None:
+            node = Node(None, None, game.turn ^ 1, _free_cells(game, self.rng))
+        node.parent = None
+        self.root = node
+        self.root_boards = (shape, (game.boards[0], game.boards[1]))
+        return node
+
+    def _iterate(self, root, game):
+        state = game.copy()
+        node = root
+
+        # Selection
+        while not node.untried and node.children:
+            node = node.best_child()
+            state.play(*state.position(node.move))
+
+        # Expansion
+        if node.untried and not state.is_over:
+            move = node.untried.pop()
+            state.play(*state.position(move))
+            child = Node(move, node, state.turn ^ 1,
+                         [] if state.is_over else _free_cells(state, self.rng))
+            node.children.append(child)
+            node = child
+
+        # Simulation and backpropagation
+        result = random_playout(state, self.rng)
+        while node is not None:
+            node.visits += 1
+            if result == DRAW:
+                node.wins += 0.5
+            elif result == SYMBOLS[node.mover]:
+                node.wins += 1.0
+            node = node.parent
+
+
+# -----------------------------
+# Root-parallel search
+# -----------------------------
+
+def _worker_loop(conn, seed):
+    """Worker process: keep one tree and answer search requests"""
+    player = MCTSPlayer(seed=seed)
+    while True:
+        request = conn.recv()
+        if request is None:
+            break
+        game, time_limit, iterations = request
+        player.time_limit = time_limit
+        player.iterations = iterations
+        stats = player.search(game)
+        conn.send((stats, player.playouts))
+    conn.close()
+
+
+class ParallelMCTSPlayer:
+    """
+    MCTS spread over worker processes, one independent tree each.
+
+    Every worker searches the same position for the same wall-clock budget
+    with its own random seed and keeps its own tree for the next move. The
+    root visit counts are summed and the most visited move is played, so
+    playouts per move grow with the number of cores.
+    """
+
+    def __init__(self, workers=None, time_limit=1.0, iterations=1000, seed=None):
+        self.time_limit = time_limit
+        self.iterations = iterations
+        self.playouts = 0
+        base = random.Random(seed).getrandbits(32)
+        self.workers = []
+        for n in range(workers or os.cpu_count() or 1):
+            parent_conn, child_conn = multiprocessing.Pipe()
+            proc = multiprocessing.Process(target=_worker_loop, args=(child_conn, base + n),
+                                           daemon=True)
+            proc.start()
+            child_conn.close()
+            self.workers.append((proc, parent_conn))
+
+    def choose_move(self, game):
+        """Return the (row, col) to play in `game`, which is left untouched"""
+        if game.is_over:
+            raise ValueError("no legal moves")
+        for _, conn in self.workers:
+            conn.send((game, self.time_limit, self.iterations))
+
+        visits = {}
+        self.playouts = 0
+        for _, conn in self.workers:
+            stats, playouts = conn.recv()
+            self.playouts += playouts
+            for move, (n, _) in stats.items():
+                visits[move] = visits.get(move, 0) + n
+        best = max(visits, key=visits.get)
+        return game.position(best)
+
+    def close(self):
+        """Stop the worker processes"""
+        for proc, conn in self.workers:
+            try:
+                conn.send(None)
+            except (BrokenPipeError, OSError):
+                pass
+            conn.close()
+        for proc, _ in self.workers:
+            proc.join(timeout=1)
+            if proc.is_alive():
+                proc.terminate()
+        self.workers = []
@@ -0,0 +1,51 @@
+"""
+Blocking client for server.py, for use from the Tk front end.
+
+A background thread reads server messages into a queue; the Tk side drains
+it with root.after, so the main loop never waits on the network.
+"""
+
+import json
+import queue
+import socket
+import threading
+
+from server import encode
+
+
+class NetworkClient:
+    """One connection to a game server."""
+
+    def __init__(self, host, port):
+        self.sock = socket.create_connection((host, port))
+        self.sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        self.messages = queue.Queue()
+        self._reader = threading.Thread(target=self._read_loop, daemon=True)
+        self._reader.start()
+
+    def _read_loop(self):
+        try:
+            for line in self.sock.makefile("rb"):
+                self.messages.put(json.loads(line))
+        except (OSError, ValueError):
+            pass
+        self.messages.put({"type": "disconnected"})
+
+    def send(self, message):
+        self.sock.sendall(encode(message))
+
+    def poll(self):
+        """Return every message received so far, without blocking"""
+        received = []
+        while True:
+            try:
+                received.append(self.messages.get_nowait())
+            except queue.Empty:
+                return received
+
+    def close(self):
+        try:
+            self.send({"type": "leave"})
+        except OSError:
+            pass
+        self.sock.close()
@@ -0,0 +1,242 @@
+"""
+Networked Tic Tac Toe server.
+
+One asyncio event loop hosts any number of concurrent matches. Each match
+owns a TicTacToe engine that is the single source of truth: clients only
+send move requests, the server validates and applies them and streams the
+result to both players.
+
+Protocol: one JSON object per line, UTF-8, in both directions.
+
+  client -> server
+    {"type": "join", "size": 3, "win": 3}   queue for the next match
+    {"type": "move", "row": 1, "col": 2}    play in the current match
+    {"type": "leave"}                       forfeit and disconnect
+
+  server -> client
+    {"type": "waiting"}
+    {"type": "start", "match": 7, "you": "X", "size": 3, "win": 3}
+    {"type": "state", "match": 7, "seq": 1, "last": [1, 2],
+     "player": "X", "turn": "O", "result": null}
+    {"type": "end", "match": 7, "result": "O", "reason": "opponent left"}
+    {"type": "error", "message": "..."}
+
+A "state" message carries only the move just played; clients apply it to
+their own engine, so every message stays small whatever the board size.
+The match is over once "result" is not null; send "join" for a new one.
+
+Messages to a player are buffered without waiting for them to be read. A
+player whose unread output passes MAX_BUFFERED bytes has fallen behind and
+is disconnected, forfeiting their match. So is one that sends a line
+longer than the stream limit.
+
+Run with:  python server.py [--port 8765]
+"""
+
+import argparse
+import asyncio
+import json
+
+from engine import SYMBOLS, TicTacToe
+from matchlog import MatchLog
+
+DEFAULT_HOST = "127.0.0.1"
+DEFAULT_PORT = 8765
+MAX_BOARD = 25
+MAX_BUFFERED = 1 << 20  # Unsent bytes to one player before they are dropped
+
+
+def encode(message):
+    return (json.dumps(message, separators=(",", ":")) + "\n").encode()
+
+
+class Player:
+    """One connected client."""
+
+    def __init__(self, writer):
+        self.writer = writer
+        self.match = None
+        self.symbol = None
+
+    def send(self, message):
+        if self.writer.is_closing():
+            return
+        self.writer.write(encode(message))
+        if self.writer.transport.get_write_buffer_size() > MAX_BUFFERED:
+            # Not reading: drop the connection, its handler then forfeits
+            self.writer.transport.abort()
+
+
+class Match:
+    """Two players and the engine that referees them."""
+
+    def __init__(self, match_id, size, win, players):
+        self.id = match_id
+        self.game = TicTacToe(size, win)
+        self.players = players  # Index 0 plays X, index 1 plays O
+        self.seq = 0
+        for symbol, player in zip(SYMBOLS, players):
+            player.match, player.symbol = self, symbol
+
+    def broadcast(self, message):
+        for player in self.players:
+            player.send(message)
+
+
+class GameServer:
+    """Matchmaking plus move handling for every connection."""
+
+    def __init__(self, log=None):
+        self.waiting = {}   # (size, win) -> Player waiting for an opponent
+        self.matches = {}
+        self.next_id = 1
+        self.moves_played = 0
+        self.log = log      # Optional MatchLog for finished matches
+
+    async def handle(self, reader, writer):
+        player = Player(writer)
+        try:
+            while True:
+                try:
+                    line = await reader.readline()
+                except ValueError:  # Longer than the stream limit
+                    player.send({"type": "error", "message": "message too long"})
+                    break
+                if not line:
+                    break
+                try:
+                    message = json.loads(line)
+                    kind = message["type"]
+                except (ValueError, KeyError, TypeError):
+                    player.send({"type": "error", "message": "malformed message"})
+                    continue
+
+                if kind == "join":
+                    self.join(player, message)
+                elif kind == "move":
+                    self.move(player, message)
+                elif kind == "leave":
+                    break
+                else:
+                    player.send({"type": "error", "message": f"unknown type {kind!r}"})
+                await writer.drain()
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            self.disconnect(player)
+            writer.close()
+
+    def join(self, player, message):
+        if player.match is not None:
+            player.send({"type": "error", "message": "already in a match"})
+            return
+        try:
+            size = int(message.get("size", 3))
+            win = int(message.get("win") or size)
+            if not 1 <= size <= MAX_BOARD:
+                raise ValueError
+            TicTacToe(size, win)  # Validates the combination
+        except (TypeError, ValueError):
+            player.send({"type": "error", "message": "invalid board settings"})
+            return
+
+        key = (size, win)
+        opponent = self.waiting.pop(key, None)
+        if opponent is None or opponent is player:
+            self.waiting[key] = player
+            player.send({"type": "waiting"})
+            return
+
+        match = Match(self.next_id, size, win, [opponent, player])
+        self.next_id += 1
+        self.matches[match.id] = match
+        for p in match.players:
+            p.send({"type": "start", "match": match.id, "you": p.symbol,
+                    "size": size, "win": win})
+
+    def move(self, player, message):
+        match = player.match
+        if match is None:
+            player.send({"type": "error", "message": "not in a match"})
+            return
+        game = match.game
+        if game.current_player != player.symbol:
+            player.send({"type": "error", "message": "not your turn"})
+            return
+        try:
+            result = game.play(int(message["row"]), int(message["col"]))
+        except (KeyError, TypeError, ValueError) as e:
+            player.send({"type": "error", "message": str(e) or "invalid move"})
+            return
+
+        self.moves_played += 1
+        match.seq += 1
+        match.broadcast({"type": "state", "match": match.id, "seq": match.seq,
+                         "last": [game.last_move[0], game.last_move[1]],
+                         "player": player.symbol, "turn": game.current_player,
+                         "result": result})
+        if result is not None:
+            self.finish(match)
+
+    def finish(self, match, result=None):
+        game = match.game
+        if self.log is not None:
+            self.log.record(game.size, game.win_length, game.history, result or game.result)
+        self.matches.pop(match.id, None)
+        for p in match.players:
+            p.match = p.symbol = None
+
+    def disconnect(self, player):
+        for key, waiting in list(self.waiting.items()):
+            if waiting is player:
+                del self.waiting[key]
+        match = player.match
+        if match is not None:
+            # The remaining player wins by forfeit
+            winner = next(p for p in match.players if p is not player)
+            winner.send({"type": "end", "match": match.id, "result": winner.symbol,
+                         "reason": "opponent left"})
+            self.finish(match, winner.symbol)
+
+
+async def serve(host=DEFAULT_HOST, port=DEFAULT_PORT, server=None):
+    """Start listening; returns (asyncio server, GameServer)"""
+    server = server or GameServer()
+    listener = await asyncio.start_server(server.handle, host, port, backlog=4096)
+    return listener, server
+
+
+async def flush_periodically(log):
+    """Keep finished matches from waiting in the log's buffer while idle"""
+    while True:
+        await asyncio.sleep(log.flush_interval)
+        log.flush_if_due()
+
+
+async def main(host, port, log_path=None):
+    log = MatchLog(log_path) if log_path else None
+    listener, _ = await serve(host, port, GameServer(log))
+    print(f"Tic Tac Toe server on {host}:{port}")
+    flusher = asyncio.create_task(flush_periodically(log)) if log is not None else None
+    try:
+        async with listener:
+            await listener.serve_forever()
+    finally:
+        if flusher is not None:
+            flusher.cancel()
+        if log is not None:
+            log.close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Tic Tac Toe match server")
+    parser.add_argument("--host", default=DEFAULT_HOST,
+                        help="interface to bind (default: localhost only)")
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT)
+    parser.add_argument("--log", default=None, metavar="PATH",
+                        help="append every finished match to this match log")
+    args = parser.parse_args()
+    try:
+        asyncio.run(main(args.host, args.port, args.log))
+    except KeyboardInterrupt:
+        pass
@@ -0,0 +1,184 @@
+"""
+Headless batch self-play.
+
+Plays many games between two policies across a process pool and reports
+win/draw/loss counts, a game-length histogram and throughput. Only the
+engine and the players are imported, never the Tk front end, so worker
+processes start cleanly without a display.
+
+Examples:
+    python simulate.py --games 1000000
+    python simulate.py --x minimax --o random --games 20000
+    python simulate.py --size 9 --win 5 --x mcts --o random --games 200
+"""
+
+import argparse
+import os
+import random
+import time
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
+
+from ai import AlphaBetaPlayer
+from engine import DRAW, TicTacToe
+from matchlog import MatchLog, MatchStats, encode_record
+from mcts import MCTSPlayer
+
+
+class RandomPlayer:
+    """Plays a uniformly random empty cell."""
+
+    def __init__(self, seed=None):
+        self.rng = random.Random(seed)
+
+    def choose_move(self, game):
+        free = game.full_board & ~game.occupied
+        if not free:
+            raise ValueError("no legal moves")
+        # Rejection sampling over the cell range beats listing the empties
+        size, stride = game.size, game.stride
+        randrange = self.rng.randrange
+        while True:
+            row, col = randrange(size), randrange(size)
+            if free >> (row * stride + col) & 1:
+                return row, col
+
+
+POLICIES = ("random", "minimax", "mcts")
+
+
+def make_player(policy, seed=None, think=0.05, playouts=200):
+    """Build a player object for a policy name"""
+    if policy == "random":
+        return RandomPlayer(seed)
+    if policy == "minimax":
+        return AlphaBetaPlayer(time_limit=think)
+    if policy == "mcts":
+        return MCTSPlayer(iterations=playouts, seed=seed)
+    raise ValueError(f"unknown policy {policy!r}, expected one of {', '.join(POLICIES)}")
+
+
+def play_batch(task):
+    """
+    Worker entry point: play `games` games and return aggregated counts.
+
+    Only small counters travel back to the parent, plus the games packed a
+    few bytes each when logging is on, so pickling stays cheap.
+    """
+    size, win, x_policy, o_policy, games, seed, think, playouts, log = task
+    players = (make_player(x_policy, seed, think, playouts),
+               make_player(o_policy, seed + 1, think, playouts))
+    results = Counter()
+    lengths = Counter()
+    game = TicTacToe(size, win)
+    # With logging on, games come back packed (a few bytes each) with stats
+    packed = bytearray() if log else None
+    stats = MatchStats() if log else None
+
+    start = time.perf_counter()
+    for _ in range(games):
+        game.reset()
+        moves = 0
+        while game.result is None:
+            game.play(*players[game.turn].choose_move(game))
+            moves += 1
+        results[game.result] += 1
+        lengths[moves] += 1
+        if log:
+            cells = [r * size + c for r, c in game.history]
+            packed += encode_record(size, game.win_length, cells, game.result)
+            stats.add(size, game.win_length, cells, game.result)
+    busy = time.perf_counter() - start
+    return results, lengths, busy, packed, stats
+
+
+def run(size=3, win=None, x_policy="random", o_policy="random", games=100000,
+        workers=None, batch=None, seed=0, think=0.05, playouts=200, log_path=None):
+    """Play `games` games over a process pool and return a summary dict"""
+    workers = workers or os.cpu_count() or 1
+    # A few batches per worker keeps cores busy without flooding the queue
+    batch = batch or max(1, min(50000, games // (workers * 4) or 1))
+    tasks = []
+    remaining = games
+    while remaining > 0:
+        n = min(batch, remaining)
+        tasks.append((size, win, x_policy, o_policy, n, seed + 2 * len(tasks), think, playouts,
+                      log_path is not None))
+        remaining -= n
+
+    results, lengths = Counter(), Counter()
+    busy = 0.0
+    log = MatchLog(log_path) if log_path else None
+    start = time.perf_counter()
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        for r, l, b, packed, stats in pool.map(play_batch, tasks):
+            results.update(r)
+            lengths.update(l)
+            busy += b
+            if log is not None:
+                log.append_encoded(packed, sum(r.values()), stats)
+    if log is not None:
+        log.close()
+    wall = time.perf_counter() - start
+
+    return {
+        "games": games,
+        "results": results,
+        "lengths": lengths,
+        "wall": wall,
+        "workers": workers,
+        "per_core": games / busy if busy else 0.0,
+        "total_rate": games / wall if wall else 0.0,
+    }
+
+
+def print_report(summary, x_policy, o_policy):
+    games = summary["games"]
+    results = summary["results"]
+    print(f"{games:,} games  X={x_policy}  O={o_policy}")
+    for label, key in (("X wins", "X"), ("O wins", "O"), ("Draws", DRAW)):
+        n = results[key]
+        print(f"  {label:<7} {n:>12,}  {100 * n / games:6.2f}%")
+
+    print("Game length (moves):")
+    lengths = summary["lengths"]
+    peak = max(lengths.values())
+    for moves in sorted(lengths):
+        n = lengths[moves]
+        bar = "#" * max(1, round(40 * n / peak))
+        print(f"  {moves:>3} {n:>12,}  {bar}")
+
+    print(f"Throughput: {summary['total_rate']:,.0f} games/s on {summary['workers']} "
+          f"workers, {summary['per_core']:,.0f} games/s per core "
+          f"({summary['wall']:.2f}s wall)")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Batch Tic Tac Toe self-play")
+    parser.add_argument("--games", type=int, default=100000)
+    parser.add_argument("--size", type=int, default=3)
+    parser.add_argument("--win", type=int, default=None)
+    parser.add_argument("--x", dest="x_policy", choices=POLICIES, default="random")
+    parser.add_argument("--o", dest="o_policy", choices=POLICIES, default="random")
+    parser.add_argument("--workers", type=int, default=None,
+                        help="worker processes (default: all cores)")
+    parser.add_argument("--batch", type=int, default=None, help="games per task")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--think", type=float, default=0.05,
+                        help="minimax time per move on boards without a solved table")
+    parser.add_argument("--playouts", type=int, default=200, help="MCTS iterations per move")
+    parser.add_argument("--log", default=None, metavar="PATH",
+                        help="append every game to this match log")
+    args = parser.parse_args()
+    if args.games < 1:
+        parser.error("--games must be at least 1")
+    if args.batch is not None and args.batch < 1:
+        parser.error("--batch must be at least 1")
+
+    summary = run(args.size, args.win, args.x_policy, args.o_policy, args.games,
+                  args.workers, args.batch, args.seed, args.think, args.playouts, args.log)
+    print_report(summary, args.x_policy, args.o_policy)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,189 @@
+"""
+Fully solved 3x3 Tic Tac Toe.
+
+Every board is numbered by its base-3 code (cell i contributes 3**i times
+0 = empty, 1 = X, 2 = O), which gives 3**9 = 19,683 slots. Each slot holds
+one byte:
+
+    bits 0-1  outcome with perfect play: 0 draw, 1 X wins, 2 O wins
+    bit  2    set if the game is already over on this board
+    bits 4-7  best cell (row * 3 + col) for the side to move, 15 if none
+
+Unreachable boards are stored as 0xFF. The table is built once, written next
+to this file and memory-mapped on later starts, so answering "who wins?" or
+"what's the best move?" is two small lookups.
+
+Run `python solved.py` to (re)build the table file ahead of time.
+"""
+
+import mmap
+import os
+import tempfile
+
+from engine import DRAW, SYMBOLS
+
+STATES = 3 ** 9
+UNREACHABLE = 0xFF
+NO_MOVE = 15
+TERMINAL = 4
+MAGIC = b"TTT3x3v1"
+DEFAULT_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "tictactoe_3x3.bin")
+
+OUTCOMES = (DRAW, SYMBOLS[0], SYMBOLS[1])
+
+# Bitboards from the engine use a stride of 4 on a 3x3 board; this maps any
+# such bitboard straight to its base-3 contribution (as if every mark were X)
+STRIDE = 4
+TERNARY = [0] * (1 << (3 * STRIDE))
+for _bits in range(1 << (3 * STRIDE)):
+    _code = 0
+    for _r in range(3):
+        for _c in range(3):
+            if _bits >> (_r * STRIDE + _c) & 1:
+                _code += 3 ** (_r * 3 + _c)
+    TERNARY[_bits] = _code
+
+# Winning lines on plain 9-bit boards (bit = row * 3 + col)
+_LINES = (0b000000111, 0b000111000, 0b111000000,
+          0b001001001, 0b010010010, 0b100100100,
+          0b100010001, 0b001010100)
+
+
+def board_code(boards):
+    """Base-3 code of an engine position given its two bitboards"""
+    return TERNARY[boards[0]] + 2 * TERNARY[boards[1]]
+
+
+def build_table():
+    """Solve every reachable board; returns the packed table as bytes"""
+    table = bytearray([UNREACHABLE]) * STATES
+    pow3 = [3 ** i for i in range(9)]
+    seen = {}
+
+    def solve(x, o, code):
+        """Score for the side to move: >0 win, <0 loss, sooner is larger"""
+        if code in seen:
+            return seen[code]
+        stones = (x | o).bit_count()
+        # X moves first, so an odd count means X just moved and O is to move
+        last, to_move = (x, 1) if stones % 2 else (o, 0)
+        if any(last & line == line for line in _LINES):
+            # The previous move won; quicker wins score higher
+            score = -(10 - stones)
+            table[code] = (1 if stones % 2 else 2) | TERMINAL | NO_MOVE << 4
+            seen[code] = score
+            return score
+        if stones == 9:
+            table[code] = 0 | TERMINAL | NO_MOVE << 4
+            seen[code] = 0
+            return 0
+
+        best_score, best_cell = -100, NO_MOVE
+        for cell in range(9):
+            bit = 1 << cell
+            if (x | o) & bit:
+                continue
+            if to_move == 0:
+                score = -solve(x | bit, o, code + pow3[cell])
+            else:
+                score = -solve(x, o | bit, code + 2 * pow3[cell])
+            if score > best_score:
+                best_score, best_cell = score, cell
+
+        if best_score > 0:
+            outcome = 1 + to_move
+        elif best_score < 0:
+            outcome = 2 - to_move
+        else:
+            outcome = 0
+        table[code] = outcome | best_cell << 4
+        seen[code] = best_score
+        return best_score
+
+    solve(0, 0, 0)
+    return bytes(table)
+
+
+def save_table(path=DEFAULT_PATH):
+    """Build the table and write it atomically to `path`"""
+    data = build_table()
+    # A temp file of our own: simulator workers may all build the table at once
+    with tempfile.NamedTemporaryFile(dir=os.path.dirname(os.path.abspath(path)),
+                                     prefix=".solved-", delete=False) as f:
+        f.write(MAGIC)
+        f.write(data)
+    try:
+        os.replace(f.name, path)
+    except OSError:
+        os.remove(f.name)
+        raise
+    return data
+
+
+class SolvedTable:
+    """Memory-mapped lookups into the solved table."""
+
+    def __init__(self, path=DEFAULT_PATH):
+        if not self._valid_file(path):
+            save_table(path)
+        with open(path, "rb") as f:
+            self._map = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        self._offset = len(MAGIC)
+
+    @staticmethod
+    def _valid_file(path):
+        try:
+            if os.path.getsize(path) != len(MAGIC) + STATES:
+                return False
+            with open(path, "rb") as f:
+                return f.read(len(MAGIC)) == MAGIC
+        except OSError:
+            return False
+
+    def entry(self, game):
+        """Raw table byte for a 3x3 engine position"""
+        return self._map[self._offset + board_code(game.boards)]
+
+    def outcome(self, game):
+        """Winner ("X" / "O") or DRAW under perfect play from here"""
+        return OUTCOMES[self.entry(game) & 3]
+
+    def best_move(self, game):
+        """(row, col) of a best move, or None if the game is over"""
+        cell = self.entry(game) >> 4
+        return None if cell == NO_MOVE else divmod(cell, 3)
+
+    def choose_move(self, game):
+        """Same interface as AlphaBetaPlayer.choose_move"""
+        move = self.best_move(game)
+        if move is None:
+            raise ValueError("no legal moves")
+        return move
+
+    def close(self):
+        self._map.close()
+
+
+_shared = {}
+
+
+def load_table(path=DEFAULT_PATH):
+    """Shared SolvedTable for `path`, built on first use if needed"""
+    if path not in _shared:
+        _shared[path] = SolvedTable(path)
+    return _shared[path]
+
+
+def supports(game):
+    """True if `game` is the classic board the table covers"""
+    return game.size == 3 and game.win_length == 3
+
+
+if __name__ == "__main__":
+    import time
+
+    start = time.perf_counter()
+    table = save_table()
+    reachable = sum(1 for b in table if b != UNREACHABLE)
+    print(f"Solved {reachable} reachable boards in {time.perf_counter() - start:.2f}s "
+          f"-> {DEFAULT_PATH}")
@@ -0,0 +1,95 @@
+import os
+import time
+
+from engine import DRAW
+from matchlog import HEADER, MAGIC, MatchLog, encode_record, iter_records
+
+GAMES = [
+    ([(0, 0), (1, 0), (0, 1), (1, 1), (0, 2)], "X"),
+    ([(1, 1), (0, 0), (2, 2), (0, 2), (2, 0), (0, 1)], "O"),
+    ([(0, 0), (1, 1), (2, 2), (0, 1), (2, 1), (2, 0), (0, 2), (1, 2), (1, 0)], DRAW),
+]
+
+
+def write_games(path, games=GAMES, **options):
+    log = MatchLog(path, **options)
+    for moves, result in games:
+        log.record(3, 3, moves, result)
+    log.close()
+    return log
+
+
+def test_round_trip(tmp_path):
+    path = str(tmp_path / "matches.log")
+    write_games(path)
+    log = MatchLog(path)
+    assert log.stats.scores(3, 3) == (1, 1, 1)
+    assert log.stats.openings(3, 3)[(0, 0)] == {"X": 1, "O": 0, "draw": 1}
+    log.close()
+
+
+def test_replay_without_snapshot(tmp_path):
+    path = str(tmp_path / "matches.log")
+    write_games(path)
+    os.remove(path + ".snapshot")
+    log = MatchLog(path)
+    assert log.stats.scores(3, 3) == (1, 1, 1)
+    log.close()
+
+
+def test_torn_record_is_dropped(tmp_path):
+    path = str(tmp_path / "matches.log")
+    write_games(path)
+    os.remove(path + ".snapshot")
+    size = os.path.getsize(path)
+    with open(path, "r+b") as f:
+        f.truncate(size - 3)
+    log = MatchLog(path)
+    assert log.stats.scores(3, 3) == (1, 1, 0)
+    # Appending starts where the last whole record ended
+    log.record(3, 3, GAMES[0][0], "X")
+    log.close()
+    os.remove(path + ".snapshot")
+    log = MatchLog(path)
+    assert log.stats.scores(3, 3) == (2, 1, 0)
+    log.close()
+
+
+def test_corrupt_result_ends_replay(tmp_path):
+    path = str(tmp_path / "matches.log")
+    write_games(path)
+    os.remove(path + ".snapshot")
+    first = len(MAGIC) + len(encode_record(3, 3, [0, 3, 1, 4, 2], "X"))
+    with open(path, "r+b") as f:
+        f.seek(first + 2)   # Result byte of the second record
+        f.write(b"\x07")
+    log = MatchLog(path)
+    assert log.stats.scores(3, 3) == (1, 0, 0)
+    assert log.offset == first
+    log.close()
+
+
+def test_iter_records_offsets():
+    data = encode_record(3, 3, [4], "X") + encode_record(3, 3, [0, 1], DRAW)
+    records = list(iter_records(data))
+    assert [end for end, *_ in records] == [HEADER.size + 2, len(data)]
+    assert records[1][3:] == ((0, 1), DRAW)
+
+
+def test_snapshot_covers_log(tmp_path):
+    path = str(tmp_path / "matches.log")
+    write_games(path, GAMES * 5, snapshot_every=4)
+    log = MatchLog(path)
+    assert log.stats.scores(3, 3) == (5, 5, 5)
+    log.close()
+
+
+def test_flush_if_due(tmp_path):
+    path = str(tmp_path / "matches.log")
+    log = MatchLog(path, flush_interval=0.05)
+    log.record(3, 3, *GAMES[0])
+    assert os.path.getsize(path) == len(MAGIC)
+    time.sleep(0.06)
+    log.flush_if_due()
+    assert os.path.getsize(path) > len(MAGIC)
+    log.close()
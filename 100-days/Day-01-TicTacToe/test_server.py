@@ -0,0 +1,121 @@
+import asyncio
+import json
+
+from server import MAX_BUFFERED, GameServer, Player, encode, serve
+
+
+async def connect(port):
+    reader, writer = await asyncio.open_connection("127.0.0.1", port)
+    return reader, writer
+
+
+async def receive(reader):
+    return json.loads(await asyncio.wait_for(reader.readline(), 5))
+
+
+def run_with_server(scenario):
+    async def main():
+        listener, server = await serve("127.0.0.1", 0, GameServer())
+        port = listener.sockets[0].getsockname()[1]
+        try:
+            await scenario(server, port)
+        finally:
+            listener.close()
+            await listener.wait_closed()
+    asyncio.run(main())
+
+
+async def start_match(port):
+    x = await connect(port)
+    o = await connect(port)
+    x[1].write(encode({"type": "join", "size": 3, "win": 3}))
+    assert (await receive(x[0]))["type"] == "waiting"
+    o[1].write(encode({"type": "join", "size": 3, "win": 3}))
+    assert (await receive(x[0]))["you"] == "X"
+    assert (await receive(o[0]))["you"] == "O"
+    return x, o
+
+
+def test_join_move_finish():
+    async def scenario(server, port):
+        x, o = await start_match(port)
+        moves = [(x, 0, 0), (o, 1, 0), (x, 0, 1), (o, 1, 1), (x, 0, 2)]
+        for seq, ((_, writer), row, col) in enumerate(moves, 1):
+            writer.write(encode({"type": "move", "row": row, "col": col}))
+            for reader, _ in (x, o):
+                state = await receive(reader)
+                assert state["seq"] == seq and state["last"] == [row, col]
+        assert state["result"] == "X"
+        assert server.moves_played == 5
+        assert server.matches == {}
+        for _, writer in (x, o):
+            writer.close()
+    run_with_server(scenario)
+
+
+def test_out_of_turn_and_malformed():
+    async def scenario(server, port):
+        x, o = await start_match(port)
+        o[1].write(encode({"type": "move", "row": 0, "col": 0}))
+        assert (await receive(o[0]))["message"] == "not your turn"
+        o[1].write(b"not json\n")
+        assert (await receive(o[0]))["message"] == "malformed message"
+        for _, writer in (x, o):
+            writer.close()
+    run_with_server(scenario)
+
+
+def test_disconnect_forfeits():
+    async def scenario(server, port):
+        x, o = await start_match(port)
+        x[1].close()
+        end = await receive(o[0])
+        assert end["type"] == "end" and end["result"] == "O"
+        o[1].close()
+    run_with_server(scenario)
+
+
+def test_oversized_line_forfeits():
+    async def scenario(server, port):
+        x, o = await start_match(port)
+        x[1].write(b"x" * (1 << 17) + b"\n")
+        assert (await receive(x[0]))["message"] == "message too long"
+        assert (await receive(o[0]))["type"] == "end"
+        o[1].close()
+    run_with_server(scenario)
+
+
+class FakeTransport:
+    def __init__(self, buffered):
+        self.buffered = buffered
+        self.aborted = False
+
+    def get_write_buffer_size(self):
+        return self.buffered
+
+    def abort(self):
+        self.aborted = True
+
+
+class FakeWriter:
+    def __init__(self, buffered):
+        self.transport = FakeTransport(buffered)
+        self.written = []
+
+    def is_closing(self):
+        return self.transport.aborted
+
+    def write(self, data):
+        self.written.append(data)
+
+
+def test_player_that_falls_behind_is_dropped():
+    keeping_up = Player(FakeWriter(100))
+    keeping_up.send({"type": "waiting"})
+    assert not keeping_up.writer.transport.aborted
+
+    behind = Player(FakeWriter(MAX_BUFFERED + 1))
+    behind.send({"type": "waiting"})
+    assert behind.writer.transport.aborted
+    behind.send({"type": "waiting"})
+    assert len(behind.writer.written) == 1
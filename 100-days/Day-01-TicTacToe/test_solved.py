@@ -0,0 +1,101 @@
+import os
+from functools import lru_cache
+
+import pytest
+
+from ai import AlphaBetaPlayer
+from engine import DRAW, TicTacToe
+from solved import (MAGIC, STATES, TERMINAL, UNREACHABLE, SolvedTable, board_code,
+                    build_table, save_table)
+
+RANK = {"X": 1, DRAW: 0, "O": -1}   # From X's point of view
+
+
+def reachable():
+    """Every reachable 3x3 position, once each"""
+    found, todo = {}, [TicTacToe()]
+    while todo:
+        game = todo.pop()
+        code = board_code(game.boards)
+        if code in found:
+            continue
+        found[code] = game
+        if not game.is_over:
+            for row, col in game.legal_moves():
+                child = game.copy()
+                child.play(row, col)
+                todo.append(child)
+    return found
+
+
+@lru_cache(maxsize=None)
+def minimax(boards, turn, result):
+    """Outcome with perfect play, by plain exhaustive search"""
+    if result is not None:
+        return result
+    game = TicTacToe()
+    game.boards, game.turn = list(boards), turn
+    outcomes = []
+    for row, col in game.legal_moves():
+        child = game.copy()
+        child.play(row, col)
+        outcomes.append(minimax(tuple(child.boards), child.turn, child.result))
+    pick = max if turn == 0 else min
+    return pick(outcomes, key=RANK.get)
+
+
+@pytest.fixture(scope="module")
+def positions():
+    return reachable()
+
+
+@pytest.fixture(scope="module")
+def table(tmp_path_factory):
+    path = str(tmp_path_factory.mktemp("solved") / "table.bin")
+    table = SolvedTable(path)
+    yield table
+    table.close()
+
+
+def test_unreachable_boards_are_marked(positions):
+    data = build_table()
+    assert len(data) == STATES
+    assert len(positions) == 5478
+    assert sum(byte != UNREACHABLE for byte in data) == len(positions)
+
+
+def test_outcomes_match_minimax(positions, table):
+    for game in positions.values():
+        assert table.outcome(game) == minimax(tuple(game.boards), game.turn, game.result)
+        assert bool(table.entry(game) & TERMINAL) == game.is_over
+
+
+def test_best_moves_keep_the_outcome(positions, table):
+    for game in positions.values():
+        move = table.best_move(game)
+        if game.is_over:
+            assert move is None
+            continue
+        child = game.copy()
+        child.play(*move)
+        assert table.outcome(child) == table.outcome(game)
+
+
+def test_search_agrees_with_table(positions, table):
+    player = AlphaBetaPlayer(time_limit=5.0, use_table=False)
+    for game in list(positions.values())[::50]:
+        if game.is_over:
+            continue
+        child = game.copy()
+        child.play(*player.choose_move(game))
+        assert table.outcome(child) == table.outcome(game)
+
+
+def test_save_table_replaces_atomically(tmp_path):
+    path = str(tmp_path / "table.bin")
+    with open(path, "wb") as f:
+        f.write(b"stale")
+    data = save_table(path)
+    with open(path, "rb") as f:
+        assert f.read() == MAGIC + data
+    assert os.listdir(tmp_path) == ["table.bin"]
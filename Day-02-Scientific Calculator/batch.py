@@ -0,0 +1,220 @@
+"""
+Evaluate many calculator expressions without the GUI.
+
+Reads one expression per line from files or stdin, evaluates them in the
+GUI's worker processes (worker.py) with the same parser, functions and
+formatting as the "=" button, and prints one result per line in input
+order. Input is read and results are written in batches, so memory stays
+bounded however long the input is.
+
+Examples:
+    python batch.py corpus.txt > results.txt
+    printf '2^10\\nsqrt(2)\\n' | python batch.py --echo
+
+Each worker is sent a whole batch at once and answers in order, so the
+expression it is working on is always the oldest unanswered one. When that
+expression runs past --timeout (9**9**9, say), the worker is killed, the
+expression is reported as "Timed out" like in the GUI, and the rest of the
+batch goes to a fresh worker. Workers also get the GUI's memory cap where
+the platform allows it.
+"""
+
+import argparse
+import fileinput
+import itertools
+import json
+import os
+import queue
+import subprocess
+import sys
+import threading
+import time
+from collections import deque
+
+from worker import WORKER_PATH
+
+
+def batches(lines, size):
+    lines = iter(lines)
+    while True:
+        batch = [line.rstrip("\r\n") for line in itertools.islice(lines, size)]
+        if not batch:
+            return
+        yield batch
+
+
+class BatchWorker:
+    """A worker.py process with a batch of expressions queued up."""
+
+    def __init__(self, replies, memory_mb):
+        self.replies = replies
+        self.memory_mb = memory_mb
+        self.proc = None
+        self.requests = None
+        self.pending = deque()  # (request id, expression) not answered yet, in order
+        self.deadline = None    # For the oldest pending expression
+
+    def start(self):
+        self.proc = subprocess.Popen(
+            [sys.executable, WORKER_PATH, "--memory", str(self.memory_mb)],
+            stdin=subprocess.PIPE, stdout=subprocess.PIPE)
+        # Writing on a thread: a stuck worker stops reading and would
+        # otherwise block the loop that is meant to time it out
+        self.requests = queue.Queue()
+        threading.Thread(target=self._write_loop, args=(self.proc, self.requests),
+                         daemon=True).start()
+        threading.Thread(target=self._read_loop, args=(self.proc,), daemon=True).start()
+        if self.pending:
+            self._send(self.pending)
+
+    def _write_loop(self, proc, requests):
+        try:
+            for lines in iter(requests.get, None):
+                proc.stdin.write("".join(lines).encode("utf-8"))
+                proc.stdin.flush()
+        except OSError:
+            pass    # Killed; its replacement gets the requests again
+
+    def _read_loop(self, proc):
+        # Whatever has arrived goes over as one list, not a line at a time
+        partial = b""
+        while chunk := os.read(proc.stdout.fileno(), 1 << 16):
+            *lines, partial = (partial + chunk).split(b"\n")
+            self.replies.put((self, proc, [json.loads(line.decode("utf-8")) for line in lines]))
+        # The worker died (or was killed)
+        self.replies.put((self, proc, None))
+
+    def _send(self, requests):
+        self.requests.put([json.dumps({"id": request_id, "expr": text}) + "\n"
+                           for request_id, text in requests])
+
+    def submit(self, requests, timeout):
+        self.pending.extend(requests)
+        self.deadline = time.monotonic() + timeout
+        self._send(requests)
+
+    def answered(self, timeout):
+        """The oldest pending expression was answered; returns its request id"""
+        request_id, _ = self.pending.popleft()
+        self.deadline = time.monotonic() + timeout if self.pending else None
+        return request_id
+
+    def restart(self, timeout):
+        """Drop the oldest pending expression and restart the worker for the rest"""
+        self.close()
+        request_id = self.answered(timeout)
+        self.start()
+        return request_id
+
+    def close(self):
+        if self.proc is not None:
+            self.requests.put(None)
+            self.proc.kill()
+            self.proc.wait()
+            self.proc = None
+
+
+def run(lines, out, workers=None, batch=2000, echo=False, memory_mb=512, timeout=5.0):
+    """Evaluate `lines` and write results to `out`; returns the count"""
+    workers = workers or os.cpu_count() or 1
+    replies = queue.Queue()
+    pool = [BatchWorker(replies, memory_mb) for _ in range(workers)]
+    idle = list(pool)
+    source = batches(lines, batch)
+    order = deque()     # [lines, results, unanswered] per batch, in input order
+    where = {}          # request id -> (batch, line index)
+    ids = itertools.count()
+    done = 0
+    try:
+        for worker in pool:
+            worker.start()
+        while True:
+            # One batch per worker; the next is sent once it has answered them all
+            while idle:
+                chunk = next(source, None)
+                if chunk is None:
+                    break
+                entry = [chunk, [""] * len(chunk), 0]
+                order.append(entry)
+                requests = []
+                for i, line in enumerate(chunk):
+                    if line.strip():
+                        request_id = next(ids)
+                        where[request_id] = (entry, i)
+                        requests.append((request_id, line))
+                if requests:
+                    entry[2] = len(requests)
+                    idle.pop().submit(requests, timeout)
+
+            while order and order[0][2] == 0:
+                chunk, results, _ = order.popleft()
+                if echo:
+                    out.writelines(f"{expr} = {result}\n" for expr, result in zip(chunk, results))
+                else:
+                    out.writelines(f"{result}\n" for result in results)
+                done += len(results)
+            if not order:
+                break
+
+            busy = [worker for worker in pool if worker.pending]
+            wait = min(worker.deadline for worker in busy) - time.monotonic()
+            try:
+                worker, proc, received = replies.get(timeout=max(0.0, wait))
+            except queue.Empty:
+                now = time.monotonic()
+                answers = [(worker.restart(timeout), "Timed out")
+                           for worker in busy if worker.deadline <= now]
+            else:
+                if proc is not worker.proc or not worker.pending:
+                    continue    # Left over from a worker that was killed
+                if received is None:
+                    answers = [(worker.restart(timeout), "Error")]
+                else:
+                    answers = [(worker.answered(timeout), reply["text"]) for reply in received]
+
+            for request_id, text in answers:
+                entry, i = where.pop(request_id)
+                entry[1][i] = text
+                entry[2] -= 1
+            for worker in busy:
+                if not worker.pending and worker not in idle:
+                    idle.append(worker)
+    finally:
+        for worker in pool:
+            worker.close()
+    return done
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Evaluate calculator expressions in bulk")
+    parser.add_argument("files", nargs="*", help="input files (default: stdin)")
+    parser.add_argument("--workers", type=int, default=None,
+                        help="worker processes (default: all cores)")
+    parser.add_argument("--batch", type=int, default=2000, help="expressions per task")
+    parser.add_argument("--echo", action="store_true",
+                        help="print 'expression = result' instead of the result alone")
+    parser.add_argument("--memory", type=int, default=512,
+                        help="address space limit per worker in MB")
+    parser.add_argument("--timeout", type=float, default=5.0,
+                        help="seconds allowed per expression")
+    args = parser.parse_args()
+    if args.batch < 1:
+        parser.error("--batch must be at least 1")
+    if args.timeout <= 0:
+        parser.error("--timeout must be positive")
+
+    # Input files are UTF-8; stdin and the results follow suit
+    sys.stdin.reconfigure(encoding="utf-8")
+    sys.stdout.reconfigure(encoding="utf-8")
+    start = time.perf_counter()
+    with fileinput.input(args.files, encoding="utf-8") as lines:
+        count = run(lines, sys.stdout, args.workers, args.batch, args.echo, args.memory,
+                    args.timeout)
+    sys.stdout.flush()
+    elapsed = time.perf_counter() - start
+    print(f"{count:,} expressions in {elapsed:.2f}s "
+          f"({count / elapsed if elapsed else 0:,.0f}/s)", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,105 @@
+"""
+Calculator logic without any UI.
+
+Calculator holds what the display shows and the memory register, and
+applies button presses to them exactly like the Tk front end does. The
+front end owns one Calculator; batch.py and the evaluation worker use
+evaluate_text(), so every entry point shares the same parsing, functions
+and result formatting.
+
+    calc = Calculator()
+    for key in ["2", "^", "10", "="]:
+        calc.press(key)
+    calc.expression   # "1024"
+"""
+
+from expression import evaluate, format_result
+
+# Keys that append "name(" to the display
+FUNCTION_KEYS = {"sin", "cos", "tan", "asin", "acos", "atan", "sinh", "cosh", "tanh",
+                 "asinh", "acosh", "atanh", "ln", "log", "log2", "exp", "sqrt", "pow",
+                 "factorial"}
+# Keys whose text differs from what they add to the display
+KEY_TEXT = {"%": "*0.01", "π": "pi", "∛": "**(1/3)", "√": "sqrt(", "^": "**", "mod": " mod "}
+# Keys that evaluate the display
+EVALUATING_KEYS = ("=", "MS", "M+")
+
+
+def evaluate_text(text):
+    """
+    Evaluate one expression: (ok, display text, value as float or None).
+
+    Errors are reported, never raised: the text is then "Error" or
+    "Out of memory".
+    """
+    try:
+        result = evaluate(text)
+        display = format_result(result)
+    except MemoryError:
+        return False, "Out of memory", None
+    except Exception:
+        return False, "Error", None
+    try:
+        value = float(result)
+    except (OverflowError, TypeError, ValueError):
+        value = None
+    return True, display, value
+
+
+class Calculator:
+    """The display text and memory register of one calculator."""
+
+    def __init__(self):
+        self.expression = ""
+        self.memory = 0.0
+
+    def press(self, key):
+        """
+        Apply one button press. Evaluating keys are computed right away;
+        returns (expression, result) when "=" produced a history entry.
+        """
+        if key in EVALUATING_KEYS:
+            if self.expression.strip():
+                return self.apply_result(key, self.expression, evaluate_text(self.expression))
+            return None
+        self.edit(key)
+        return None
+
+    def edit(self, key):
+        """Apply a key that does not need evaluation"""
+        if key == "C":
+            self.expression = ""
+        elif key == "←":
+            self.expression = self.expression[:-1]
+        elif key == "+/-":
+            try:
+                self.expression = str(-float(self.expression))
+            except ValueError:
+                self.expression = "Error"
+        elif key == "MC":
+            self.memory = 0.0
+        elif key == "MR":
+            self.expression += str(self.memory)
+        elif key in FUNCTION_KEYS:
+            self.expression += f"{key}("
+        else:
+            self.expression += KEY_TEXT.get(key, str(key))
+
+    def apply_result(self, key, expression, outcome):
+        """
+        Apply the outcome of evaluate_text(expression) for an evaluating key.
+
+        Kept separate from press() so the front end can compute `outcome` in
+        a worker process. Returns (expression, result) for the history
+        after a successful "=", else None.
+        """
+        ok, text, value = outcome
+        if key == "=":
+            self.expression = text
+            return (expression, text) if ok else None
+        if key == "MS":
+            self.memory = value if ok and value is not None else 0.0
+        elif key == "M+":
+            if ok and value is not None:
+                self.memory += value
+        return None
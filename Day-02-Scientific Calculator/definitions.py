@@ -0,0 +1,379 @@
+"""
+Named variables and definitions, recomputed like a spreadsheet.
+
+Typing a definition into the display and pressing "=" defines a name:
+
+    a = 3
+    b = a + 1
+    f = a*sin(x)        a function of x (also written f(x) = a*sin(x))
+    c = f(b) / 2
+
+Definitions may refer to names defined later; they show an error until
+then. Other expressions, and plotted functions, may use the names too.
+
+Each definition keeps the names it refers to, and the reverse edges, so
+redefining one name only recomputes what depends on it: those definitions
+are collected by a walk along the reverse edges and evaluated in
+topological order, each from its inputs' cached results. Everything else
+keeps its value.
+
+Values are computed with the preview's evaluator (preview.py), which
+refuses huge powers and factorials. Function definitions are not expanded
+for that: each one is a callable over its own syntax tree, so defining
+f(x) = g(x)*g(x) costs the same however g is defined, and only calls made
+while computing a value cost anything (at most MAX_CALLS per value).
+
+expand() is for text that leaves the calculator: the worker process and
+the plot kernels. It inlines the definitions into plain calculator text, a
+value as a number and f(arg) as f's body with arg in place of x. Since that
+copies a body for every call, each function definition keeps the size its
+expansion would have, and expand() refuses anything past MAX_NODES before
+building it.
+
+define() and remove() may run on a worker thread (DefinitionJob); expand()
+waits for them to finish.
+"""
+
+import ast
+import re
+import threading
+from collections import ChainMap, deque
+
+from expression import (ExpressionError, SCOPE, format_result, normalize, parse_tokens,
+                        to_python_ast, tokenize)
+from preview import Previewer, TooExpensive
+
+DEFINITION_RE = re.compile(r"\s*([A-Za-z_]\w*)\s*(\(\s*x\s*\)\s*)?=(?!=)(.*)$", re.S)
+VARIABLE = "x"                  # The argument of function definitions
+RESERVED = {"x", "k", "mod"}    # Plot variable, plot parameter and an operator
+MAX_CALLS = 20000       # Calls of defined functions while computing one value
+MAX_NODES = 2000        # Largest syntax tree expand() builds
+
+
+def _function(arg):
+    """Stands in for a defined function while parsing"""
+
+
+def _names(tokens, known):
+    """
+    Names for parsing `tokens`: the calculator's, the definitions in `known`,
+    and any other name mentioned, which may be defined later.
+    """
+    names = dict(SCOPE)
+    for name, definition in known.items():
+        names[name] = _function if definition.is_function else None
+    for i, (kind, value) in enumerate(tokens):
+        if kind == "name" and value not in names:
+            call = i + 1 < len(tokens) and tokens[i + 1][1] == "("
+            names[value] = _function if call else None
+    return names
+
+
+def _references(node, found):
+    """Add the names used by a syntax tree to `found` (a set)"""
+    kind = node[0]
+    if kind == "name":
+        found.add(node[1])
+    elif kind == "neg":
+        _references(node[1], found)
+    elif kind == "bin":
+        _references(node[2], found)
+        _references(node[3], found)
+    elif kind == "call":
+        found.add(node[1])
+        for arg in node[2]:
+            _references(arg, found)
+    return found
+
+
+class Definition:
+    """One named definition and its cached result."""
+
+    def __init__(self, name, text, tree, is_function=False):
+        self.name = name
+        self.text = text
+        self.tree = tree
+        self.uses = _references(tree, set()) - SCOPE.keys()
+        self.is_function = is_function or VARIABLE in self.uses
+        self.uses.discard(VARIABLE)
+        self.value = None       # A number, or a _UserFunction
+        self.size = None        # (nodes, uses of x) once expanded
+        self.error = None
+
+    def display(self):
+        """Text for the definitions list"""
+        if self.error:
+            return f"{self.name} = {self.text}   ({self.error})"
+        if self.is_function:
+            return f"{self.name}(x) = {self.text}"
+        return f"{self.name} = {self.text}   = {format_result(self.value)}"
+
+
+class _UserFunction:
+    """A function definition as a callable, for computing values."""
+
+    def __init__(self, owner, tree):
+        self.owner = owner
+        self.tree = tree
+
+    def __call__(self, arg):
+        owner = self.owner
+        owner.calls += 1
+        if owner.calls > MAX_CALLS:
+            raise TooExpensive
+        # A new evaluator per call: its memo is only valid for this x
+        return Previewer(ChainMap({VARIABLE: arg}, owner.values, SCOPE)).value(self.tree)
+
+
+class Definitions:
+    """All definitions of a session, with their dependency graph."""
+
+    def __init__(self):
+        self.definitions = {}
+        self.dependents = {}    # name -> names of the definitions that use it
+        self.values = {}        # name -> value of each definition without an error
+        self.calls = 0
+        self.lock = threading.Lock()
+
+    def __contains__(self, name):
+        return name in self.definitions
+
+    def __getitem__(self, name):
+        return self.definitions[name]
+
+    def __len__(self):
+        return len(self.definitions)
+
+    @staticmethod
+    def is_definition(text):
+        return DEFINITION_RE.match(text) is not None
+
+    def define(self, text):
+        """
+        Define or redefine a name from text such as "a = 3". Returns the
+        names whose results were recomputed, in the order they were.
+        Raises ExpressionError for invalid text or circular definitions.
+        """
+        match = DEFINITION_RE.match(normalize(text))
+        if not match:
+            raise ExpressionError("expected name = expression")
+        name, body = match.group(1), match.group(3).strip()
+        if name in SCOPE or name in RESERVED:
+            raise ExpressionError(f"{name!r} cannot be redefined")
+        with self.lock:
+            tokens = tokenize(body)
+            names = _names(tokens, self.definitions)
+            names[VARIABLE] = None
+            definition = Definition(name, body, parse_tokens(tokens, names),
+                                    is_function=match.group(2) is not None)
+            if name in definition.uses or name in self.upstream(definition.uses):
+                raise ExpressionError(f"{name!r} would depend on itself")
+
+            old = self.definitions.get(name)
+            if old is not None:
+                for used in old.uses:
+                    self.dependents[used].discard(name)
+            for used in definition.uses:
+                self.dependents.setdefault(used, set()).add(name)
+            self.definitions[name] = definition
+            return self.recompute(name)
+
+    def remove(self, name):
+        """Delete a definition; returns the names recomputed as a result"""
+        with self.lock:
+            definition = self.definitions.pop(name)
+            self.values.pop(name, None)
+            for used in definition.uses:
+                self.dependents[used].discard(name)
+            return self.recompute(name)
+
+    def upstream(self, names):
+        """Every definition that `names` depend on, directly or not"""
+        seen, todo = set(), list(names)
+        while todo:
+            definition = self.definitions.get(todo.pop())
+            if definition is None:
+                continue
+            for used in definition.uses - seen:
+                seen.add(used)
+                todo.append(used)
+        return seen
+
+    def downstream(self, name):
+        """`name` and every definition that depends on it"""
+        seen, todo = {name}, [name]
+        while todo:
+            for dependent in self.dependents.get(todo.pop(), ()):
+                if dependent not in seen:
+                    seen.add(dependent)
+                    todo.append(dependent)
+        return seen
+
+    def recompute(self, name):
+        """Recompute `name` and what depends on it, inputs first"""
+        affected = self.downstream(name)
+        # Kahn's algorithm over the affected part of the graph only
+        affected &= self.definitions.keys()
+        waiting = {n: len(self.definitions[n].uses & affected) for n in affected}
+        ready = deque(n for n, count in waiting.items() if count == 0)
+        order = []
+        while ready:
+            current = ready.popleft()
+            order.append(current)
+            self._evaluate(self.definitions[current])
+            for dependent in self.dependents.get(current, ()):
+                if dependent in waiting:
+                    waiting[dependent] -= 1
+                    if waiting[dependent] == 0:
+                        ready.append(dependent)
+        if name not in affected:
+            order.insert(0, name)   # Removed: its dependents changed too
+        return order
+
+    def _evaluate(self, definition):
+        definition.value = definition.size = definition.error = None
+        self.values.pop(definition.name, None)
+        try:
+            # Checks every name it uses as well
+            definition.size = self._measure(definition.tree)
+            if definition.is_function:
+                definition.value = _UserFunction(self, definition.tree)
+            else:
+                self.calls = 0
+                definition.value = Previewer(ChainMap(self.values, SCOPE)).value(definition.tree)
+                if isinstance(definition.value, bool) or \
+                        not isinstance(definition.value, (int, float)):
+                    raise ExpressionError("not a number")
+                definition.size = (1, 0)
+            self.values[definition.name] = definition.value
+        except TooExpensive:
+            definition.value = None
+            definition.error = "too large to define"
+        except ExpressionError as exc:
+            definition.value = None
+            definition.error = str(exc)
+        except Exception as exc:    # Math errors such as sqrt(-1)
+            definition.value = None
+            definition.error = str(exc) or type(exc).__name__
+
+    def _lookup(self, name, call):
+        definition = self.definitions.get(name)
+        if definition is None:
+            raise ExpressionError(f"{name!r} is not defined")
+        if definition.error:
+            raise ExpressionError(f"{name!r} has an error")
+        if definition.is_function != call:
+            raise ExpressionError(f"{name!r} is {'not ' if call else ''}a function")
+        return definition
+
+    def _measure(self, node):
+        """
+        (nodes, uses of x) of `node` once expanded, without expanding it.
+        Raises ExpressionError for a name that is undefined or has an error.
+        """
+        kind = node[0]
+        if kind == "num":
+            return 1, 0
+        if kind == "name":
+            name = node[1]
+            if name == VARIABLE:
+                return 1, 1
+            if name not in SCOPE and (name in self.definitions or name not in RESERVED):
+                self._lookup(name, call=False)
+            return 1, 0
+        if kind == "neg":
+            size, xs = self._measure(node[1])
+            return size + 1, xs
+        if kind == "bin":
+            (left, left_xs), (right, right_xs) = self._measure(node[2]), self._measure(node[3])
+            return left + right + 1, left_xs + right_xs
+        args = [self._measure(arg) for arg in node[2]]
+        if node[1] in SCOPE:
+            return 1 + sum(size for size, _ in args), sum(xs for _, xs in args)
+        if len(args) != 1:
+            raise ExpressionError(f"{node[1]}() takes 1 argument")
+        size, xs = self._lookup(node[1], call=True).size
+        # Every x in the body becomes a copy of the argument
+        return size + xs * (args[0][0] - 1), xs * args[0][1]
+
+    def _inline(self, node, bound):
+        """`node` with definitions inlined and names in `bound` replaced"""
+        kind = node[0]
+        if kind == "num":
+            return node
+        if kind == "name":
+            name = node[1]
+            if name in bound:
+                return bound[name]
+            if name in self.definitions:
+                value = self.definitions[name].value
+                if value < 0:
+                    # As a negation, so unparsing keeps it bracketed: (-3)**2
+                    return ("neg", ("num", -value, repr(-value)))
+                return ("num", value, repr(value))
+            return node
+        if kind == "neg":
+            return ("neg", self._inline(node[1], bound))
+        if kind == "bin":
+            return ("bin", node[1], self._inline(node[2], bound), self._inline(node[3], bound))
+        args = tuple(self._inline(arg, bound) for arg in node[2])
+        if node[1] in SCOPE:
+            return ("call", node[1], args)
+        return self._inline(self.definitions[node[1]].tree, {VARIABLE: args[0]})
+
+    def references(self, text):
+        """The defined names that `text` uses directly"""
+        try:
+            tokens = tokenize(normalize(text))
+        except ExpressionError:
+            return set()
+        return {value for kind, value in tokens if kind == "name" and value in self.definitions}
+
+    def expand(self, text, variables=()):
+        """
+        `text` with every definition inlined, as plain calculator text.
+        `variables` are left as they are (("x", "k") for plots). Text that
+        uses no definitions comes back unchanged. Raises ExpressionError.
+        """
+        if not self.references(text):
+            return text
+        tokens = tokenize(normalize(text))
+        with self.lock:
+            names = _names(tokens, self.definitions)
+            for name in variables:
+                names[name] = None
+            tree = parse_tokens(tokens, names)
+            size, _ = self._measure(tree)
+            if size > MAX_NODES:
+                raise ExpressionError("too large to expand")
+            try:
+                tree = self._inline(tree, {name: ("name", name) for name in variables})
+                return ast.unparse(to_python_ast(tree))
+            except RecursionError:
+                raise ExpressionError("too deeply nested") from None
+
+
+class DefinitionJob:
+    """
+    Definitions.define() or .remove() on a background thread, polled from
+    the Tk thread: DefinitionJob(definitions.define, "a = 3").start()
+    """
+
+    def __init__(self, method, arg):
+        self.result = None
+        self.error = None
+        self._thread = threading.Thread(target=self._run, args=(method, arg), daemon=True)
+
+    def _run(self, method, arg):
+        try:
+            self.result = method(arg)
+        except Exception as exc:    # RecursionError from deep nesting, math errors
+            self.error = exc
+
+    def start(self):
+        self._thread.start()
+        return self
+
+    @property
+    def done(self):
+        return not self._thread.is_alive()
@@ -0,0 +1,256 @@
+"""
+Expression front end for the calculator.
+
+Text typed into the display goes through three steps:
+
+1. tokenize()  - normalizes the calculator symbols (√, ∛, ^, π, mod) and
+                 splits the text into numbers, names and operators
+2. parse()     - builds a small tuple-based syntax tree, only allowing
+                 arithmetic and the functions/constants in FUNCTIONS
+3. compile     - turns the tree into a Python code object once
+
+compile_expression() caches step 3 in an LRU keyed by the normalized token
+stream (so "2^3" and "2 ** 3" share one entry), with a second LRU in front
+of it keyed by the raw text. Pressing "=" again, re-using a history entry or
+storing to memory then only costs a dictionary lookup plus the evaluation.
+
+Tree nodes are plain tuples, so they can be compared and hashed:
+    ("num", value, "text")  ("name", "pi")
+    ("neg", node)           ("bin", "+", left, right)
+    ("call", "sin", (arg, ...))
+"""
+
+import ast
+import math
+import re
+from functools import lru_cache
+
+# Functions and constants available to calculator expressions
+FUNCTIONS = {
+    'sin': math.sin, 'cos': math.cos, 'tan': math.tan,
+    'asin': math.asin, 'acos': math.acos, 'atan': math.atan,
+    'sinh': math.sinh, 'cosh': math.cosh, 'tanh': math.tanh,
+    'asinh': math.asinh, 'acosh': math.acosh, 'atanh': math.atanh,
+    'sqrt': math.sqrt, 'ln': math.log, 'log': math.log10, 'log2': math.log2,
+    'exp': math.exp, 'pow': pow,
+    'abs': abs, 'factorial': math.factorial, 'gcd': math.gcd,
+    'lcm': getattr(math, "lcm", lambda a, b: 0),
+}
+CONSTANTS = {'pi': math.pi, 'e': math.e, 'g': 9.81}
+SCOPE = {**FUNCTIONS, **CONSTANTS}
+
+# Display symbols and their plain-text equivalents
+SYMBOLS = (("√", "sqrt("), ("∛", "**(1/3)"), ("^", "**"), ("π", "pi"))
+
+TOKEN_RE = re.compile(r"""
+    \s*(?:
+        (?P<num>(?:\d+\.?\d*|\.\d+)(?:[eE][+-]?\d+)?)
+      | (?P<name>[A-Za-z_][A-Za-z_0-9]*)
+      | (?P<op>\*\*|//|[-+*/%(),])
+      | (?P<bad>\S)
+    )""", re.VERBOSE)
+
+BINARY_OPS = {
+    '+': ast.Add, '-': ast.Sub, '*': ast.Mult, '/': ast.Div,
+    '//': ast.FloorDiv, '%': ast.Mod, '**': ast.Pow,
+}
+
+
+class ExpressionError(ValueError):
+    """Raised for text that is not a valid calculator expression."""
+
+
+def normalize(text):
+    """Replace calculator symbols with their plain-text form"""
+    for symbol, plain in SYMBOLS:
+        text = text.replace(symbol, plain)
+    return text
+
+
+def tokenize(text):
+    """Split normalized text into (kind, value) tokens"""
+    tokens = []
+    for match in TOKEN_RE.finditer(text.rstrip()):
+        kind = match.lastgroup
+        value = match.group(kind)
+        if kind == "bad":
+            raise ExpressionError(f"unexpected character {value!r}")
+        if kind == "name" and value == "mod":
+            kind, value = "op", "%"
+        tokens.append((kind, value))
+    return tokens
+
+
+class _Parser:
+    """Recursive descent with Python's precedence rules."""
+
+    def __init__(self, tokens, names):
+        self.tokens = tokens
+        self.names = names
+        self.pos = 0
+
+    def peek(self):
+        return self.tokens[self.pos] if self.pos < len(self.tokens) else (None, None)
+
+    def take(self, value=None):
+        kind, tok = self.peek()
+        if kind is None or (value is not None and tok != value):
+            raise ExpressionError(f"expected {value or 'more input'}")
+        self.pos += 1
+        return kind, tok
+
+    def parse(self):
+        if not self.tokens:
+            raise ExpressionError("empty expression")
+        node = self.expr()
+        if self.pos != len(self.tokens):
+            raise ExpressionError(f"unexpected {self.peek()[1]!r}")
+        return node
+
+    def expr(self):
+        node = self.term()
+        while self.peek()[1] in ("+", "-"):
+            op = self.take()[1]
+            node = ("bin", op, node, self.term())
+        return node
+
+    def term(self):
+        node = self.unary()
+        while self.peek()[1] in ("*", "/", "//", "%"):
+            op = self.take()[1]
+            node = ("bin", op, node, self.unary())
+        return node
+
+    def unary(self):
+        op = self.peek()[1]
+        if op == "-":
+            self.take()
+            return ("neg", self.unary())
+        if op == "+":
+            self.take()
+            return self.unary()
+        return self.power()
+
+    def power(self):
+        node = self.atom()
+        if self.peek()[1] == "**":
+            self.take()
+            # Right-associative, and the exponent may carry a sign: 2**-1
+            node = ("bin", "**", node, self.unary())
+        return node
+
+    def atom(self):
+        kind, tok = self.take()
+        if kind == "num":
+            is_float = any(ch in tok for ch in ".eE")
+            # The literal text keeps 2 and 2.0 apart: tuples compare 2 == 2.0
+            return ("num", float(tok) if is_float else int(tok), tok)
+        if kind == "name":
+            if self.peek()[1] == "(":
+                if tok not in self.names or not callable(self.names[tok]):
+                    raise ExpressionError(f"unknown function {tok!r}")
+                self.take("(")
+                args = []
+                if self.peek()[1] != ")":
+                    args.append(self.expr())
+                    while self.peek()[1] == ",":
+                        self.take()
+                        args.append(self.expr())
+                self.take(")")
+                return ("call", tok, tuple(args))
+            if tok not in self.names or callable(self.names[tok]):
+                raise ExpressionError(f"unknown name {tok!r}")
+            return ("name", tok)
+        if tok == "(":
+            node = self.expr()
+            self.take(")")
+            return node
+        raise ExpressionError(f"unexpected {tok!r}")
+
+
+def parse(text, names=SCOPE):
+    """Parse calculator text into a syntax tree, checking every name"""
+    return parse_tokens(tokenize(normalize(text)), names)
+
+
+def parse_tokens(tokens, names=SCOPE):
+    """Parse a list of tokens from tokenize()"""
+    return _Parser(tokens, names).parse()
+
+
+# Source position given to every generated node; much cheaper than
+# running ast.fix_missing_locations over the tree afterwards
+_LOC = {"lineno": 1, "col_offset": 0, "end_lineno": 1, "end_col_offset": 0}
+
+
+def to_python_ast(node):
+    """Convert a syntax tree into a Python ast expression node"""
+    kind = node[0]
+    if kind == "num":
+        return ast.Constant(node[1], **_LOC)
+    if kind == "name":
+        return ast.Name(node[1], ast.Load(), **_LOC)
+    if kind == "neg":
+        return ast.UnaryOp(ast.USub(), to_python_ast(node[1]), **_LOC)
+    if kind == "bin":
+        return ast.BinOp(to_python_ast(node[2]), BINARY_OPS[node[1]](), to_python_ast(node[3]),
+                         **_LOC)
+    if kind == "call":
+        return ast.Call(ast.Name(node[1], ast.Load(), **_LOC),
+                        [to_python_ast(a) for a in node[2]], [], **_LOC)
+    raise ExpressionError(f"unknown node {kind!r}")
+
+
+class CompiledExpression:
+    """A parsed and compiled expression, ready to evaluate repeatedly."""
+
+    def __init__(self, source, tree):
+        self.source = source
+        self.tree = tree
+        body = ast.Expression(to_python_ast(tree))
+        self.code = compile(body, "<calculator>", "eval")
+
+    def evaluate(self, scope=SCOPE):
+        return eval(self.code, {"__builtins__": None}, scope)
+
+
+@lru_cache(maxsize=512)
+def _compile_normalized(key):
+    tokens = [tuple(tok.split("\0", 1)) for tok in key.split("\1")] if key else []
+    return CompiledExpression(key, parse_tokens(tokens))
+
+
+def normalized_key(text):
+    """Cache key: the token stream, so spacing differences share one entry"""
+    return "\1".join(f"{kind}\0{value}" for kind, value in tokenize(normalize(text)))
+
+
+@lru_cache(maxsize=512)
+def compile_expression(text):
+    """Parse and compile `text`, reusing the cached result when possible"""
+    return _compile_normalized(normalized_key(text))
+
+
+def evaluate(text):
+    """Evaluate calculator text with the standard functions and constants"""
+    return compile_expression(text).evaluate()
+
+
+# Integers longer than this are shown in scientific notation; Python refuses
+# to turn very long integers into decimal strings at all
+MAX_DIGITS = 4000
+
+
+def format_result(result):
+    """Display text for a result: whole floats as ints, others to 8 places"""
+    if isinstance(result, float):
+        if result.is_integer():
+            result = int(result)
+        else:
+            result = round(result, 8)
+    if isinstance(result, int) and result.bit_length() > MAX_DIGITS * 3.32:
+        exponent = math.log10(abs(result))
+        mantissa = 10 ** (exponent - math.floor(exponent))
+        sign = "-" if result < 0 else ""
+        return f"{sign}{mantissa:.9f}e+{math.floor(exponent)}"
+    return str(result)
@@ -0,0 +1,123 @@
+"""
+Roots, local extrema and intersections of plotted functions.
+
+Candidates come from the samples the plotter already has for the view (the
+uniform base grid of each curve, see sampling.py), found with whole-array
+sign tests:
+
+- a root lies between neighbours where y changes sign;
+- an extremum lies around a sample where the differences dy change sign;
+- two curves cross where their difference changes sign. All curves share
+  the same base grid for a view, so their samples line up one to one.
+
+All candidates are then refined together: each solver step evaluates the
+function once on an array holding one point per bracket, so a view with
+thousands of candidates costs a few dozen vectorized evaluations, not a
+Python loop per point. Roots use the Illinois variant of regula falsi,
+which keeps the bracket but converges much faster than bisection. Extrema
+use golden-section search.
+
+Sign changes across a pole (tan, 1/x) are skipped when the curve jumps by
+more than the view height between neighbours, as the plotter breaks the
+line there anyway; any that remain, and "extrema" at a pole, are dropped
+after refining because the value there is not near zero, or not finite.
+"""
+
+import numpy as np
+
+MAX_STEPS = 60
+GOLDEN = (np.sqrt(5) - 1) / 2
+
+
+def refine_roots(f, a, b, fa, fb, xtol, ftol=0.0):
+    """
+    Shrink brackets [a, b] with f(a), f(b) of opposite signs onto roots.
+
+    All arguments but f, xtol and ftol are arrays, one entry per bracket.
+    A bracket is done when narrower than xtol or when |f| at an end is at
+    most ftol. Returns the root estimates; brackets where f turned out
+    undefined give NaN.
+    """
+    a, b, fa, fb = (np.array(v, dtype=float) for v in (a, b, fa, fb))
+    last = np.zeros(len(a), dtype=np.int8)  # Side replaced last step: -1 a, 1 b
+    for _ in range(MAX_STEPS):
+        active = np.flatnonzero((np.abs(b - a) > xtol) & (np.abs(fa) > ftol) & (np.abs(fb) > ftol))
+        if not active.size:
+            break
+        aa, bb, faa, fbb = a[active], b[active], fa[active], fb[active]
+        with np.errstate(all="ignore"):
+            c = (aa * fbb - bb * faa) / (fbb - faa)
+        # Fall back to bisection if the secant leaves the bracket
+        outside = ~((c > np.minimum(aa, bb)) & (c < np.maximum(aa, bb)))
+        c[outside] = (aa[outside] + bb[outside]) / 2
+        fc = f(c)
+
+        undefined = ~np.isfinite(fc)
+        fa[active[undefined]] = fb[active[undefined]] = np.nan
+        a[active[undefined]] = b[active[undefined]] = np.nan
+
+        replace_a = (np.sign(fc) == np.sign(faa)) & ~undefined
+        replace_b = ~replace_a & ~undefined
+        ia, ib = active[replace_a], active[replace_b]
+        # Illinois: when the same end moves twice running, halve the other's value
+        fb[ia[last[ia] == -1]] /= 2
+        fa[ib[last[ib] == 1]] /= 2
+        a[ia], fa[ia], last[ia] = c[replace_a], fc[replace_a], -1
+        b[ib], fb[ib], last[ib] = c[replace_b], fc[replace_b], 1
+    return np.where(np.abs(fa) <= np.abs(fb), a, b)
+
+
+def refine_extrema(f, a, b, sign, xtol):
+    """
+    Golden-section search on each [a, b] for a minimum of sign * f
+    (sign +1 for minima, -1 for maxima). Returns the abscissas.
+    """
+    a, b = np.array(a, dtype=float), np.array(b, dtype=float)
+    c = b - GOLDEN * (b - a)
+    d = a + GOLDEN * (b - a)
+    fc, fd = sign * f(c), sign * f(d)
+    steps = int(np.ceil(np.log(max(np.max(b - a), xtol) / xtol) / -np.log(GOLDEN))) if len(a) else 0
+    for _ in range(min(steps, MAX_STEPS)):
+        left = ~(fd < fc)       # NaN-safe: keep the left part unless d is clearly lower
+        b = np.where(left, d, b)
+        a = np.where(left, a, c)
+        # The surviving inner point is reused; only one new evaluation per bracket
+        new = np.where(left, b - GOLDEN * (b - a), a + GOLDEN * (b - a))
+        fnew = sign * f(new)
+        c, d, fc, fd = (np.where(left, new, d), np.where(left, c, new),
+                        np.where(left, fnew, fd), np.where(left, fc, fnew))
+    return np.where(fc <= fd, c, d)
+
+
+def find_roots(f, xs, ys, yspan):
+    """(x, y) of the roots of f between the samples (xs, ys)"""
+    finite = np.isfinite(ys)
+    exact = np.flatnonzero(finite & (ys == 0))
+    with np.errstate(invalid="ignore"):
+        brackets = np.flatnonzero((ys[:-1] * ys[1:] < 0) & (np.abs(np.diff(ys)) <= yspan))
+    xtol = 1e-12 * (xs[-1] - xs[0])
+    roots = refine_roots(f, xs[brackets], xs[brackets + 1], ys[brackets], ys[brackets + 1],
+                         xtol, 1e-12 * yspan)
+    roots = np.concatenate((xs[exact], roots))
+    values = f(roots)
+    keep = np.isfinite(values) & (np.abs(values) <= 1e-6 * yspan)
+    return roots[keep], np.zeros(np.count_nonzero(keep))
+
+
+def find_extrema(f, xs, ys, yspan):
+    """(x, y) of the local minima and maxima of f seen in the samples"""
+    dy = np.diff(ys)
+    with np.errstate(invalid="ignore"):
+        turns = np.flatnonzero(dy[:-1] * dy[1:] < 0)
+    sign = np.where(dy[turns] < 0, 1.0, -1.0)   # Falling then rising: a minimum
+    xtol = 1e-9 * (xs[-1] - xs[0])
+    x = refine_extrema(f, xs[turns], xs[turns + 2], sign, xtol)
+    y = f(x)
+    keep = np.isfinite(y) & (np.abs(y) < 1e6 * yspan)
+    return x[keep], y[keep]
+
+
+def find_intersections(f, g, xs, ys_f, ys_g, yspan):
+    """(x, y) where the curves of f and g, sampled at the same xs, cross"""
+    x, _ = find_roots(lambda x: f(x) - g(x), xs, ys_f - ys_g, yspan)
+    return x, f(x)
@@ -0,0 +1,199 @@
+"""
+High-resolution sampling to disk, with min/max decimation for display.
+
+sample_to_file() evaluates a plot expression at n evenly spaced points
+(10^8 or more is fine) in fixed-size chunks. Each chunk is computed straight
+into its own memory map of its part of a .npy file and unmapped once
+written, so neither the process's memory nor its mapped pages grow with n.
+Only y is stored: sample i lies at x = lo + i * (hi - lo) / (n - 1).
+
+DenseSamples.decimate() reduces any range of those samples to two points
+per pixel column: the minimum and the maximum of the samples falling in it.
+Drawn as one line this covers exactly the pixels that drawing every sample
+would, so spikes and fast oscillations are kept, while Matplotlib only
+ever gets about 2 x width points. While sampling, the minimum and maximum
+of every BLOCK samples are kept in memory as well; wide views are decimated
+from those, so the file itself is only read for zoomed-in views.
+
+Export from the command line:
+    python hires.py "sin(1/x)" --from -1 --to 1 -n 100000000 -o sin.npy
+"""
+
+import argparse
+import math
+import os
+import sys
+import threading
+import time
+
+import numpy as np
+from numpy.lib.format import open_memmap
+
+from expression import normalize
+from plot_kernel import get_kernel
+
+CHUNK = 1 << 20     # Samples evaluated and written per step (8 MB of float64)
+BLOCK = 1 << 10     # Samples per in-memory min/max summary; divides CHUNK
+
+
+class DenseSamples:
+    """n evenly spaced samples of y over [lo, hi], memory-mapped from a file."""
+
+    def __init__(self, path, lo, hi, ys, block_min, block_max):
+        self.path = path
+        self.lo = lo
+        self.hi = hi
+        self.ys = ys
+        self.step = (hi - lo) / (len(ys) - 1)
+        self.block_min = block_min
+        self.block_max = block_max
+
+    def __len__(self):
+        return len(self.ys)
+
+    def decimate(self, view_lo, view_hi, pixels):
+        """(xs, ys) to draw the samples within [view_lo, view_hi] `pixels` wide"""
+        pixels = max(1, int(pixels))
+        first = max(0, math.floor((view_lo - self.lo) / self.step))
+        stop = min(len(self.ys), math.ceil((view_hi - self.lo) / self.step) + 1)
+        count = stop - first
+        if count <= 0:
+            return np.empty(0), np.empty(0)
+        if count <= 2 * pixels:
+            return self.lo + np.arange(first, stop) * self.step, np.array(self.ys[first:stop])
+
+        if count >= 2 * BLOCK * pixels:
+            # Whole blocks per column: bucket the summaries instead of the file.
+            # Columns then start on block edges, up to half a column off.
+            first_block, stop_block = first // BLOCK, -(-stop // BLOCK)
+            edges = first_block + np.arange(pixels + 1) * (stop_block - first_block) // pixels
+            mins = np.fmin.reduceat(self.block_min[first_block:stop_block], edges[:-1] - first_block)
+            maxs = np.fmax.reduceat(self.block_max[first_block:stop_block], edges[:-1] - first_block)
+            edges = np.minimum(edges * BLOCK, len(self.ys))
+        else:
+            # At most 2 * BLOCK samples per column, so this read is bounded by the width
+            edges = first + np.arange(pixels + 1) * count // pixels
+            ys = self.ys[first:stop]
+            mins = np.fmin.reduceat(ys, edges[:-1] - first)
+            maxs = np.fmax.reduceat(ys, edges[:-1] - first)
+
+        centres = self.lo + (edges[:-1] + edges[1:] - 1) / 2 * self.step
+        return np.repeat(centres, 2), np.column_stack((mins, maxs)).ravel()
+
+    def close(self):
+        """Release the memory map; the file stays"""
+        self.ys = None
+
+
+def sample_to_file(text, lo, hi, n, path, params=None, variables=("x",),
+                   progress=None, stop=None):
+    """
+    Sample `text` at n points over [lo, hi] into the .npy file `path`.
+
+    `params` gives scalar variables such as k. `progress(done, n)` is
+    called after each chunk. Setting the threading.Event `stop` cancels: the
+    partial file is deleted and None is returned. Non-finite values are
+    stored as NaN.
+    """
+    if n < 2 or not hi > lo:
+        raise ValueError("need at least 2 samples and lo < hi")
+    # Kernels keep work buffers per thread, so sharing the plotter's is safe
+    kernel = get_kernel(normalize(text), tuple(variables))
+    params = params or {}
+
+    # Write the header and size the file, then fill it a chunk at a time
+    header = open_memmap(path, mode="w+", dtype=np.float64, shape=(n,))
+    data_offset = header.offset
+    del header
+
+    step = (hi - lo) / (n - 1)
+    blocks = -(-n // BLOCK)
+    block_min, block_max = np.empty(blocks), np.empty(blocks)
+    offsets = np.arange(0, CHUNK, BLOCK)
+    x = np.empty(CHUNK)
+    for start in range(0, n, CHUNK):
+        if stop is not None and stop.is_set():
+            os.remove(path)
+            return None
+        size = min(CHUNK, n - start)
+        xs = x[:size]
+        xs[:] = np.arange(start, start + size)
+        xs *= step
+        xs += lo
+        out = np.memmap(path, dtype=np.float64, mode="r+", shape=(size,),
+                        offset=data_offset + start * 8)
+        kernel(xs, out=out, **params)
+        out[~np.isfinite(out)] = np.nan
+
+        first_block = start // BLOCK
+        chunk_offsets = offsets[:-(-size // BLOCK)]
+        block_min[first_block:first_block + len(chunk_offsets)] = np.fmin.reduceat(out, chunk_offsets)
+        block_max[first_block:first_block + len(chunk_offsets)] = np.fmax.reduceat(out, chunk_offsets)
+        out.flush()
+        del out
+        if progress is not None:
+            progress(start + size, n)
+    ys = np.load(path, mmap_mode="r")
+    return DenseSamples(path, lo, hi, ys, block_min, block_max)
+
+
+class SamplingJob:
+    """sample_to_file() on a background thread, polled from the Tk thread."""
+
+    def __init__(self, text, lo, hi, n, path, params=None, variables=("x",)):
+        self.done_samples = 0
+        self.total = n
+        self.result = None
+        self.error = None
+        self._stop = threading.Event()
+        self._thread = threading.Thread(
+            target=self._run, args=(text, lo, hi, n, path, params, variables), daemon=True)
+
+    def _run(self, *args):
+        try:
+            self.result = sample_to_file(*args, progress=self._progress, stop=self._stop)
+        except Exception as exc:    # Reported to the UI via .error
+            self.error = exc
+
+    def _progress(self, done, total):
+        self.done_samples = done
+
+    def start(self):
+        self._thread.start()
+        return self
+
+    @property
+    def done(self):
+        return not self._thread.is_alive()
+
+    @property
+    def fraction(self):
+        return self.done_samples / self.total
+
+    def cancel(self):
+        self._stop.set()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Sample a function to a .npy file")
+    parser.add_argument("expression", help="function of x, e.g. 'sin(1/x)'")
+    parser.add_argument("--from", dest="lo", type=float, default=-10.0)
+    parser.add_argument("--to", dest="hi", type=float, default=10.0)
+    parser.add_argument("-n", "--samples", type=int, default=10**8)
+    parser.add_argument("-k", type=float, default=1.0, help="value of the parameter k")
+    parser.add_argument("-o", "--output", default="samples.npy")
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+
+    def progress(done, total):
+        print(f"\r{done / total:6.1%}", end="", file=sys.stderr, flush=True)
+    dense = sample_to_file(args.expression, args.lo, args.hi, args.samples, args.output,
+                           params={"k": args.k}, variables=("x", "k"), progress=progress)
+    elapsed = time.perf_counter() - start
+    print(f"\r{len(dense):,} samples in {elapsed:.2f}s -> {args.output}", file=sys.stderr)
+    print(f"x[i] = {args.lo!r} + i * {dense.step!r}", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
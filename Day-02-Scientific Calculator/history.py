@@ -0,0 +1,114 @@
+"""
+Calculation history stored in SQLite.
+
+Every calculation is one row in `history`. Rows are read newest first, a
+page at a time, using the primary key (`WHERE id < ?`), so showing the
+latest entries costs the same with a hundred rows or a million.
+
+Substring search uses an FTS5 trigram index over the expression and the
+result when this SQLite build has one (3.34+). Queries shorter than three
+characters, or builds without the trigram tokenizer, fall back to LIKE,
+which walks the rows newest first and stops once a page is full.
+"""
+
+import os
+import sqlite3
+import time
+
+DEFAULT_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "history.db")
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS history (
+    id INTEGER PRIMARY KEY,
+    expression TEXT NOT NULL,
+    result TEXT NOT NULL,
+    created REAL NOT NULL
+);
+"""
+FTS_SCHEMA = """
+CREATE VIRTUAL TABLE history_fts USING fts5(
+    expression, result, content='history', content_rowid='id', tokenize='trigram'
+);
+CREATE TRIGGER history_fts_insert AFTER INSERT ON history BEGIN
+    INSERT INTO history_fts(rowid, expression, result)
+    VALUES (new.id, new.expression, new.result);
+END;
+"""
+
+
+class HistoryStore:
+    """Unbounded calculation history with paging and substring search."""
+
+    def __init__(self, path=DEFAULT_PATH):
+        self.db = sqlite3.connect(path)
+        self.db.execute("PRAGMA journal_mode=WAL")
+        self.db.executescript(SCHEMA)
+        self.fts = self._setup_fts()
+
+    def _setup_fts(self):
+        exists = self.db.execute(
+            "SELECT 1 FROM sqlite_master WHERE name = 'history_fts'").fetchone()
+        if exists:
+            return True
+        try:
+            with self.db:
+                self.db.executescript(FTS_SCHEMA)
+                # Index rows written by a build without FTS5
+                self.db.execute("INSERT INTO history_fts(history_fts) VALUES ('rebuild')")
+            return True
+        except sqlite3.OperationalError:
+            return False  # No FTS5 or no trigram tokenizer: LIKE only
+
+    def add(self, expression, result):
+        """Store one calculation and return its row id"""
+        with self.db:
+            cursor = self.db.execute(
+                "INSERT INTO history (expression, result, created) VALUES (?, ?, ?)",
+                (expression, result, time.time()))
+        return cursor.lastrowid
+
+    def get(self, row_id):
+        """(expression, result) for a row id"""
+        return self.db.execute(
+            "SELECT expression, result FROM history WHERE id = ?", (row_id,)).fetchone()
+
+    def page(self, before=None, limit=200, query=""):
+        """
+        Up to `limit` (id, expression, result) rows older than row id
+        `before` (newest first), optionally only those containing `query`.
+        """
+        before = before if before is not None else (1 << 62)
+        if not query:
+            return self.db.execute(
+                "SELECT id, expression, result FROM history WHERE id < ? "
+                "ORDER BY id DESC LIMIT ?", (before, limit)).fetchall()
+        if self.fts and len(query) >= 3:
+            phrase = '"' + query.replace('"', '""') + '"'
+            return self.db.execute(
+                "SELECT h.id, h.expression, h.result FROM history_fts "
+                "JOIN history AS h ON h.id = history_fts.rowid "
+                "WHERE history_fts MATCH ? AND history_fts.rowid < ? "
+                "ORDER BY history_fts.rowid DESC LIMIT ?", (phrase, before, limit)).fetchall()
+        pattern = "%" + query.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_") + "%"
+        return self.db.execute(
+            "SELECT id, expression, result FROM history WHERE id < ?1 AND "
+            "(expression LIKE ?2 ESCAPE '\\' OR result LIKE ?2 ESCAPE '\\') "
+            "ORDER BY id DESC LIMIT ?3", (before, pattern, limit)).fetchall()
+
+    def count(self):
+        return self.db.execute("SELECT COUNT(*) FROM history").fetchone()[0]
+
+    def clear(self):
+        with self.db:
+            self.db.execute("DELETE FROM history")
+            if self.fts:
+                self.db.execute("INSERT INTO history_fts(history_fts) VALUES ('delete-all')")
+
+    def close(self):
+        self.db.close()
+
+
+def matches(query, expression, result):
+    """Whether a new entry belongs in a list filtered by `query`"""
+    query = query.lower()
+    return query in expression.lower() or query in result.lower()
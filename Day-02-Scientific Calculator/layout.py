@@ -0,0 +1,90 @@
+"""
+Fonts that follow the window size, without stutter while resizing.
+
+Dragging a window edge sends a <Configure> event every few pixels, and
+giving a widget a new font makes Tk measure and lay it out again. So:
+
+- Resize events are coalesced: the first one schedules an update one
+  frame later (FRAME_MS), and that update reads whatever the window size
+  is by then. Events arriving in between cost nothing.
+- Fonts come from a pool keyed by (family, size, weight), so there is one
+  Font object per size and "has the font changed" is an identity check.
+- Widgets are registered in groups that share a font. A group is only
+  reconfigured when its font size actually changes, which happens every
+  `min_ref` pixels of window size rather than on every event.
+
+    layout = ResponsiveLayout(root, min_ref=35)
+    layout.add("display", "Consolas", [entry])
+    layout.add("button", "Segoe UI", buttons)
+    layout.refresh()
+"""
+
+import tkinter.font as tkfont
+
+FRAME_MS = 16   # About one frame at 60 Hz
+
+
+def font_sizes(width, height, min_ref=32):
+    """Font sizes in points for each role at a window size"""
+    base = max(8, int(min(max(400, width), max(350, height)) / min_ref))
+    return {"display": max(14, base + 6), "button": max(9, base + 2), "small": max(8, base)}
+
+
+class FontPool:
+    """Tk fonts shared by family, size and weight."""
+
+    def __init__(self, root):
+        self.root = root
+        self.fonts = {}
+
+    def get(self, family, size, weight="normal"):
+        key = (family, size, weight)
+        font = self.fonts.get(key)
+        if font is None:
+            font = self.fonts[key] = tkfont.Font(self.root, family=family, size=size,
+                                                 weight=weight)
+        return font
+
+
+class ResponsiveLayout:
+    """Keeps groups of widgets in fonts sized for the window."""
+
+    def __init__(self, root, min_ref=32):
+        self.root = root
+        self.min_ref = min_ref
+        self.pool = FontPool(root)
+        self.groups = []        # [role, family, weight, widgets, font in use]
+        self.listeners = []
+        self.sizes = None
+        self._job = None
+        root.bind("<Configure>", self._on_configure, add="+")
+
+    def add(self, role, family, widgets, weight="normal"):
+        """Size `widgets` (a list, which may still grow) by `role`"""
+        self.groups.append([role, family, weight, widgets, None])
+
+    def on_change(self, callback):
+        """Call callback(sizes) whenever the font sizes change"""
+        self.listeners.append(callback)
+
+    def _on_configure(self, event):
+        # Bindings on the root window also see its children's events
+        if event.widget is self.root and self._job is None:
+            self._job = self.root.after(FRAME_MS, self.refresh)
+
+    def refresh(self):
+        """Apply the fonts for the current window size now"""
+        self._job = None
+        sizes = font_sizes(self.root.winfo_width(), self.root.winfo_height(), self.min_ref)
+        if sizes == self.sizes:
+            return
+        self.sizes = sizes
+        for group in self.groups:
+            role, family, weight, widgets, current = group
+            font = self.pool.get(family, sizes[role], weight)
+            if font is not current:
+                for widget in widgets:
+                    widget.configure(font=font)
+                group[4] = font
+        for callback in self.listeners:
+            callback(sizes)
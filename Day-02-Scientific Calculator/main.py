@@ -1,17 +1,54 @@
+import time
+STARTED = time.perf_counter()   # For startup_bench.py
+
+import json
+import os
+import threading
 import tkinter as tk
-from tkinter import ttk
-import tkinter.font as tkfont
-import math
-import numpy as np
-import matplotlib.pyplot as plt
-from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg
+from tkinter import filedialog, messagebox, simpledialog, ttk
+
+from calc_core import EVALUATING_KEYS, Calculator
+from definitions import DefinitionJob, Definitions
+from expression import ExpressionError, format_result
+from history import HistoryStore, matches
+from layout import ResponsiveLayout
+from preview import Previewer
+from suggest import FunctionLibrary
+from worker import Evaluator
 
 # -----------------------------
 # Globals
 # -----------------------------
-current_expression = ""
-memory_value = 0.0
-calculation_history = []
+calc = Calculator()     # Display text and memory; see calc_core.py
+
+# Named values and functions such as "a = 3" (see definitions.py)
+definitions = Definitions()
+definition_rows = []    # Definitions listbox row -> name
+definition_job = None   # DefinitionJob while (re)computing definitions
+
+# Calculation history lives in SQLite; the listbox holds the rows loaded so far
+history = HistoryStore()
+history_ids = []        # Listbox row -> history row id
+history_query = ""
+history_more = True     # Whether older matching rows remain to be loaded
+history_search_job = None
+HISTORY_PAGE = 200
+
+# Heavy expressions run in a killable worker process (see worker.py)
+evaluator = Evaluator(timeout=5.0, memory_mb=512)
+pending_action = None   # (button, expression) while the worker is computing
+POLL_MS = 20
+
+# numpy and Matplotlib are only imported once the window is up (see load_plotter)
+curve_plot = None       # CurvePlot, created by ensure_plot()
+plot_loader = None      # Thread importing the plotting modules
+startup_times = {"imports": time.perf_counter() - STARTED}
+BENCHMARK = bool(os.environ.get("CALCPRO_STARTUP_BENCH"))
+
+# Running result shown under the display while typing (see preview.py)
+previewer = Previewer()
+preview_job = None
+PREVIEW_DELAY_MS = 120
 
 # Modern color scheme
 COLORS = {
@@ -30,225 +67,465 @@ COLORS = {
     'special': '#FFEAA7'
 }
 
-# -----------------------------
-# Fonts / Responsiveness helpers
-# -----------------------------
-def make_fonts(root, min_ref=32):
-    """Return responsive fonts based on window size."""
-    w = max(400, root.winfo_width())
-    h = max(350, root.winfo_height())
-    base = max(8, int(min(w, h) / min_ref))
-    
-    display_size = max(14, base + 6)
-    btn_size = max(9, base + 2)
-    small_size = max(8, base)
-    
-    # Use standard Windows fonts that definitely exist
-    display_font = tkfont.Font(family="Consolas", size=display_size, weight="normal")
-    btn_font = tkfont.Font(family="Segoe UI", size=btn_size, weight="normal")
-    small_font = tkfont.Font(family="Segoe UI", size=small_size)
-    return display_font, btn_font, small_font
-
 # -----------------------------
 # History management
 # -----------------------------
 def add_to_history(expression, result):
     """Add a calculation to history."""
-    global calculation_history
     if expression and result != "Error":
-        calculation_history.append((expression, result))
-        if len(calculation_history) > 50:
-            calculation_history = calculation_history[-50:]
-        update_history_display()
-
-def update_history_display():
-    """Update the history listbox."""
-    history_listbox.delete(0, tk.END)
-    for i, (expr, result) in enumerate(reversed(calculation_history)):
+        row_id = history.add(expression, result)
+        if not history_query or matches(history_query, expression, result):
+            # Newest first: one row goes on top, nothing else is redrawn
+            history_listbox.insert(0, f"{expression} = {result}")
+            history_ids.insert(0, row_id)
+
+def load_history(reset=False):
+    """Load the next page of history rows into the listbox."""
+    global history_more
+    if reset:
+        history_listbox.delete(0, tk.END)
+        history_ids.clear()
+        history_more = True
+    if not history_more:
+        return
+    before = history_ids[-1] if history_ids else None
+    rows = history.page(before, HISTORY_PAGE, history_query)
+    for row_id, expr, result in rows:
         history_listbox.insert(tk.END, f"{expr} = {result}")
+        history_ids.append(row_id)
+    history_more = len(rows) == HISTORY_PAGE
+
+def on_history_scroll(first, last):
+    """Scrollbar update; fetches more rows when the end comes into view."""
+    history_scrollbar.set(first, last)
+    if float(last) > 0.9 and history_more:
+        load_history()
+
+def on_history_search(*args):
+    global history_search_job
+    if history_search_job is not None:
+        root.after_cancel(history_search_job)
+    history_search_job = root.after(150, apply_history_search)
+
+def apply_history_search():
+    global history_query, history_search_job
+    history_search_job = None
+    history_query = history_search_var.get().strip()
+    load_history(reset=True)
 
 def on_history_select(event):
     """Handle selection from history."""
-    global current_expression
     selection = history_listbox.curselection()
     if selection:
-        history_text = history_listbox.get(selection[0])
-        result = history_text.split(" = ")[-1]
-        current_expression = result
+        expression, result = history.get(history_ids[selection[0]])
+        calc.expression = result
         _update_entry()
 
 def clear_history():
     """Clear calculation history."""
-    global calculation_history
-    calculation_history = []
-    update_history_display()
+    history.clear()
+    load_history(reset=True)
 
 # -----------------------------
 # Calculator logic
 # -----------------------------
 def on_button_click(char):
     """Handle calculator button clicks."""
-    global current_expression, memory_value
-    original_expression = current_expression
-    
-    if char == "C":
-        current_expression = ""
-    elif char == "←":
-        current_expression = current_expression[:-1]
-    elif char == "=":
-        try:
-            safe_dict = {
-                'sin': math.sin, 'cos': math.cos, 'tan': math.tan,
-                'asin': math.asin, 'acos': math.acos, 'atan': math.atan,
-                'sinh': math.sinh, 'cosh': math.cosh, 'tanh': math.tanh,
-                'asinh': math.asinh, 'acosh': math.acosh, 'atanh': math.atanh,
-                'sqrt': math.sqrt, 'ln': math.log, 'log': math.log10, 'log2': math.log2,
-                'exp': math.exp, 'pow': pow,
-                'abs': abs, 'factorial': math.factorial, 'gcd': math.gcd,
-                'lcm': getattr(math, "lcm", lambda a, b: 0),
-                'pi': math.pi, 'e': math.e, 'g': 9.81
-            }
-            expr = current_expression.replace("√", "sqrt(").replace("∛", "**(1/3)").replace("^", "**")
-            expr = expr.replace("π", "pi")
-            result = eval(expr, {"__builtins__": None}, safe_dict)
-            
-            # Format result nicely
-            if isinstance(result, float):
-                if result.is_integer():
-                    result = int(result)
-                else:
-                    result = round(result, 8)
-            
-            add_to_history(original_expression, str(result))
-            current_expression = str(result)
-        except Exception:
-            current_expression = "Error"
-    elif char == "+/-":
-        try:
-            val = float(current_expression)
-            current_expression = str(-val)
-        except Exception:
-            current_expression = "Error"
-    elif char == "MC":
-        memory_value = 0.0
-    elif char == "MR":
-        current_expression += str(memory_value)
-    elif char == "MS":
-        try:
-            memory_value = float(eval(current_expression, {"__builtins__": None}, math.__dict__))
-        except Exception:
-            memory_value = 0.0
-    elif char == "M+":
-        try:
-            memory_value += float(eval(current_expression, {"__builtins__": None}, math.__dict__))
-        except Exception:
-            pass
-    else:
-        if char in {"sin","cos","tan","asin","acos","atan","sinh","cosh","tanh","asinh","acosh","atanh",
-                    "ln","log","log2","exp","sqrt","pow","factorial"}:
-            current_expression += f"{char}("
-        elif char == "%":
-            current_expression += "*0.01"
-        elif char == "π":
-            current_expression += "pi"
-        elif char == "∛":
-            current_expression += "**(1/3)"
-        elif char == "√":
-            current_expression += "sqrt("
-        elif char == "^":
-            current_expression += "**"
+    if pending_action is not None:
+        # The display shows the running calculation; only C interrupts it
+        if char != "C" or definition_job is not None:
+            return
+        cancel_evaluation()
+
+    if char in EVALUATING_KEYS:
+        if char == "=" and definitions.is_definition(calc.expression):
+            define(calc.expression)
+        elif calc.expression.strip():
+            start_evaluation(char, calc.expression)
+        return
+    calc.edit(char)
+    _update_entry()
+
+# -----------------------------
+# Definitions
+# -----------------------------
+def with_definitions(text):
+    """`text` with the definitions inlined; unchanged if it does not parse yet"""
+    try:
+        return definitions.expand(text)
+    except ExpressionError:
+        return text
+
+def define(text):
+    """Define a name from the display, computing it in the background."""
+    global pending_action, definition_job
+    pending_action = ("define", text)
+    definition_job = DefinitionJob(definitions.define, text).start()
+    entry_var.set("Computing…")
+    root.after(POLL_MS, poll_definition)
+
+def poll_definition():
+    """Once the definitions are recomputed, show them and update the plots."""
+    global pending_action, definition_job
+    if not definition_job.done:
+        root.after(POLL_MS, poll_definition)
+        return
+    job, definition_job = definition_job, None
+    action, pending_action = pending_action, None
+    if job.error is not None:
+        calc.expression = "Error"
+        _update_entry()
+        return
+    changed = job.result
+    if action[0] == "define":
+        # The display shows the value; a function stays as typed
+        definition = definitions[changed[0]]
+        if definition.error:
+            calc.expression = "Error"
+        elif not definition.is_function:
+            calc.expression = format_result(definition.value)
+    _update_entry()
+    update_definition_rows(changed)
+    if curve_plot is not None:
+        curve_plot.redefine(changed)
+        update_curve_list()
+
+def update_definition_rows(names):
+    """Rewrite only the rows of the definitions that changed."""
+    for name in names:
+        if name in definition_rows:
+            row = definition_rows.index(name)
+            definitions_listbox.delete(row)
         else:
-            current_expression += str(char)
+            row = len(definition_rows)
+            definition_rows.append(name)
+        if name in definitions:
+            definition = definitions[name]
+            definitions_listbox.insert(row, definition.display())
+            definitions_listbox.itemconfig(
+                row, fg=COLORS['error'] if definition.error else COLORS['text_primary'])
+        else:
+            definition_rows.remove(name)
+    if definition_rows:
+        definitions_listbox.configure(height=min(5, len(definition_rows)))
+        definitions_listbox.pack(fill="x", pady=(0, 10), before=history_header)
+    else:
+        definitions_listbox.pack_forget()
+
+def edit_definition(event=None):
+    """Put the selected definition back into the display to change it."""
+    sel = definitions_listbox.curselection()
+    if sel and pending_action is None:
+        definition = definitions[definition_rows[sel[0]]]
+        calc.expression = f"{definition.name} = {definition.text}"
+        _update_entry()
 
+def remove_definition(event=None):
+    global pending_action, definition_job
+    sel = definitions_listbox.curselection()
+    if sel and pending_action is None:
+        pending_action = ("remove", definition_rows[sel[0]])
+        definition_job = DefinitionJob(definitions.remove, pending_action[1]).start()
+        root.after(POLL_MS, poll_definition)
+
+# -----------------------------
+# Background evaluation
+# -----------------------------
+def start_evaluation(button, expression):
+    """Send an expression to the worker and show that it is computing."""
+    global pending_action
+    pending_action = (button, expression)
+    evaluator.submit(with_definitions(expression))
+    entry_var.set("Computing…  (Esc to cancel)")
+    root.after(POLL_MS, poll_evaluation)
+
+def poll_evaluation():
+    """Apply the worker's result once it arrives; keeps polling until then."""
+    global pending_action
+    if pending_action is None:
+        return  # Cancelled
+    outcome = evaluator.poll()
+    if outcome is None:
+        root.after(POLL_MS, poll_evaluation)
+        return
+
+    button, expression = pending_action
+    pending_action = None
+    history_entry = calc.apply_result(button, expression, outcome)
+    if history_entry:
+        add_to_history(*history_entry)
     _update_entry()
 
+def cancel_evaluation(event=None):
+    """Kill a running calculation and restore the display."""
+    global pending_action
+    # Definitions cannot be interrupted, but stay within their work limits
+    if pending_action is not None and definition_job is None:
+        evaluator.cancel()
+        pending_action = None
+        _update_entry()
+
+def on_close():
+    if export_job is not None:
+        export_job[0].cancel()
+    evaluator.close()
+    if curve_plot is not None:
+        curve_plot.close()
+    history.close()
+    function_library.save()
+    root.destroy()
+
+# -----------------------------
+# Live preview
+# -----------------------------
+def on_entry_changed(*args):
+    """Keep the calculator in sync with the display and schedule a preview."""
+    global preview_job
+    if pending_action is not None:
+        return  # The display shows "Computing…"
+    calc.expression = entry_var.get()
+    # Debounce: only preview once typing pauses
+    if preview_job is not None:
+        root.after_cancel(preview_job)
+    preview_job = root.after(PREVIEW_DELAY_MS, update_preview)
+
+def update_preview():
+    global preview_job
+    preview_job = None
+    result = previewer.preview(with_definitions(calc.expression))
+    preview_var.set(f"= {result}" if result and result != calc.expression else "")
+
 def _update_entry():
-    entry_var.set(current_expression)
+    entry_var.set(calc.expression)
 
 # -----------------------------
 # Graph suggestions & plotting
 # -----------------------------
-graph_suggestions = [
-    "x**2", "-x**2", "(x-2)**2 + 3", "x**3", "x**4",
-    "sin(x)", "cos(x)", "tan(x)", "abs(sin(x))",
-    "log(x)", "ln(x)", "exp(x)", "log2(x)",
-    "sin(2*x)*exp(-0.5*x)", "sin(5*x)/x",
-    "sin(x)+cos(x)", "x*sin(x)", "2*abs(x)", "2*x**2 - 5*x + 3",
-    "x**2 + sin(x)", "cos(x)*exp(-x/5)", "x**3 - 3*x"
-]
+function_library = FunctionLibrary()   # Built-in and previously plotted functions
+shown_suggestions = []
 
 def update_suggestions(event=None):
-    text = graph_entry_var.get().strip().lower()
-    if not text:
-        suggestions_listbox.pack_forget()
+    """Show the best library matches, touching only the rows that changed."""
+    global shown_suggestions
+    text = graph_entry_var.get().strip()
+    found = function_library.search(text) if text else []
+    if found == shown_suggestions:
         return
-    filtered = [s for s in graph_suggestions if text in s.lower()]
-    if filtered:
-        suggestions_listbox.delete(0, tk.END)
-        for s in filtered:
-            suggestions_listbox.insert(tk.END, s)
+    if not found:
+        hide_suggestions()
+        return
+    same = 0
+    while same < min(len(found), len(shown_suggestions)) and \
+            found[same] == shown_suggestions[same]:
+        same += 1
+    suggestions_listbox.delete(same, tk.END)
+    suggestions_listbox.insert(tk.END, *found[same:])
+    if not shown_suggestions:
         suggestions_listbox.pack(fill="x", padx=20, pady=(0,10))
-    else:
-        suggestions_listbox.pack_forget()
+    shown_suggestions = found
 
 def select_suggestion(event):
     sel = suggestions_listbox.curselection()
     if sel:
         s = suggestions_listbox.get(sel)
         graph_entry_var.set(s)
-        suggestions_listbox.pack_forget()
-
-def plot_graph(event=None):
-    expr = graph_entry_var.get().strip()
-    scope = {
-        'x': np.linspace(-10, 10, 1000),
-        'sin': np.sin, 'cos': np.cos, 'tan': np.tan,
-        'asin': np.arcsin, 'acos': np.arccos, 'atan': np.arctan,
-        'sinh': np.sinh, 'cosh': np.cosh, 'tanh': np.tanh,
-        'sqrt': np.sqrt, 'log': np.log10, 'ln': np.log, 'log2': np.log2,
-        'exp': np.exp, 'pi': np.pi, 'e': np.e, 'abs': np.abs
-    }
-    ax.clear()
-    try:
-        if not expr:
-            ax.text(0.5, 0.5, "Enter a function above to visualize", 
-                   ha="center", va="center", color=COLORS['text_secondary'], 
-                   fontsize=title_font['size'], style='italic')
-            canvas.draw()
-            return
-        
-        expr = expr.replace("^", "**").replace("π", "pi")
-        y = eval(expr, {"__builtins__": None}, scope)
-        y = np.where(np.isfinite(y), y, np.nan)
-        
-        # Modern plot styling
-        ax.plot(scope['x'], y, linewidth=3, color=COLORS['accent'], alpha=0.9)
-        ax.set_title(f"f(x) = {expr}", fontsize=title_font['size'], color=COLORS['text_primary'], pad=20)
-        ax.set_xlabel("x", fontsize=axis_font['size'], color=COLORS['text_primary'])
-        ax.set_ylabel("y", fontsize=axis_font['size'], color=COLORS['text_primary'])
-        
-        # Modern grid and styling
-        ax.grid(True, linestyle='-', alpha=0.1, color=COLORS['text_secondary'])
-        ax.set_facecolor(COLORS['bg_dark'])
-        fig.patch.set_facecolor(COLORS['bg_medium'])
-        
-        # Subtle axis lines
-        ax.axhline(y=0, color=COLORS['text_secondary'], linewidth=1, alpha=0.5)
-        ax.axvline(x=0, color=COLORS['text_secondary'], linewidth=1, alpha=0.5)
-        
-        # Modern spines
-        for spine in ax.spines.values():
-            spine.set_color(COLORS['text_secondary'])
-            spine.set_linewidth(0.5)
-        
-        ax.tick_params(colors=COLORS['text_secondary'], size=4)
-        
-    except Exception as e:
-        ax.text(0.5, 0.5, f"Invalid function", 
-               ha="center", va="center", color=COLORS['error'], 
-               fontsize=axis_font['size'])
-    finally:
-        canvas.draw_idle()
+        hide_suggestions()
+
+def hide_suggestions():
+    global shown_suggestions
+    suggestions_listbox.pack_forget()
+    shown_suggestions = []
+
+def forget_suggestion(event):
+    """Right click: remove the clicked function from the library"""
+    row = suggestions_listbox.nearest(event.y)
+    if row >= 0:
+        function_library.remove(suggestions_listbox.get(row))
+        update_suggestions()
+
+def plot_graph(event=None, add=False):
+    """
+    Plot the entered functions (separated by ";"), replacing the current
+    curves unless `add`. They are sampled in the background and drawn as
+    each one is ready.
+    """
+    exprs = [expr.strip() for expr in graph_entry_var.get().split(";") if expr.strip()]
+    ensure_plot()
+    if not exprs:
+        if not curve_plot.curves:
+            curve_plot.show_message("Enter a function above to visualize",
+                                    COLORS['text_secondary'], title_font['size'], italic=True)
+        return
+    if not add:
+        curve_plot.clear()
+    curve_plot.show_message(None, None)
+    curve_plot.set_label_size(axis_font['size'])
+    for expr in exprs:
+        try:
+            curve_plot.add(expr)
+            function_library.use(expr)
+        except Exception:
+            curve_plot.show_message("Invalid function", COLORS['error'], axis_font['size'])
+    update_curve_list()
+
+def add_graph(event=None):
+    plot_graph(add=True)
+
+def clear_graphs():
+    if curve_plot is None:
+        return
+    curve_plot.clear()
+    update_curve_list()
+    curve_plot.show_message("Enter a function above to visualize",
+                            COLORS['text_secondary'], title_font['size'], italic=True)
+
+def update_curve_list():
+    """List the plotted functions in their curve colors (the plot's legend)."""
+    curves_listbox.delete(0, tk.END)
+    for curve in curve_plot.curves:
+        label = curve.expr if curve.shape is not None else f"f(x) = {curve.expr}"
+        if curve.error:
+            label += f"   ({curve.error})"
+        curves_listbox.insert(tk.END, label)
+        curves_listbox.itemconfig(tk.END, fg=curve.line.get_color())
+    if curve_plot.curves:
+        curves_listbox.configure(height=min(5, len(curve_plot.curves)))
+        curves_listbox.pack(fill="x", padx=20, pady=(0, 10), before=plot_area)
+    else:
+        curves_listbox.pack_forget()
+
+def remove_selected_curve(event=None):
+    sel = curves_listbox.curselection()
+    if sel:
+        curve_plot.remove(sel[0])
+        update_curve_list()
+
+def on_param_change(value):
+    if curve_plot is not None:
+        curve_plot.set_param("k", float(value))
+
+def on_show_points():
+    """Toggle the root, extremum and intersection markers"""
+    if curve_plot is not None:
+        curve_plot.set_show_points(show_points_var.get())
+
+# -----------------------------
+# High-resolution export (see hires.py)
+# -----------------------------
+EXPORT_SAMPLES = 10**8
+export_job = None       # (SamplingJob, curve) while sampling
+
+def export_curve():
+    """Sample the selected (or newest) curve over the visible range into a .npy file."""
+    global export_job
+    if export_job is not None:
+        export_job[0].cancel()
+        return
+    if curve_plot is None or not curve_plot.curves:
+        return
+    sel = curves_listbox.curselection()
+    curve = curve_plot.curves[sel[0] if sel else -1]
+    if curve.shape is not None or curve.kernel is None:
+        messagebox.showinfo("Export samples", "Only functions of x can be exported.", parent=root)
+        return
+    n = simpledialog.askinteger("Export samples", f"Samples of f(x) = {curve.expr}:",
+                                initialvalue=EXPORT_SAMPLES, minvalue=2, parent=root)
+    if not n:
+        return
+    path = filedialog.asksaveasfilename(title="Save samples", defaultextension=".npy",
+                                        filetypes=[("NumPy array", "*.npy")], parent=root)
+    if not path:
+        return
+    from hires import SamplingJob
+    lo, hi = curve_plot.ax.get_xlim()
+    # The kernel's source has the definitions it uses inlined
+    job = SamplingJob(curve.kernel.source, lo, hi, n, path, dict(curve_plot.params),
+                      curve.kernel.variables)
+    export_job = (job.start(), curve)
+    export_button.configure(text="Cancel")
+    poll_export()
+
+def poll_export():
+    """Show sampling progress; when done, draw the curve from the file."""
+    global export_job
+    job, curve = export_job
+    if not job.done:
+        curve_plot.show_message(f"Sampling... {job.fraction:.0%}",
+                                COLORS['text_secondary'], axis_font['size'])
+        root.after(POLL_MS * 10, poll_export)
+        return
+    export_job = None
+    export_button.configure(text="Export")
+    curve_plot.show_message(None, None)
+    if job.error is not None:
+        curve_plot.show_message("Export failed", COLORS['error'], axis_font['size'])
+    elif job.result is not None:
+        if curve in curve_plot.curves:
+            curve_plot.set_dense(curve, job.result)
+        else:
+            job.result.close()
+
+# -----------------------------
+# Lazy plotter
+# -----------------------------
+def import_plotting():
+    """Import numpy, Matplotlib and the plotter; safe to call from any thread"""
+    from matplotlib.figure import Figure
+    from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg
+    from plotter import CurvePlot
+    return Figure, FigureCanvasTkAgg, CurvePlot
+
+def ensure_plot():
+    """Create the figure and curve plot the first time they are needed."""
+    global curve_plot
+    if curve_plot is not None:
+        return curve_plot
+    # Waits for the background import if it is still running
+    Figure, FigureCanvasTkAgg, CurvePlot = import_plotting()
+
+    # Pyplot is not needed: the figure is only ever shown in this window
+    fig = Figure(figsize=(7, 5), facecolor=COLORS['bg_medium'])
+    ax = fig.add_subplot()
+    ax.set_facecolor(COLORS['bg_dark'])
+    canvas = FigureCanvasTkAgg(fig, master=plot_area)
+    plot_placeholder.destroy()
+    canvas.get_tk_widget().pack(fill="both", expand=True)
+
+    # Curves are drawn over cached decorations; see plotter.py
+    curve_plot = CurvePlot(canvas, ax, COLORS, PALETTE)
+    curve_plot.definitions = definitions
+    curve_plot.params["k"] = param_scale.get()
+    curve_plot.show_points = show_points_var.get()
+    curve_plot.style(axis_font['size'])
+    curve_plot.show_message("Enter a function above to visualize",
+                            COLORS['text_secondary'], title_font['size'], italic=True)
+    canvas.draw()
+    startup_times.setdefault("plot_ready", time.perf_counter() - STARTED)
+    return curve_plot
+
+def on_first_map(event):
+    """Once the window is on screen, load the plotter without blocking it."""
+    global plot_loader
+    if event.widget != root or plot_loader is not None:
+        return
+    startup_times["window"] = time.perf_counter() - STARTED
+    plot_loader = threading.Thread(target=import_plotting, daemon=True)
+    # Idle callbacks run after Tk has drawn the pending widgets
+    root.after_idle(start_plot_loader)
+
+def start_plot_loader():
+    startup_times["first_paint"] = time.perf_counter() - STARTED
+    plot_loader.start()
+    load_plotter()
+
+def load_plotter():
+    if plot_loader.is_alive():
+        root.after(POLL_MS * 5, load_plotter)
+        return
+    ensure_plot()
+    if BENCHMARK:
+        print(json.dumps(startup_times), flush=True)
+        on_close()
 
 # -----------------------------
 # Build Modern UI
@@ -315,7 +592,7 @@ calc_section.pack(fill="both", expand=True, padx=20, pady=20)
 display_frame = tk.Frame(calc_section, bg=COLORS['bg_dark'], relief='sunken', bd=2)
 display_frame.pack(fill="x", pady=(0, 20))
 
-entry_var = tk.StringVar(value=current_expression)
+entry_var = tk.StringVar(value=calc.expression)
 entry = tk.Entry(
     display_frame,
     textvariable=entry_var,
@@ -327,7 +604,19 @@ entry = tk.Entry(
     relief='flat',
     font=("Consolas", 16)
 )
-entry.pack(fill="x", padx=15, pady=15)
+entry.pack(fill="x", padx=15, pady=(15, 0))
+
+preview_var = tk.StringVar()
+preview_label = tk.Label(
+    display_frame,
+    textvariable=preview_var,
+    anchor="e",
+    bg=COLORS['bg_dark'],
+    fg=COLORS['text_secondary'],
+    font=("Consolas", 11)
+)
+preview_label.pack(fill="x", padx=15, pady=(0, 8))
+entry_var.trace_add("write", on_entry_changed)
 
 # Button definitions with color categories
 button_config = [
@@ -411,6 +700,30 @@ history_title = tk.Label(
 )
 history_title.pack(side="left")
 
+history_search_label = tk.Label(
+    history_header,
+    text="Search",
+    font=("Segoe UI", 9),
+    bg=COLORS['bg_medium'],
+    fg=COLORS['text_secondary']
+)
+history_search_label.pack(side="left", padx=(15, 5))
+
+history_search_var = tk.StringVar()
+history_search = tk.Entry(
+    history_header,
+    textvariable=history_search_var,
+    bg=COLORS['bg_dark'],
+    fg=COLORS['text_primary'],
+    insertbackground=COLORS['accent'],
+    bd=0,
+    relief='flat',
+    width=18,
+    font=("Consolas", 9)
+)
+history_search.pack(side="left", fill="x", expand=True, padx=(0, 10), ipady=3)
+history_search_var.trace_add("write", on_history_search)
+
 clear_btn = tk.Button(
     history_header,
     text="Clear",
@@ -424,6 +737,21 @@ clear_btn = tk.Button(
 )
 clear_btn.pack(side="right", padx=(0, 0), ipadx=10)
 
+# Definitions, shown above the history once there are any
+definitions_listbox = tk.Listbox(
+    history_section,
+    height=3,
+    bg=COLORS['bg_dark'],
+    fg=COLORS['text_primary'],
+    selectbackground=COLORS['accent'],
+    selectforeground=COLORS['bg_dark'],
+    bd=0,
+    relief='flat',
+    font=("Consolas", 9)
+)
+definitions_listbox.bind("<Double-Button-1>", edit_definition)
+definitions_listbox.bind("<Delete>", remove_definition)
+
 # History listbox
 history_list_frame = tk.Frame(history_section, bg=COLORS['bg_dark'], relief='sunken', bd=1)
 history_list_frame.pack(fill="x")
@@ -440,12 +768,13 @@ history_listbox = tk.Listbox(
     selectforeground=COLORS['bg_dark'],
     bd=0,
     relief='flat',
-    yscrollcommand=history_scrollbar.set,
+    yscrollcommand=on_history_scroll,
     font=("Consolas", 9)
 )
 history_listbox.pack(side="left", fill="both", expand=True, padx=10, pady=10)
 history_scrollbar.config(command=history_listbox.yview)
 history_listbox.bind("<Double-Button-1>", on_history_select)
+load_history()
 
 # Right panel: Graph plotter
 right_panel = tk.Frame(content_frame, bg=COLORS['bg_medium'], relief='raised', bd=1)
@@ -506,6 +835,109 @@ plot_button = tk.Button(
 )
 plot_button.pack(side="right", ipadx=20, ipady=5)
 
+add_button = tk.Button(
+    graph_input_frame,
+    text="Add",
+    command=add_graph,
+    bg=COLORS['bg_light'],
+    fg=COLORS['text_primary'],
+    activebackground=COLORS['accent_hover'],
+    bd=0,
+    relief='flat',
+    cursor='hand2',
+    font=("Segoe UI", 10, "bold")
+)
+add_button.pack(side="right", ipadx=12, ipady=5, padx=(0, 8))
+
+clear_plot_button = tk.Button(
+    graph_input_frame,
+    text="Clear",
+    command=clear_graphs,
+    bg=COLORS['bg_light'],
+    fg=COLORS['text_secondary'],
+    activebackground=COLORS['error'],
+    bd=0,
+    relief='flat',
+    cursor='hand2',
+    font=("Segoe UI", 10)
+)
+clear_plot_button.pack(side="right", ipadx=8, ipady=5, padx=(0, 8))
+graph_entry.bind("<Shift-Return>", add_graph)
+
+# Parameter slider: functions can use k, e.g. sin(k*x)
+param_frame = tk.Frame(right_panel, bg=COLORS['bg_medium'])
+param_frame.pack(fill="x", padx=20, pady=(0, 10))
+
+param_label = tk.Label(
+    param_frame,
+    text="k =",
+    font=("Segoe UI", 11, "bold"),
+    bg=COLORS['bg_medium'],
+    fg=COLORS['accent']
+)
+param_label.pack(side="left", padx=(0, 10))
+
+param_scale = tk.Scale(
+    param_frame,
+    from_=-5, to=5, resolution=0.05,
+    orient="horizontal",
+    command=on_param_change,
+    bg=COLORS['bg_medium'],
+    fg=COLORS['text_secondary'],
+    troughcolor=COLORS['bg_dark'],
+    highlightthickness=0,
+    bd=0
+)
+param_scale.set(1.0)
+param_scale.pack(side="left", fill="x", expand=True)
+
+# Samples the selected curve at high resolution into a .npy file
+export_button = tk.Button(
+    param_frame,
+    text="Export",
+    command=export_curve,
+    bg=COLORS['bg_light'],
+    fg=COLORS['text_primary'],
+    activebackground=COLORS['accent_hover'],
+    bd=0,
+    relief='flat',
+    cursor='hand2',
+    font=("Segoe UI", 10)
+)
+export_button.pack(side="right", ipadx=8, ipady=5, padx=(10, 0))
+
+# Marks roots, extrema and intersections of the plotted functions
+show_points_var = tk.BooleanVar(value=False)
+show_points_check = tk.Checkbutton(
+    param_frame,
+    text="Points",
+    variable=show_points_var,
+    command=on_show_points,
+    bg=COLORS['bg_medium'],
+    fg=COLORS['text_secondary'],
+    selectcolor=COLORS['bg_dark'],
+    activebackground=COLORS['bg_medium'],
+    activeforeground=COLORS['text_primary'],
+    bd=0,
+    highlightthickness=0,
+    font=("Segoe UI", 10)
+)
+show_points_check.pack(side="right", padx=(10, 0))
+
+# Plotted functions; Delete or double click removes one
+curves_listbox = tk.Listbox(
+    right_panel,
+    height=3,
+    bg=COLORS['bg_dark'],
+    fg=COLORS['text_primary'],
+    selectbackground=COLORS['accent'],
+    bd=0,
+    relief='flat',
+    font=("Consolas", 9)
+)
+curves_listbox.bind("<Delete>", remove_selected_curve)
+curves_listbox.bind("<Double-Button-1>", remove_selected_curve)
+
 # Suggestions
 suggestions_listbox = tk.Listbox(
     right_panel,
@@ -518,65 +950,50 @@ suggestions_listbox = tk.Listbox(
     font=("Consolas", 9)
 )
 suggestions_listbox.bind("<<ListboxSelect>>", select_suggestion)
+suggestions_listbox.bind("<Button-3>", forget_suggestion)
+
+# The Matplotlib canvas goes here once ensure_plot() has created it
+plot_area = tk.Frame(right_panel, bg=COLORS['bg_dark'])
+plot_area.pack(fill="both", expand=True, padx=20, pady=(0, 20))
+plot_placeholder = tk.Label(
+    plot_area,
+    text="Loading plotter...",
+    font=("Segoe UI", 12, "italic"),
+    bg=COLORS['bg_dark'],
+    fg=COLORS['text_secondary']
+)
+plot_placeholder.place(relx=0.5, rely=0.5, anchor="center")
 
-# Matplotlib with modern styling
-fig, ax = plt.subplots(figsize=(7, 5), facecolor=COLORS['bg_medium'])
-ax.set_facecolor(COLORS['bg_dark'])
-canvas = FigureCanvasTkAgg(fig, master=right_panel)
-canvas_widget = canvas.get_tk_widget()
-canvas_widget.pack(fill="both", expand=True, padx=20, pady=(0, 20))
+PALETTE = [COLORS['accent'], COLORS['operator'], COLORS['special'], COLORS['error'],
+           COLORS['function'], COLORS['warning'], "#8B5CF6", "#F472B6", "#FB923C", "#A3E635"]
 
 # Font references for matplotlib
 title_font = {'size': 14}
 axis_font = {'size': 11}
 
-# Initial empty plot
-ax.text(0.5, 0.5, "Enter a function above to visualize", 
-       ha="center", va="center", color=COLORS['text_secondary'], 
-       fontsize=14, style='italic')
-ax.set_facecolor(COLORS['bg_dark'])
-fig.patch.set_facecolor(COLORS['bg_medium'])
-canvas.draw()
-
 # -----------------------------
-# Responsiveness: resize handler
+# Responsiveness: fonts follow the window size (see layout.py)
 # -----------------------------
-def on_root_resize(event):
-    if event.widget != root:
-        return
-        
-    try:
-        display_font, btn_font, small_font = make_fonts(root, min_ref=35)
-        
-        # Update fonts safely
-        entry.configure(font=display_font)
-        graph_entry.configure(font=display_font)
-        history_listbox.configure(font=small_font)
-        suggestions_listbox.configure(font=small_font)
-        
-        # Update button fonts
-        for btn in btn_widgets:
-            btn.configure(font=btn_font)
-        
-        # Update matplotlib fonts
-        title_font['size'] = max(12, int(display_font['size'] * 0.8))
-        axis_font['size'] = max(10, int(display_font['size'] * 0.6))
-        
-    except Exception as e:
-        # Fallback to default fonts if there's an issue
-        pass
+def update_plot_fonts(sizes):
+    title_font['size'] = max(12, int(sizes['display'] * 0.8))
+    axis_font['size'] = max(10, int(sizes['display'] * 0.6))
 
-root.bind("<Configure>", on_root_resize)
+layout = ResponsiveLayout(root, min_ref=35)
+layout.add("display", "Consolas", [entry, graph_entry])
+layout.add("button", "Segoe UI", btn_widgets)
+layout.add("small", "Segoe UI", [history_listbox, suggestions_listbox, definitions_listbox])
+layout.on_change(update_plot_fonts)
+
+root.bind("<Escape>", cancel_evaluation)
+root.bind("<Map>", on_first_map)
+root.protocol("WM_DELETE_WINDOW", on_close)
 
 # Apply initial styling
 root.update_idletasks()
+layout.refresh()
 
-# Create a dummy event for initial resize
-class DummyEvent:
-    def __init__(self):
-        self.widget = root
-
-on_root_resize(DummyEvent())
+# Start the worker now so the first "=" does not wait for it
+evaluator.start()
 
 # Start the application
 root.mainloop()
\ No newline at end of file
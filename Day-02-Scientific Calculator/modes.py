@@ -0,0 +1,277 @@
+"""
+Parametric, polar and implicit plots.
+
+The function entry picks the mode from the text:
+
+    sin(x)                      y = f(x), sampled by sampling.py
+    cos(3*t), sin(2*t)          parametric (x(t), y(t)), t from 0 to 2*pi
+    cos(3*t), sin(2*t), 0, pi   ... t from 0 to pi
+    r = 1 + cos(θ)              polar r(θ), θ (or theta) from 0 to 2*pi;
+                                a range can follow as above
+    x**2 + y**2 = 4             implicit F(x, y) = 0, here F = x**2 + y**2 - 4
+
+Every mode compiles to plot kernels (plot_kernel.py), so the functions and
+constants are the same as for f(x), and the parameter k works everywhere.
+Polar curves are parametric curves with x = r*cos(θ) and y = r*sin(θ) built
+into the syntax tree.
+
+Implicit curves are traced with marching squares over the view, refined
+only near the curve: the view starts as a grid of COARSE cells across;
+each cell the curve may pass through (its corner values change sign, or
+come close to zero relative to how much they vary) is split into
+SPLIT x SPLIT cells, LEVELS times. That reaches a grid of 4096 cells across,
+but only evaluates the few thousand cells along the curve instead of all
+16 million. Points are evaluated a cache-sized TILE at a time.
+"""
+
+import math
+import re
+
+import numpy as np
+
+from expression import ExpressionError, evaluate, normalize, parse_tokens, tokenize
+from plot_kernel import PlotKernel, plot_names
+
+PARAMS = ("k",)
+FULL_TURN = (0.0, 2 * math.pi)
+
+# Parametric sampling
+BASE_SAMPLES = 2048
+MAX_SAMPLES = 1 << 15
+MAX_STEP_PX = 2.0       # Longest screen distance between neighbouring samples
+REFINE_PASSES = 5
+
+# Implicit curves
+COARSE = 64             # Cells across the view before refining
+SPLIT = 4
+LEVELS = 3              # COARSE * SPLIT ** LEVELS = 4096 cells across at the finest
+TILE = 1 << 14          # Points per kernel call: 128 KB per array, fits in L2
+MAX_POINTS = 1 << 22    # Refinement stops early past this many points in one level
+
+
+def _split_top_level(tokens):
+    """Split tokens at commas outside brackets"""
+    parts, depth, current = [], 0, []
+    for token in tokens:
+        value = token[1]
+        depth += (value == "(") - (value == ")")
+        if value == "," and depth == 0:
+            parts.append(current)
+            current = []
+        else:
+            current.append(token)
+    parts.append(current)
+    return parts
+
+
+def _constant(tokens):
+    """Value of a range bound such as 2*pi"""
+    return float(evaluate(" ".join(value for _, value in tokens)))
+
+
+def _kernel(tree, variables):
+    return PlotKernel(str(tree), tree, variables + PARAMS)
+
+
+def _finite(y):
+    y[~np.isfinite(y)] = np.nan
+    return y
+
+
+def equal_view(x0, x1, y0, y1, width, height, pad=0.1):
+    """Limits around a box with margins and the same scale on both axes"""
+    cx, cy = (x0 + x1) / 2, (y0 + y1) / 2
+    scale = max((x1 - x0) / width, (y1 - y0) / height) * (1 + 2 * pad) or 20.0 / width
+    return ((cx - scale * width / 2, cx + scale * width / 2),
+            (cy - scale * height / 2, cy + scale * height / 2))
+
+
+def parse_plot(text):
+    """
+    A ParametricCurve or ImplicitCurve for `text`, or None when it is a
+    plain function of x. Raises ExpressionError for invalid input.
+    """
+    text = normalize(text).replace("θ", "theta")
+    polar = re.match(r"\s*r\s*=(?!=)(.*)$", text, re.S)
+    if polar:
+        parts = _split_top_level(tokenize(polar.group(1)))
+        if len(parts) not in (1, 3):
+            raise ExpressionError("expected r = f(θ) or r = f(θ), from, to")
+        r = parse_tokens(parts[0], plot_names(("theta",) + PARAMS))
+        theta = ("name", "theta")
+        x = ("bin", "*", r, ("call", "cos", (theta,)))
+        y = ("bin", "*", r, ("call", "sin", (theta,)))
+        span = (_constant(parts[1]), _constant(parts[2])) if len(parts) == 3 else FULL_TURN
+        return ParametricCurve(_kernel(x, ("theta",)), _kernel(y, ("theta",)), "theta", span)
+
+    if "=" in text:
+        left, _, right = text.partition("=")
+        names = plot_names(("x", "y") + PARAMS)
+        tree = ("bin", "-", parse_tokens(tokenize(left), names),
+                parse_tokens(tokenize(right), names))
+        return ImplicitCurve(_kernel(tree, ("x", "y")))
+
+    parts = _split_top_level(tokenize(text))
+    if len(parts) == 1:
+        return None
+    if len(parts) not in (2, 4):
+        raise ExpressionError("expected x(t), y(t) or x(t), y(t), from, to")
+    names = plot_names(("t",) + PARAMS)
+    span = (_constant(parts[2]), _constant(parts[3])) if len(parts) == 4 else FULL_TURN
+    return ParametricCurve(_kernel(parse_tokens(parts[0], names), ("t",)),
+                           _kernel(parse_tokens(parts[1], names), ("t",)), "t", span)
+
+
+class ParametricCurve:
+    """(x(t), y(t)) for t in a fixed range."""
+
+    def __init__(self, x_kernel, y_kernel, variable, span):
+        if not span[1] > span[0]:
+            raise ExpressionError("the range must go from a lower to a higher value")
+        self.x_kernel = x_kernel
+        self.y_kernel = y_kernel
+        self.variable = variable
+        self.span = span
+
+    def uses(self, name):
+        return name in self.x_kernel.used or name in self.y_kernel.used
+
+    def _points(self, t, params):
+        values = {self.variable: t, **params}
+        return _finite(self.x_kernel(**values)), _finite(self.y_kernel(**values))
+
+    def fit(self, width, height, params):
+        """View limits showing the whole curve"""
+        x, y = self._points(np.linspace(*self.span, BASE_SAMPLES), params)
+        ok = np.isfinite(x) & np.isfinite(y)
+        if not ok.any():
+            return equal_view(-10, 10, -10, 10, width, height, pad=0)
+        return equal_view(x[ok].min(), x[ok].max(), y[ok].min(), y[ok].max(), width, height)
+
+    def sample(self, xlim, ylim, width, height, params):
+        """
+        (xs, ys) along the curve, with extra samples wherever neighbours are
+        more than MAX_STEP_PX apart on screen.
+        """
+        t = np.linspace(*self.span, BASE_SAMPLES)
+        x, y = self._points(t, params)
+        sx = width / (xlim[1] - xlim[0])
+        sy = height / (ylim[1] - ylim[0])
+        for _ in range(REFINE_PASSES):
+            with np.errstate(invalid="ignore"):
+                gaps = np.hypot(np.diff(x) * sx, np.diff(y) * sy)
+            flagged = np.flatnonzero(gaps > MAX_STEP_PX)[:MAX_SAMPLES - len(t)]
+            if not flagged.size:
+                break
+            mid = (t[flagged] + t[flagged + 1]) / 2
+            mx, my = self._points(mid, params)
+            order = np.argsort(np.concatenate((t, mid)), kind="stable")
+            t = np.concatenate((t, mid))[order]
+            x = np.concatenate((x, mx))[order]
+            y = np.concatenate((y, my))[order]
+        return x, y
+
+
+class ImplicitCurve:
+    """The curve F(x, y) = 0."""
+
+    def __init__(self, kernel):
+        self.kernel = kernel
+
+    def uses(self, name):
+        return name in self.kernel.used
+
+    def fit(self, width, height, params):
+        return equal_view(-10, 10, 0, 0, width, height, pad=0)
+
+    def _evaluate(self, x, y, params):
+        """F at points (x, y) of any shape, a tile at a time"""
+        xf, yf = np.broadcast_arrays(x, y)
+        xf, yf = xf.ravel(), yf.ravel()
+        out = np.empty(xf.size)
+        for start in range(0, xf.size, TILE):
+            stop = start + TILE
+            self.kernel(x=xf[start:stop], y=yf[start:stop], out=out[start:stop], **params)
+        return _finite(out).reshape(np.broadcast(x, y).shape)
+
+    def sample(self, xlim, ylim, width, height, params):
+        """Line segments of the curve within the view, separated by NaN"""
+        (x0, x1), (y0, y1) = xlim, ylim
+        nx = COARSE
+        ny = max(1, round(COARSE * height / width))
+        hx, hy = (x1 - x0) / nx, (y1 - y0) / ny
+
+        # Level 0: a full grid, values at cell corners
+        grid = self._evaluate(x0 + np.arange(nx + 1) * hx, (y0 + np.arange(ny + 1) * hy)[:, None],
+                              params)
+        ci, cj = np.mgrid[0:ny, 0:nx].reshape(2, -1)
+        corners = [grid[:-1, :-1].ravel(), grid[:-1, 1:].ravel(),
+                   grid[1:, 1:].ravel(), grid[1:, :-1].ravel()]
+        keep = _near_curve(corners)
+        ci, cj, corners = ci[keep], cj[keep], [c[keep] for c in corners]
+
+        steps = np.arange(SPLIT + 1)
+        for _ in range(LEVELS):
+            if len(ci) * (SPLIT + 1) ** 2 > MAX_POINTS:
+                break
+            # (SPLIT + 1) x (SPLIT + 1) points inside each kept cell
+            hx, hy = hx / SPLIT, hy / SPLIT
+            rows = ci[:, None] * SPLIT + steps     # (cells, SPLIT + 1)
+            cols = cj[:, None] * SPLIT + steps
+            values = self._evaluate((x0 + cols * hx)[:, None, :], (y0 + rows * hy)[:, :, None],
+                                    params)
+            shape = (len(ci), SPLIT, SPLIT)
+            ci = np.broadcast_to(rows[:, :-1, None], shape).ravel()
+            cj = np.broadcast_to(cols[:, None, :-1], shape).ravel()
+            corners = [values[:, :-1, :-1].ravel(), values[:, :-1, 1:].ravel(),
+                       values[:, 1:, 1:].ravel(), values[:, 1:, :-1].ravel()]
+            keep = _near_curve(corners)
+            ci, cj, corners = ci[keep], cj[keep], [c[keep] for c in corners]
+
+        return _marching_squares(corners, x0 + cj * hx, y0 + ci * hy, hx, hy)
+
+
+def _near_curve(corners):
+    """Cells the curve may cross: a sign change, or values near zero for their spread"""
+    stacked = np.stack(corners)
+    lo, hi = np.fmin.reduce(stacked), np.fmax.reduce(stacked)   # NaN only if all are
+    distance = np.where(lo > 0, lo, -hi)    # How far the corners stay from zero
+    return (distance <= 0) | (distance <= hi - lo)
+
+
+# Corner offsets counterclockwise from (x, y): edge i runs from corner i to i + 1
+CORNER_X = np.array([0.0, 1.0, 1.0, 0.0])
+CORNER_Y = np.array([0.0, 0.0, 1.0, 1.0])
+
+
+def _marching_squares(corners, x, y, hx, hy):
+    """NaN-separated segments where F = 0 crosses each cell"""
+    v = np.stack(corners, axis=1)          # (cells, 4) counterclockwise
+    ok = np.isfinite(v).all(axis=1)
+    v, x, y = v[ok], x[ok], y[ok]
+    positive = v > 0
+    crossing = positive != np.roll(positive, -1, axis=1)
+    # Edges that are not crossed give inf or NaN here, and are never used
+    with np.errstate(divide="ignore", invalid="ignore"):
+        t = v / (v - np.roll(v, -1, axis=1))
+        px = x[:, None] + hx * (CORNER_X + t * (np.roll(CORNER_X, -1) - CORNER_X))
+        py = y[:, None] + hy * (CORNER_Y + t * (np.roll(CORNER_Y, -1) - CORNER_Y))
+
+    count = crossing.sum(axis=1)
+    # Two crossed edges: one segment between them
+    two = np.flatnonzero(count == 2)
+    edges = np.argsort(~crossing[two], axis=1, kind="stable")[:, :2]
+    starts, ends = [(two, edges[:, 0])], [(two, edges[:, 1])]
+    # Four (a saddle): the centre value decides which corners are cut off
+    four = np.flatnonzero(count == 4)
+    joined = (v[four].mean(axis=1) > 0) == positive[four, 0]
+    for pairs, cells in (((0, 1), (2, 3)), four[joined]), (((3, 0), (1, 2)), four[~joined]):
+        for a, b in pairs:
+            starts.append((cells, np.full(len(cells), a)))
+            ends.append((cells, np.full(len(cells), b)))
+
+    (sc, se), (ec, ee) = ([np.concatenate(p) for p in zip(*side)] for side in (starts, ends))
+    gap = np.full(len(sc), np.nan)
+    xs = np.column_stack((px[sc, se], px[ec, ee], gap)).ravel()
+    ys = np.column_stack((py[sc, se], py[ec, ee], gap)).ravel()
+    return xs, ys
@@ -0,0 +1,166 @@
+"""
+Vectorized evaluation of plot expressions.
+
+A plot expression is parsed with the calculator's parser (expression.py)
+and turned into a short list of NumPy ufunc calls. Every call writes into
+one of a few preallocated work buffers with `out=`, so evaluating
+"sin(2*x)*exp(-0.5*x)" allocates nothing per operator. Samples are
+processed in fixed-size chunks, so memory use stays the same whether a
+plot has a thousand samples or ten million.
+
+Subexpressions that do not depend on a variable, such as 2*pi, are folded
+to a single number when the kernel is built.
+
+The work buffers belong to the calling thread, so one kernel can be
+evaluated from several threads at once (the plotter samples curves on a
+thread pool).
+
+    kernel = get_kernel("sin(2*x)*exp(-0.5*x)")
+    y = kernel(np.linspace(-10, 10, 1000))
+"""
+
+import threading
+from functools import lru_cache
+
+import numpy as np
+
+from expression import CONSTANTS, ExpressionError, parse
+
+# Functions available to plot expressions
+UFUNCS = {
+    'sin': np.sin, 'cos': np.cos, 'tan': np.tan,
+    'asin': np.arcsin, 'acos': np.arccos, 'atan': np.arctan,
+    'sinh': np.sinh, 'cosh': np.cosh, 'tanh': np.tanh,
+    'asinh': np.arcsinh, 'acosh': np.arccosh, 'atanh': np.arctanh,
+    'sqrt': np.sqrt, 'log': np.log10, 'ln': np.log, 'log2': np.log2,
+    'exp': np.exp, 'abs': np.absolute, 'pow': np.power,
+}
+BINARY_UFUNCS = {
+    '+': np.add, '-': np.subtract, '*': np.multiply, '/': np.true_divide,
+    '//': np.floor_divide, '%': np.remainder, '**': np.power,
+}
+
+CHUNK = 1 << 16     # Samples per work buffer (512 KB of float64)
+
+
+class PlotKernel:
+    """
+    A compiled plot expression.
+
+    `program` is a list of (ufunc, operands, destination) steps. Operands
+    are ("const", number), ("var", name) or ("reg", index); destination
+    is a work-buffer index, or None for the output array.
+    """
+
+    def __init__(self, source, tree, variables=("x",)):
+        self.source = source
+        self.tree = tree
+        self.variables = variables
+        self.used = set()   # Variables the expression actually mentions
+        self.program = []
+        self._free = []
+        self.registers = 0
+        self.result = self._emit(tree)
+        # The last step can write straight into the caller's output array
+        if self.result[0] == "reg" and self.program and self.program[-1][2] == self.result[1]:
+            ufunc, operands, _ = self.program[-1]
+            self.program[-1] = (ufunc, operands, None)
+        self._local = threading.local()     # .buffers: this thread's work buffers
+
+    def _alloc(self):
+        if self._free:
+            return self._free.pop()
+        self.registers += 1
+        return self.registers - 1
+
+    def _release(self, operand):
+        if operand[0] == "reg":
+            self._free.append(operand[1])
+
+    def _apply(self, ufunc, operands):
+        """Emit one step, or fold it when every operand is a constant"""
+        if all(op[0] == "const" for op in operands):
+            with np.errstate(all="ignore"):
+                return ("const", float(ufunc(*(op[1] for op in operands))))
+        for op in operands:
+            self._release(op)
+        dest = self._alloc()
+        self.program.append((ufunc, tuple(operands), dest))
+        return ("reg", dest)
+
+    def _emit(self, node):
+        kind = node[0]
+        if kind == "num":
+            return ("const", float(node[1]))
+        if kind == "name":
+            if node[1] in self.variables:
+                self.used.add(node[1])
+                return ("var", node[1])
+            return ("const", float(CONSTANTS[node[1]]))
+        if kind == "neg":
+            return self._apply(np.negative, [self._emit(node[1])])
+        if kind == "bin":
+            return self._apply(BINARY_UFUNCS[node[1]], [self._emit(node[2]), self._emit(node[3])])
+        if kind == "call":
+            ufunc = UFUNCS[node[1]]
+            if len(node[2]) != ufunc.nin:
+                raise ExpressionError(f"{node[1]}() takes {ufunc.nin} argument(s)")
+            return self._apply(ufunc, [self._emit(arg) for arg in node[2]])
+        raise ExpressionError(f"unknown node {kind!r}")
+
+    def __call__(self, x=None, out=None, **values):
+        """
+        Evaluate over the samples in `x` (or any array variable passed by
+        name); scalar variables such as parameters may be passed by name too.
+        Results go into `out` if given, else a new float64 array.
+        """
+        if x is not None:
+            values["x"] = x
+        arrays = {name: np.asarray(v, dtype=float) for name, v in values.items()}
+        missing = [name for name in self.variables if name in self.used and name not in arrays]
+        if missing:
+            raise TypeError(f"missing value for {', '.join(missing)}")
+        lengths = {a.shape[0] for a in arrays.values() if a.ndim}
+        if len(lengths) > 1:
+            raise ValueError("array variables must have the same length")
+        n = lengths.pop() if lengths else 1
+        if out is None:
+            out = np.empty(n)
+
+        if self.result[0] == "const":
+            out.fill(self.result[1])
+            return out
+        if self.result[0] == "var":
+            np.copyto(out, arrays[self.result[1]])
+            return out
+
+        buffers = getattr(self._local, "buffers", None)
+        if buffers is None:
+            buffers = self._local.buffers = [np.empty(CHUNK) for _ in range(self.registers)]
+        with np.errstate(all="ignore"):
+            for start in range(0, n, CHUNK):
+                stop = min(n, start + CHUNK)
+                size = stop - start
+                chunk = {name: a[start:stop] if a.ndim else a for name, a in arrays.items()}
+                regs = [b[:size] for b in buffers]
+                for ufunc, operands, dest in self.program:
+                    args = [op[1] if op[0] == "const" else
+                            chunk[op[1]] if op[0] == "var" else regs[op[1]]
+                            for op in operands]
+                    ufunc(*args, out=out[start:stop] if dest is None else regs[dest])
+        return out
+
+
+def plot_names(variables):
+    """Names a plot expression may use: functions, constants and variables"""
+    names = dict(UFUNCS)
+    names.update(CONSTANTS)
+    for name in variables:
+        names[name] = None
+    return names
+
+
+@lru_cache(maxsize=128)
+def get_kernel(text, variables=("x",)):
+    """Compile a plot expression, reusing the kernel for text seen before"""
+    return PlotKernel(text, parse(text, plot_names(variables)), variables)
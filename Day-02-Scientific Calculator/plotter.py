@@ -0,0 +1,510 @@
+"""
+Multi-function plot with blitted updates.
+
+The axes decorations (background, grid, zero lines, spines, ticks, labels)
+are drawn once by a normal Matplotlib draw and kept as a bitmap. The curves
+are "animated" artists that a normal draw skips, so adding, removing or
+re-evaluating a curve only restores that bitmap and redraws the curves on
+top of it (copy_from_bbox / restore_region / blit). There is no Matplotlib
+legend, since text is by far the slowest thing to draw; the UI lists the
+functions in their curve colors instead.
+
+A full redraw is only needed when the decorations change: zooming, panning,
+resizing, or showing and hiding the centre message.
+
+Expressions may use a parameter `k`, controlled by a slider in the UI.
+Changing it only re-evaluates the curves that mention k.
+
+A curve can also be shown from a high-resolution sample file (hires.py),
+decimated to the plot width, instead of being sampled for each view.
+
+Roots, local extrema and intersections (features.py) can be marked too.
+They are recomputed along with the curves and drawn as animated markers,
+with coordinate labels while only a few are in view.
+
+Parametric, polar and implicit curves (modes.py) are plotted alongside
+functions of x. They sample themselves for the view; points are only
+marked on functions of x.
+
+Functions of x may use the calculator's definitions (definitions.py). They
+are inlined before compiling, and redefine() recompiles only the curves
+that use a changed name.
+
+Curves are sampled on a thread pool, one task per curve; NumPy releases
+the GIL inside its loops, so several curves really are computed at once.
+The Tk thread polls the tasks and draws each curve as soon as it is done,
+so neither the UI nor the quick curves wait for the slowest one. Requests
+arriving while a batch runs are queued and sampled together afterwards,
+so each curve's SampleCache is only ever used by one task at a time.
+Points are found by a task of their own once a batch is complete. Fitting
+the view to a curve is done by the task that samples it, and the other
+curves are sampled once the new limits are known.
+"""
+
+import os
+from concurrent.futures import ThreadPoolExecutor
+from itertools import combinations
+
+import numpy as np
+
+from expression import ExpressionError, normalize
+from features import find_extrema, find_intersections, find_roots
+from modes import parse_plot
+from plot_kernel import get_kernel
+from sampling import SampleCache, sample_view, y_limits
+
+DEFAULT_VIEW = (-10, 10)
+VARIABLES = ("x", "k")
+FEATURE_MARKERS = {"root": "o", "extremum": "D", "intersection": "X"}
+MAX_LABELS = 12
+WORKERS = os.cpu_count() or 1
+POLL_MS = 10
+
+
+class Curve:
+    """One plotted function."""
+
+    def __init__(self, expr, kernel, line, shape=None):
+        self.expr = expr
+        self.kernel = kernel    # None for the modes.py curves, and while it has an error
+        self.line = line
+        self.shape = shape      # modes.ParametricCurve or ImplicitCurve, if not f(x)
+        self.samples = None
+        self.dense = None   # hires.DenseSamples shown instead, if any
+        self.defined = set()    # Definitions it uses
+        self.error = None       # Why it cannot be drawn, if it cannot
+
+    def uses(self, name):
+        if self.shape is not None:
+            return self.shape.uses(name)
+        return self.kernel is not None and name in self.kernel.used
+
+
+def _sample(shape, dense, samples, view, fit=False):
+    """
+    (limits, (xs, ys)) of one curve; runs on the thread pool. With `fit` the
+    curve is sampled for limits fitted to it, else limits is None and it is
+    sampled for `view`.
+    """
+    (lo, hi), ylim, width, height, params = view
+    limits = None
+    if fit:
+        if shape is not None:
+            limits = shape.fit(width, height, params)
+        else:
+            limits = DEFAULT_VIEW, y_limits(samples.evaluate(np.linspace(*DEFAULT_VIEW, width)))
+        (lo, hi), ylim = limits
+    if shape is not None:
+        return limits, shape.sample((lo, hi), ylim, width, height, params)
+    if dense is not None:
+        return limits, dense.decimate(lo, hi, width)
+    return limits, sample_view(samples, lo, hi, width, ylim[1] - ylim[0])
+
+
+def _locate_points(samples, old, view):
+    """
+    Roots, extrema and intersections of the curves behind `samples`, reusing
+    the results in `old`; returns (points by kind, cache). Runs on the pool.
+    """
+    lo, hi, y_lo, y_hi, width = view
+    yspan = y_hi - y_lo
+    found = {kind: [] for kind in FEATURE_MARKERS}
+    cache, grids = {}, []
+    for curve_samples in samples:
+        # The base grid is cached and shared by all curves in this view
+        xs, ys = curve_samples.grid(lo, hi, width)
+        grids.append(ys)
+        cache[curve_samples] = old.get(curve_samples) or (
+            find_roots(curve_samples.evaluate, xs, ys, yspan),
+            find_extrema(curve_samples.evaluate, xs, ys, yspan))
+        found["root"].append(cache[curve_samples][0])
+        found["extremum"].append(cache[curve_samples][1])
+    for i, j in combinations(range(len(samples)), 2):
+        pair = (samples[i], samples[j])
+        cache[pair] = old.get(pair) or find_intersections(
+            pair[0].evaluate, pair[1].evaluate, xs, grids[i], grids[j], yspan)
+        found["intersection"].append(cache[pair])
+    return found, cache
+
+
+class CurvePlot:
+    """The curves shown on one Matplotlib axes, plus zoom and pan."""
+
+    def __init__(self, canvas, ax, colors, palette):
+        self.canvas = canvas
+        self.ax = ax
+        self.colors = colors
+        self.palette = palette
+        self.params = {"k": 1.0}
+        self.definitions = None     # definitions.Definitions, if any
+        self.curves = []
+        self.message = None
+        self.background = None
+        self._resample_pending = False
+        self._pan_start = None
+        self.pool = ThreadPoolExecutor(max_workers=WORKERS, thread_name_prefix="plot")
+        self._jobs = []         # (curve, future, dense) of the batch; curve None finds points
+        self._queued = {}       # Curves to sample once it is done (an ordered set)
+        self._fit_curve = None  # Curve to fit the view to in the next batch
+        self._points_due = False    # Points are stale; found again after the batch
+        self.show_points = False
+        self.markers = {kind: ax.plot([], [], linestyle="none", marker=marker, markersize=6,
+                                      color=colors['text_primary'], animated=True)[0]
+                        for kind, marker in FEATURE_MARKERS.items()}
+        self.labels = []
+        self._points_view = None    # View the cached points were found for
+        self._points_cache = {}     # SampleCache or pair of them -> points
+
+        canvas.mpl_connect("draw_event", self._on_draw)
+        # Scroll to zoom, drag to pan, double click to reset the view
+        canvas.mpl_connect("scroll_event", self._on_scroll)
+        canvas.mpl_connect("button_press_event", self._on_press)
+        canvas.mpl_connect("motion_notify_event", self._on_drag)
+        canvas.mpl_connect("button_release_event", self._on_release)
+
+    # -----------------------------
+    # Decorations (full redraw)
+    # -----------------------------
+    def style(self, axis_size=11):
+        """Set up the static axes decorations; called once."""
+        ax, colors = self.ax, self.colors
+        ax.set_xlabel("x", fontsize=axis_size, color=colors['text_primary'])
+        ax.set_ylabel("y", fontsize=axis_size, color=colors['text_primary'])
+        ax.grid(True, linestyle='-', alpha=0.1, color=colors['text_secondary'])
+        ax.set_facecolor(colors['bg_dark'])
+        ax.figure.patch.set_facecolor(colors['bg_medium'])
+
+        # Subtle axis lines
+        ax.axhline(y=0, color=colors['text_secondary'], linewidth=1, alpha=0.5)
+        ax.axvline(x=0, color=colors['text_secondary'], linewidth=1, alpha=0.5)
+
+        for spine in ax.spines.values():
+            spine.set_color(colors['text_secondary'])
+            spine.set_linewidth(0.5)
+        ax.tick_params(colors=colors['text_secondary'], size=4)
+        ax.set_xlim(DEFAULT_VIEW)
+        self.canvas.draw_idle()
+
+    def set_label_size(self, size):
+        """Resize the axis labels (a full redraw, so only when it changed)."""
+        if self.ax.xaxis.label.get_fontsize() != size:
+            self.ax.xaxis.label.set_fontsize(size)
+            self.ax.yaxis.label.set_fontsize(size)
+            self.canvas.draw_idle()
+
+    def show_message(self, text, color, fontsize=14, italic=False):
+        """Centre text such as "Invalid function"; None hides it."""
+        if self.message is None and not text:
+            return
+        if self.message is not None:
+            self.message.remove()
+            self.message = None
+        if text:
+            self.message = self.ax.text(0.5, 0.5, text, transform=self.ax.transAxes,
+                                        ha="center", va="center", color=color,
+                                        fontsize=fontsize, style='italic' if italic else 'normal')
+        self.canvas.draw_idle()
+
+    @property
+    def width(self):
+        """Plot width in pixels, which sets the sample budget"""
+        return max(50, int(self.ax.bbox.width))
+
+    @property
+    def height(self):
+        return max(50, int(self.ax.bbox.height))
+
+    # -----------------------------
+    # Curves (blitted)
+    # -----------------------------
+    def add(self, expr):
+        """Compile and overlay a function; raises for invalid input."""
+        expr = normalize(expr)
+        for curve in self.curves:
+            if curve.expr == expr:
+                return curve
+        shape = parse_plot(expr)
+        kernel = self._compile(expr) if shape is None else None
+        color = self.palette[len(self.curves) % len(self.palette)]
+        line, = self.ax.plot([], [], linewidth=3, color=color, alpha=0.9,
+                             animated=True)
+        curve = Curve(expr, kernel, line, shape)
+        if shape is None and self.definitions is not None:
+            curve.defined = self.definitions.references(expr)
+        self.curves.append(curve)
+        if len(self.curves) == 1:
+            # First curve: fit the view to it
+            self._fit_view(curve)
+        self._schedule([curve])
+        return curve
+
+    def _compile(self, expr):
+        if self.definitions is not None:
+            expr = self.definitions.expand(expr, VARIABLES)
+        return get_kernel(expr, VARIABLES)
+
+    def redefine(self, names):
+        """
+        Recompile the curves using any of the definitions `names` and
+        redraw them. A curve that no longer compiles stays in the list with
+        its `error` set and no line, until a later change fixes it.
+        """
+        changed = [curve for curve in self.curves if curve.defined & set(names)]
+        working = []
+        for curve in changed:
+            curve.samples = None
+            self._drop_dense(curve)
+            try:
+                curve.kernel = self._compile(curve.expr)
+                curve.error = None
+                working.append(curve)
+            except ExpressionError as exc:
+                curve.kernel = None
+                curve.error = str(exc)
+                curve.line.set_data([], [])
+        if len(working) < len(changed):
+            self._find_points()
+            self.blit()
+        self._schedule(working)
+
+    def remove(self, index):
+        curve = self.curves.pop(index)
+        curve.line.remove()
+        self._drop_dense(curve)
+        self._find_points()
+        self.blit()
+
+    def clear(self):
+        for curve in self.curves:
+            curve.line.remove()
+            self._drop_dense(curve)
+        self.curves = []
+        self._find_points()
+        self.blit()
+
+    def set_dense(self, curve, dense):
+        """Show `curve` from high-resolution samples (None to go back)."""
+        self._drop_dense(curve)
+        curve.dense = dense
+        self._schedule([curve])
+
+    @staticmethod
+    def _drop_dense(curve):
+        if curve.dense is not None:
+            curve.dense.close()
+            curve.dense = None
+
+    def set_param(self, name, value):
+        """Change a parameter and redraw the curves that depend on it."""
+        self.params[name] = value
+        changed = [curve for curve in self.curves if curve.uses(name)]
+        for curve in changed:
+            curve.samples = None
+            self._drop_dense(curve)     # Sampled for the old value
+        self._schedule(changed)
+
+    def _fit_view(self, curve):
+        """Fit the view to `curve` when it is next sampled"""
+        if curve.shape is None and curve.kernel is None:
+            self.ax.set_xlim(DEFAULT_VIEW)
+            self.canvas.draw_idle()
+            return
+        self._fit_curve = curve
+
+    def _new_samples(self, curve):
+        params = {name: self.params[name] for name in curve.kernel.used if name in self.params}
+        curve.samples = SampleCache(curve.kernel, params)
+
+    def resample(self):
+        self._schedule(self.curves)
+
+    def _schedule(self, curves):
+        """Sample `curves` for the current view on the pool, drawing each when done."""
+        if self._jobs:
+            self._queued.update(dict.fromkeys(curves))
+            return
+        view = (self.ax.get_xlim(), self.ax.get_ylim(), self.width, self.height,
+                dict(self.params))
+        fit, self._fit_curve = self._fit_curve, None
+        if fit is not None and fit in self.curves:
+            # The others are sampled once the fitted limits are known
+            self._queued.update(dict.fromkeys(c for c in curves if c is not fit))
+            curves = [fit]
+        for curve in curves:
+            if curve.shape is None and curve.kernel is None:
+                continue    # Has an error; see redefine()
+            if curve.shape is None and curve.samples is None:
+                self._new_samples(curve)
+            future = self.pool.submit(_sample, curve.shape, curve.dense, curve.samples, view,
+                                      curve is fit)
+            self._jobs.append((curve, future, curve.dense))
+            self._points_due = True
+        if self._jobs:
+            self.canvas.get_tk_widget().after(POLL_MS, self._poll)
+
+    def _poll(self):
+        done = [job for job in self._jobs if job[1].done()]
+        for job in done:
+            self._jobs.remove(job)
+            curve, future, dense = job
+            if curve is None:
+                if not self._points_due and future.exception() is None:
+                    self._show_points(*future.result())
+                continue    # Else stale: found again after this batch
+            if curve not in self.curves:
+                continue    # Removed meanwhile
+            error = future.exception()
+            if error is None:
+                limits, data = future.result()
+                if limits is not None:
+                    self.ax.set_xlim(limits[0])
+                    self.ax.set_ylim(limits[1])
+                    self.canvas.draw_idle()     # Ticks moved
+                curve.line.set_data(*data)
+                curve.error = None
+            elif dense is None or dense is curve.dense:
+                curve.line.set_data([], [])
+                curve.error = str(error) or type(error).__name__
+                self.show_message(f"Could not plot {curve.expr}", self.colors['error'], 11)
+            # Else its dense samples were closed while decimating: sampled again
+        if self._jobs:
+            if done:
+                self.blit()
+            self.canvas.get_tk_widget().after(POLL_MS, self._poll)
+            return
+        queued = [curve for curve in self._queued if curve in self.curves]
+        self._queued = {}
+        self._schedule(queued)
+        if not self._jobs and self._points_due:
+            self._find_points()
+        self.blit()
+
+    def close(self):
+        """Stop the sampling threads; queued tasks are dropped"""
+        self.pool.shutdown(wait=False, cancel_futures=True)
+
+    def _draw_curves(self):
+        for curve in self.curves:
+            self.ax.draw_artist(curve.line)
+        if self.show_points:
+            for artist in [*self.markers.values(), *self.labels]:
+                self.ax.draw_artist(artist)
+
+    def _on_draw(self, event):
+        # A full draw just rendered the decorations: keep them, then add the curves
+        self.background = self.canvas.copy_from_bbox(self.ax.bbox)
+        self._draw_curves()
+
+    def blit(self):
+        """Redraw only the curves over the cached decorations."""
+        if self.background is None:
+            self.canvas.draw_idle()
+            return
+        self.canvas.restore_region(self.background)
+        self._draw_curves()
+        self.canvas.blit(self.ax.bbox)
+
+    # -----------------------------
+    # Roots, extrema and intersections
+    # -----------------------------
+    def set_show_points(self, show):
+        self.show_points = show
+        self._find_points()
+        self.blit()
+
+    def _find_points(self):
+        """Locate the marked points for the current view and curves on the pool."""
+        if self._jobs:
+            # Curves are being sampled; this runs again when they are done
+            self._points_due = True
+            return
+        self._points_due = False
+        curves = [curve for curve in self.curves if curve.kernel is not None]
+        if not (self.show_points and curves):
+            for label in self.labels:
+                label.remove()
+            self.labels = []
+            for marker in self.markers.values():
+                marker.set_data([], [])
+            return
+        lo, hi = self.ax.get_xlim()
+        y_lo, y_hi = self.ax.get_ylim()
+        # Within one view, only curves re-sampled since (k changed) are searched again
+        view = (lo, hi, y_lo, y_hi, self.width)
+        if view != self._points_view:
+            self._points_view, self._points_cache = view, {}
+        for curve in curves:
+            if curve.samples is None:
+                self._new_samples(curve)
+        future = self.pool.submit(_locate_points, [curve.samples for curve in curves],
+                                  self._points_cache, view)
+        self._jobs.append((None, future, None))
+        self.canvas.get_tk_widget().after(POLL_MS, self._poll)
+
+    def _show_points(self, found, cache):
+        """Draw the points _locate_points found, labelled while only a few are in view"""
+        self._points_cache = cache
+        lo, hi, y_lo, y_hi, _ = self._points_view
+        for label in self.labels:
+            label.remove()
+        self.labels = []
+        in_view = []
+        for kind, points in found.items():
+            x = np.concatenate([p[0] for p in points]) if points else np.empty(0)
+            y = np.concatenate([p[1] for p in points]) if points else np.empty(0)
+            self.markers[kind].set_data(x, y)
+            inside = (x >= lo) & (x <= hi) & (y >= y_lo) & (y <= y_hi)
+            in_view.extend(zip(x[inside], y[inside]))
+        if len(in_view) <= MAX_LABELS:
+            for x, y in in_view:
+                self.labels.append(self.ax.annotate(
+                    f"({x:.4g}, {y:.4g})", (x, y), xytext=(6, 6), textcoords="offset points",
+                    fontsize=8, color=self.colors['text_secondary'], animated=True))
+
+    # -----------------------------
+    # Zoom and pan
+    # -----------------------------
+    def _view_changed(self):
+        """Re-sample once the current burst of zoom/pan events is handled."""
+        if not self._resample_pending:
+            self._resample_pending = True
+            self.canvas.get_tk_widget().after_idle(self._apply_view)
+
+    def _apply_view(self):
+        self._resample_pending = False
+        self.resample()
+        self.canvas.draw_idle()   # Ticks moved, so the decorations change too
+
+    def _on_scroll(self, event):
+        if event.inaxes is not self.ax or not self.curves:
+            return
+        scale = 0.8 if event.button == "up" else 1.25
+        x0, x1 = self.ax.get_xlim()
+        y0, y1 = self.ax.get_ylim()
+        self.ax.set_xlim(event.xdata + (x0 - event.xdata) * scale,
+                         event.xdata + (x1 - event.xdata) * scale)
+        self.ax.set_ylim(event.ydata + (y0 - event.ydata) * scale,
+                         event.ydata + (y1 - event.ydata) * scale)
+        self._view_changed()
+
+    def _on_press(self, event):
+        if event.inaxes is not self.ax or event.button != 1 or not self.curves:
+            return
+        if event.dblclick:
+            self._fit_view(self.curves[0])
+            self._view_changed()
+            return
+        self._pan_start = (event.x, event.y, self.ax.get_xlim(), self.ax.get_ylim())
+
+    def _on_drag(self, event):
+        if self._pan_start is None:
+            return
+        x, y, (x0, x1), (y0, y1) = self._pan_start
+        dx = (event.x - x) * (x1 - x0) / self.ax.bbox.width
+        dy = (event.y - y) * (y1 - y0) / self.ax.bbox.height
+        self.ax.set_xlim(x0 - dx, x1 - dx)
+        self.ax.set_ylim(y0 - dy, y1 - dy)
+        self._view_changed()
+
+    def _on_release(self, event):
+        self._pan_start = None
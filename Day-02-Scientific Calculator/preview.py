@@ -0,0 +1,96 @@
+"""
+Running result preview for the calculator display.
+
+The preview is computed on the Tk thread after every edit, so it has to be
+cheap and must never hang:
+
+- Values are memoized per syntax-tree node. Trees are plain tuples, so
+  when "sin(2)*cos(3)+4" becomes "sin(2)*cos(3)+45" the whole
+  sin(2)*cos(3) subtree is found in the memo and only "+45" is new work.
+- Unfinished input is previewed where it makes sense: missing closing
+  brackets are added and a trailing operator is ignored, so "sqrt(2" and
+  "2*3+" both show a value.
+- Operations that could take long (huge powers, big factorials) are not
+  previewed; the "=" button still computes them in the worker process.
+"""
+
+import operator
+
+from expression import ExpressionError, SCOPE, format_result, normalize, parse_tokens, tokenize
+
+OPERATORS = {
+    '+': operator.add, '-': operator.sub, '*': operator.mul, '/': operator.truediv,
+    '//': operator.floordiv, '%': operator.mod, '**': operator.pow,
+}
+MAX_POWER_BITS = 1 << 16    # Largest integer power result previewed, in bits
+MAX_FACTORIAL = 2000
+MAX_MEMO = 4096
+
+
+class TooExpensive(Exception):
+    """The expression is left to the "=" button."""
+
+
+class Previewer:
+    """Evaluates syntax trees with a per-node memo."""
+
+    def __init__(self, scope=SCOPE):
+        self.scope = scope
+        self.memo = {}
+
+    def value(self, node):
+        try:
+            return self.memo[node]
+        except KeyError:
+            pass
+        kind = node[0]
+        if kind == "num":
+            return node[1]
+        if kind == "name":
+            return self.scope[node[1]]
+        if kind == "neg":
+            result = -self.value(node[1])
+        elif kind == "bin":
+            left, right = self.value(node[2]), self.value(node[3])
+            if node[1] == "**":
+                self._check_power(left, right)
+            result = OPERATORS[node[1]](left, right)
+        else:
+            args = [self.value(arg) for arg in node[2]]
+            if node[1] == "pow" and len(args) == 2:
+                self._check_power(*args)
+            elif node[1] == "factorial" and args and isinstance(args[0], int) \
+                    and args[0] > MAX_FACTORIAL:
+                raise TooExpensive
+            result = self.scope[node[1]](*args)
+
+        if len(self.memo) >= MAX_MEMO:
+            self.memo.clear()
+        self.memo[node] = result
+        return result
+
+    @staticmethod
+    def _check_power(base, exponent):
+        if isinstance(base, int) and isinstance(exponent, int) and exponent > 0 and \
+                exponent * max(1, abs(base).bit_length() - 1) > MAX_POWER_BITS:
+            raise TooExpensive
+
+    def preview(self, text):
+        """Display text for a preview of `text`, or "" if there is none"""
+        try:
+            tokens = tokenize(normalize(text))
+        except ExpressionError:
+            return ""
+        if len(tokens) < 2:
+            return ""  # A lone number or name previews as itself
+
+        # Drop trailing operators and commas, then close open brackets
+        while tokens and tokens[-1][0] == "op" and tokens[-1][1] != ")":
+            tokens.pop()
+        depth = sum(1 if value == "(" else -1 if value == ")" else 0 for _, value in tokens)
+        tokens += [("op", ")")] * max(0, depth)
+        try:
+            return format_result(self.value(parse_tokens(tokens)))
+        except Exception:
+            # Invalid input, math errors, TooExpensive, very deep nesting...
+            return ""
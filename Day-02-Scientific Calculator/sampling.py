@@ -0,0 +1,151 @@
+"""
+View-dependent adaptive sampling for the plotter.
+
+sample_view() picks the x values for the visible range only:
+
+1. A uniform base grid of about one sample per pixel. Its spacing is a
+   power of two and its points sit on multiples of that spacing, so two
+   overlapping views at the same zoom level share exactly the same x values.
+   SampleCache keeps the evaluated base grid for each zoom level, so panning
+   only evaluates the strip that scrolls into view.
+2. A few refinement passes that add midpoints where the curve bends by more
+   than about a pixel, where it jumps or where it enters or leaves its domain
+   (sqrt, log, ...), until the sample budget is used up.
+3. Where the curve jumps across the view with a sign change (tan, 1/x) a
+   NaN is inserted, so Matplotlib does not draw a vertical line there.
+"""
+
+import math
+from collections import OrderedDict
+
+import numpy as np
+
+MAX_LEVELS = 8          # Zoom levels kept per expression
+MAX_CACHED = 1 << 20    # Base samples kept per zoom level
+REFINE_PASSES = 6
+
+
+class SampleCache:
+    """Evaluated base-grid samples of one kernel, per zoom level."""
+
+    def __init__(self, kernel, params=None):
+        self.kernel = kernel
+        self.params = params or {}
+        self.levels = OrderedDict()     # step -> (first index, y values)
+
+    def evaluate(self, x):
+        y = self.kernel(x, **self.params)
+        y[~np.isfinite(y)] = np.nan
+        return y
+
+    def grid(self, lo, hi, samples):
+        """Base grid covering [lo, hi] with about `samples` points"""
+        step = 2.0 ** math.ceil(math.log2((hi - lo) / max(1, samples)))
+        first = math.floor(lo / step)
+        last = math.ceil(hi / step)
+
+        block = self.levels.pop(step, None)
+        if block is not None:
+            start, ys = block
+            end = start + len(ys) - 1
+            # Reuse the cached block if it overlaps or touches this view
+            if first <= end + 1 and last >= start - 1 and \
+                    max(last, end) - min(first, start) < MAX_CACHED:
+                if first < start:
+                    left = np.arange(first, start) * step
+                    ys = np.concatenate((self.evaluate(left), ys))
+                    start = first
+                if last > end:
+                    right = np.arange(end + 1, last + 1) * step
+                    ys = np.concatenate((ys, self.evaluate(right)))
+            else:
+                block = None
+        if block is None:
+            start = first
+            ys = self.evaluate(np.arange(first, last + 1) * step)
+
+        self.levels[step] = (start, ys)
+        while len(self.levels) > MAX_LEVELS:
+            self.levels.popitem(last=False)
+
+        xs = np.arange(first, last + 1) * step
+        return xs, ys[first - start:last - start + 1]
+
+
+def _flag_intervals(xs, ys, tol, jump):
+    """Indices of intervals [i, i+1] that need a midpoint, worst first"""
+    finite = np.isfinite(ys)
+    score = np.zeros(len(xs) - 1)
+
+    # Deviation of each interior point from the chord through its neighbours
+    t = (xs[1:-1] - xs[:-2]) / (xs[2:] - xs[:-2])
+    with np.errstate(invalid="ignore"):
+        deviation = np.abs(ys[1:-1] - (ys[:-2] + t * (ys[2:] - ys[:-2])))
+    deviation = np.where(np.isfinite(deviation), deviation, 0.0) / tol
+    score[:-1] = np.maximum(score[:-1], deviation)
+    score[1:] = np.maximum(score[1:], deviation)
+
+    # Large steps between neighbours: steep or discontinuous
+    steps = np.abs(np.diff(ys))
+    score = np.maximum(score, np.where(steps > jump, steps / tol, 0.0))
+
+    # Domain edges, where one end is defined and the other is not
+    score[finite[:-1] != finite[1:]] = np.inf
+
+    flagged = np.flatnonzero(score > 1.0)
+    return flagged[np.argsort(-score[flagged], kind="stable")]
+
+
+def sample_view(cache, lo, hi, pixels, yspan=None):
+    """
+    Sample the cached kernel over [lo, hi] for a plot `pixels` wide.
+
+    `yspan` is the visible height in data units; it sets how much bending
+    counts as visible. Returns (xs, ys) with NaN gaps at discontinuities.
+    """
+    pixels = max(50, int(pixels))
+    xs, ys = cache.grid(lo, hi, pixels)
+    budget = 4 * pixels
+    if yspan is None or not yspan > 0:
+        finite = ys[np.isfinite(ys)]
+        yspan = np.ptp(np.percentile(finite, [2, 98])) if finite.size else 1.0
+        yspan = yspan or 1.0
+    tol = yspan / pixels
+    jump = yspan / 4
+
+    for _ in range(REFINE_PASSES):
+        room = budget - len(xs)
+        if room <= 0:
+            break
+        flagged = _flag_intervals(xs, ys, tol, jump)[:room]
+        if not flagged.size:
+            break
+        mid = (xs[flagged] + xs[flagged + 1]) / 2
+        order = np.argsort(np.concatenate((xs, mid)), kind="stable")
+        xs = np.concatenate((xs, mid))[order]
+        ys = np.concatenate((ys, cache.evaluate(mid)))[order]
+
+    # Break the line where it crosses the view with a sign change
+    dy = np.diff(ys)
+    with np.errstate(invalid="ignore"):
+        breaks = np.flatnonzero((np.abs(dy) > yspan) & (ys[:-1] * ys[1:] < 0))
+    if breaks.size:
+        gap = (xs[breaks] + xs[breaks + 1]) / 2
+        xs = np.insert(xs, breaks + 1, gap)
+        ys = np.insert(ys, breaks + 1, np.nan)
+    return xs, ys
+
+
+def y_limits(ys):
+    """Vertical limits for uniformly spaced samples, ignoring spikes near asymptotes"""
+    finite = ys[np.isfinite(ys)]
+    if not finite.size:
+        return -1.0, 1.0
+    lo, hi = finite.min(), finite.max()
+    p_lo, p_hi = np.percentile(finite, [1, 99])
+    if hi - lo > 10 * (p_hi - p_lo):
+        lo, hi = p_lo, p_hi
+    if hi == lo:
+        lo, hi = lo - 1, hi + 1
+    pad = 0.05 * (hi - lo)
+    return lo - pad, hi + pad
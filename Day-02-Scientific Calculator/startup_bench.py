@@ -0,0 +1,117 @@
+"""
+Startup benchmark for the calculator.
+
+Measures, each in a fresh interpreter so nothing is already imported:
+
+- the import time of each module main.py loads, and of the plotting
+  modules it now loads after the window is up;
+- with a display, the app itself: main.py run with CALCPRO_STARTUP_BENCH
+  set reports when its imports finished, when the window was mapped and
+  first painted, and when the plot was ready, then quits.
+
+Each run is appended to startup_bench.jsonl and compared with the previous
+one, so regressions show up as the code changes.
+
+    python startup_bench.py            # 3 runs each, best time kept
+    python startup_bench.py --runs 5
+"""
+
+import argparse
+import json
+import os
+import subprocess
+import sys
+import time
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+LOG_PATH = os.path.join(HERE, "startup_bench.jsonl")
+
+# Loaded before the window appears
+STARTUP_MODULES = ["tkinter", "calc_core", "history", "preview", "suggest", "worker"]
+# Loaded in the background once it has
+PLOT_MODULES = ["numpy", "matplotlib.figure", "matplotlib.backends.backend_tkagg", "plotter"]
+APP_STAGES = ["imports", "window", "first_paint", "plot_ready"]
+REGRESSION = 1.2    # Flag anything 20% slower than the previous run
+
+
+def import_time(module):
+    """Seconds to import `module` in a new interpreter"""
+    code = ("import time; start = time.perf_counter(); import " + module +
+            "; print(time.perf_counter() - start)")
+    out = subprocess.run([sys.executable, "-c", code], cwd=HERE, capture_output=True,
+                         text=True, check=True).stdout
+    return float(out)
+
+
+def app_times(timeout=60):
+    """Startup stage times reported by main.py, or None without a display"""
+    env = dict(os.environ, CALCPRO_STARTUP_BENCH="1")
+    try:
+        proc = subprocess.run([sys.executable, "main.py"], cwd=HERE, env=env,
+                              capture_output=True, text=True, timeout=timeout)
+    except subprocess.TimeoutExpired:
+        return None
+    for line in proc.stdout.splitlines():
+        if line.startswith("{"):
+            return json.loads(line)
+    return None
+
+
+def best_of(runs, measure):
+    results = [measure() for _ in range(runs)]
+    if any(result is None for result in results):
+        return None
+    if isinstance(results[0], dict):
+        return {key: min(result[key] for result in results) for key in results[0]}
+    return min(results)
+
+
+def previous_record():
+    try:
+        with open(LOG_PATH, encoding="utf-8") as f:
+            lines = f.read().splitlines()
+        return json.loads(lines[-1]) if lines else None
+    except (OSError, ValueError):
+        return None
+
+
+def report(name, seconds, before):
+    line = f"  {name:<36} {seconds * 1000:8.1f} ms"
+    if before:
+        line += f"   (was {before * 1000:.1f} ms)"
+        if seconds > before * REGRESSION:
+            line += "  <-- slower"
+    print(line)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Measure calculator startup time")
+    parser.add_argument("--runs", type=int, default=3, help="runs per measurement (best kept)")
+    parser.add_argument("--no-app", action="store_true", help="only measure imports")
+    args = parser.parse_args()
+
+    previous = previous_record() or {}
+    record = {"time": time.time(), "python": sys.version.split()[0], "imports": {}, "app": None}
+
+    for title, modules in (("Imported before the window", STARTUP_MODULES),
+                           ("Imported after the window", PLOT_MODULES)):
+        print(title + ":")
+        for module in modules:
+            record["imports"][module] = seconds = best_of(args.runs, lambda: import_time(module))
+            report(module, seconds, previous.get("imports", {}).get(module))
+
+    if not args.no_app:
+        record["app"] = app = best_of(args.runs, app_times)
+        print("App (seconds after start):")
+        if app is None:
+            print("  not measured: main.py did not start (no display?)")
+        else:
+            for stage in APP_STAGES:
+                report(stage, app[stage], (previous.get("app") or {}).get(stage))
+
+    with open(LOG_PATH, "a", encoding="utf-8") as f:
+        f.write(json.dumps(record) + "\n")
+
+
+if __name__ == "__main__":
+    main()
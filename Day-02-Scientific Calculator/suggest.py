@@ -0,0 +1,169 @@
+"""
+Function library and autocomplete for the plotter.
+
+The library holds the built-in example functions plus every function the
+user has plotted, saved to functions.json next to this file. Suggestions
+are entries that contain the typed text (ignoring case and spaces):
+
+- A trigram index maps every 3-character substring of an entry to the
+  entries containing it, so a fresh query only looks at entries that share
+  all of its trigrams. One- and two-character queries match most of the
+  library anyway and scan it directly.
+- While typing, each new query usually extends the previous one, and any
+  entry matching the longer text also matched the shorter one, so only the
+  previous matches are filtered again.
+- Matches are ranked by "frecency": a use count that halves every week
+  without use, so both frequent and recent functions come first. Halving
+  every entry's count as time passes keeps their order, so each entry's
+  rank is a fixed number that only changes when it is used.
+"""
+
+import heapq
+import json
+import math
+import os
+import time
+from collections import defaultdict
+
+DEFAULT_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "functions.json")
+HALF_LIFE = 7 * 24 * 3600   # Seconds for an unused function's score to halve
+GRAM = 3
+NO_MATCHES = frozenset()
+
+BUILTINS = [
+    "x**2", "-x**2", "(x-2)**2 + 3", "x**3", "x**4",
+    "sin(x)", "cos(x)", "tan(x)", "abs(sin(x))",
+    "log(x)", "ln(x)", "exp(x)", "log2(x)",
+    "sin(2*x)*exp(-0.5*x)", "sin(5*x)/x",
+    "sin(x)+cos(x)", "x*sin(x)", "2*abs(x)", "2*x**2 - 5*x + 3",
+    "x**2 + sin(x)", "cos(x)*exp(-x/5)", "x**3 - 3*x"
+]
+
+
+def match_key(text):
+    return "".join(text.lower().split())
+
+
+def grams(key):
+    return {key[i:i + GRAM] for i in range(len(key) - GRAM + 1)}
+
+
+class Entry:
+    __slots__ = ("text", "key", "score", "last", "builtin")
+
+    def __init__(self, text, score=0.0, last=0.0, builtin=False):
+        self.text = text
+        self.key = match_key(text)
+        self.score = score
+        self.last = last
+        self.builtin = builtin
+
+    def frecency(self, now):
+        return self.score * 2 ** ((self.last - now) / HALF_LIFE)
+
+    @property
+    def rank(self):
+        """log2 of the frecency, plus a constant that is the same for all"""
+        return math.log2(self.score) + self.last / HALF_LIFE if self.score else -math.inf
+
+
+class FunctionLibrary:
+    """Saved plot functions with ranked substring search."""
+
+    def __init__(self, path=DEFAULT_PATH, builtins=BUILTINS):
+        self.path = path
+        self.entries = {}               # text -> Entry
+        self.ranks = {}                 # text -> Entry.rank
+        self.index = defaultdict(set)   # Trigram -> texts containing it
+        self._last_key = None           # Previous query and all its matches
+        self._last_matches = None
+
+        for text in builtins:
+            self._insert(Entry(text, builtin=True))
+        if path and os.path.exists(path):
+            try:
+                with open(path, encoding="utf-8") as f:
+                    saved = json.load(f)
+                for item in saved:
+                    entry = self.entries.get(item["text"])
+                    if entry is None:
+                        self._insert(Entry(item["text"], item["score"], item["last"]))
+                    else:
+                        entry.score, entry.last = item["score"], item["last"]
+                        self.ranks[entry.text] = entry.rank
+            except (OSError, ValueError, KeyError, TypeError):
+                pass  # A damaged file only loses the saved functions
+
+    def _insert(self, entry):
+        self.entries[entry.text] = entry
+        self.ranks[entry.text] = entry.rank
+        for gram in grams(entry.key):
+            self.index[gram].add(entry.text)
+        self._last_key = None
+
+    def __len__(self):
+        return len(self.entries)
+
+    def search(self, query, limit=8):
+        """Best `limit` entries containing `query`, best first"""
+        key = match_key(query)
+        if not key:
+            return []
+        entries = self.entries
+        if self._last_key is not None and self._last_key in key:
+            # The query grew: only the previous matches can still match
+            candidates = self._last_matches
+        elif len(key) < GRAM:
+            candidates = entries
+        else:
+            postings = sorted((self.index.get(g, NO_MATCHES) for g in grams(key)), key=len)
+            candidates = postings[0].intersection(*postings[1:])
+        matches = [text for text in candidates if key in entries[text].key]
+        self._last_key, self._last_matches = key, matches
+
+        # Pick the best few by rank alone, then let prefix matches and
+        # shorter functions win among those with equal rank
+        best = heapq.nlargest(4 * limit, matches, key=self.ranks.__getitem__)
+        best.sort(key=lambda text: (-self.ranks[text], not entries[text].key.startswith(key),
+                                    len(entries[text].key), text))
+        return best[:limit]
+
+    def use(self, text):
+        """Record that `text` was plotted, adding it to the library if new"""
+        text = text.strip()
+        if not text:
+            return
+        now = time.time()
+        entry = self.entries.get(text)
+        if entry is None:
+            entry = Entry(text)
+            self._insert(entry)
+        entry.score = entry.frecency(now) + 1
+        entry.last = now
+        self.ranks[text] = entry.rank
+
+    def remove(self, text):
+        """Forget a saved function; built-in ones only lose their ranking"""
+        entry = self.entries.get(text)
+        if entry is None:
+            return
+        if entry.builtin:
+            entry.score = entry.last = 0.0
+            self.ranks[text] = entry.rank
+        else:
+            del self.entries[text]
+            del self.ranks[text]
+            for gram in grams(entry.key):
+                self.index[gram].discard(text)
+        self._last_key = None
+
+    def save(self):
+        """Write the used and user-added functions to the library file"""
+        if not self.path:
+            return
+        saved = [{"text": e.text, "score": e.score, "last": e.last}
+                 for e in self.entries.values() if e.score or not e.builtin]
+        tmp = self.path + ".tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(saved, f)
+        os.replace(tmp, self.path)
@@ -0,0 +1,99 @@
+import pytest
+
+from definitions import DefinitionJob, Definitions, MAX_NODES
+from expression import ExpressionError, evaluate
+
+
+@pytest.fixture
+def definitions():
+    return Definitions()
+
+
+def value(definitions, text):
+    return evaluate(definitions.expand(text))
+
+
+def test_define_value_and_function(definitions):
+    assert definitions.define("a = 3") == ["a"]
+    definitions.define("f(x) = a*x + 1")
+    assert definitions["a"].value == 3
+    assert definitions["f"].is_function
+    assert value(definitions, "f(2)") == 7
+
+
+def test_constant_function_form(definitions):
+    definitions.define("q(x) = 3")
+    assert definitions["q"].is_function
+    assert value(definitions, "q(10)") == 3
+
+
+def test_redefine_recomputes_dependents_only(definitions):
+    definitions.define("a = 1")
+    definitions.define("b = a + 1")
+    definitions.define("c = 10")
+    assert definitions.define("a = 5") == ["a", "b"]
+    assert definitions["b"].value == 6
+    assert definitions["c"].value == 10
+
+
+def test_forward_reference_resolves_later(definitions):
+    definitions.define("b = a * 2")
+    assert definitions["b"].error
+    assert definitions.define("a = 4") == ["a", "b"]
+    assert definitions["b"].error is None
+    assert definitions["b"].value == 8
+
+
+def test_remove_marks_dependents(definitions):
+    definitions.define("a = 1")
+    definitions.define("b = a + 1")
+    assert definitions.remove("a") == ["a", "b"]
+    assert "a" not in definitions
+    assert definitions["b"].error
+    with pytest.raises(ExpressionError):
+        definitions.expand("b + 1")
+
+
+@pytest.mark.parametrize("text", ["a = a + 1", "pi = 3", "x = 2", "a = 1 +"])
+def test_invalid_definitions(definitions, text):
+    with pytest.raises(ExpressionError):
+        definitions.define(text)
+
+
+def test_cycle_rejected(definitions):
+    definitions.define("a = b + 1")
+    with pytest.raises(ExpressionError):
+        definitions.define("b = a + 1")
+
+
+def test_expand_leaves_plain_text_and_variables(definitions):
+    definitions.define("a = 2")
+    assert definitions.expand("1 + 2") == "1 + 2"
+    assert evaluate(definitions.expand("a*x", ("x",)).replace("x", "3")) == 6
+
+
+@pytest.mark.parametrize("text, expected", [
+    ("a**2", 9), ("f(a)", 9), ("2**a", 0.125), ("-a", 3), ("a - a", 0),
+])
+def test_expand_negative_value(definitions, text, expected):
+    definitions.define("a = -3")
+    definitions.define("f(x) = x**2")
+    assert value(definitions, text) == pytest.approx(expected)
+
+
+def test_expand_refuses_exponential_size(definitions):
+    definitions.define("f0(x) = x + 1")
+    for i in range(1, 40):
+        definitions.define(f"f{i}(x) = f{i - 1}(x) * f{i - 1}(x)")
+    assert definitions["f39"].error is None
+    assert definitions["f39"].size[0] > MAX_NODES
+    with pytest.raises(ExpressionError):
+        definitions.expand("f39(1)")
+
+
+def test_job_reports_any_exception(definitions):
+    job = DefinitionJob(definitions.define, "a = " + "(" * 5000 + "1" + ")" * 5000).start()
+    job._thread.join()
+    assert job.done
+    assert job.result is None
+    assert job.error is not None
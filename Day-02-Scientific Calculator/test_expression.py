@@ -0,0 +1,75 @@
+import math
+
+import pytest
+
+from calc_core import Calculator, evaluate_text
+from expression import (ExpressionError, compile_expression, evaluate, format_result,
+                        normalized_key, tokenize)
+
+
+@pytest.mark.parametrize("text, expected", [
+    ("1 + 2 * 3", 7),
+    ("2^10", 1024),
+    ("-2**2", -4),
+    ("(-2)**2", 4),
+    ("17 mod 5", 2),
+    ("17 % 5", 2),
+    ("7 // 2", 3),
+    ("sqrt(16) + π", 4 + math.pi),
+    ("√16)", 4),
+    ("log(1000) + ln(e)", 4),
+    ("factorial(5)", 120),
+    ("pow(2, 3)", 8),
+])
+def test_evaluate(text, expected):
+    assert evaluate(text) == pytest.approx(expected)
+
+
+@pytest.mark.parametrize("text", [
+    "1 +", "(1", "1)", "foo(2)", "sin", "__import__('os')", "1; 2", "2 $ 3", "x + 1",
+])
+def test_invalid_expressions(text):
+    with pytest.raises(ExpressionError):
+        compile_expression(text)
+
+
+def test_compile_is_cached_by_tokens():
+    first = compile_expression("2^3")
+    assert compile_expression("2^3") is first
+    assert normalized_key("2 ** 3") == normalized_key("2^3")
+    assert compile_expression("2 ** 3").code is first.code
+
+
+def test_mod_is_an_operator():
+    assert tokenize("5 mod 3") == [("num", "5"), ("op", "%"), ("num", "3")]
+
+
+@pytest.mark.parametrize("result, text", [
+    (3.0, "3"),
+    (0.1 + 0.2, "0.3"),
+    (2 / 3, "0.66666667"),
+    (-1.5, "-1.5"),
+    (10 ** 20, "100000000000000000000"),
+])
+def test_format_result(result, text):
+    assert format_result(result) == text
+
+
+def test_format_huge_integers():
+    # Too long for str(); shown in scientific notation instead
+    assert format_result(10 ** 5000) == "1.000000000e+5000"
+    assert format_result(-(10 ** 5000)) == "-1.000000000e+5000"
+
+
+def test_evaluate_text_reports_errors():
+    assert evaluate_text("1/0") == (False, "Error", None)
+    assert evaluate_text("2^0.5") == (True, "1.41421356", 2 ** 0.5)
+
+
+def test_mod_key():
+    calc = Calculator()
+    for key in ["1", "7", "mod", "5"]:
+        calc.press(key)
+    assert calc.expression == "17 mod 5"
+    calc.press("=")
+    assert calc.expression == "2"
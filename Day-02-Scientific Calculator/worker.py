@@ -0,0 +1,162 @@
+"""
+Background evaluation for the calculator.
+
+Expressions such as factorial(100000) or 9**9**9 can take seconds, minutes
+or all available memory. Evaluating them on the Tk thread freezes the
+window, and a Python thread cannot be interrupted in the middle of one big
+integer operation. Evaluator therefore runs them in a separate Python
+process and kills that process when the time budget is exceeded or the user
+cancels. On systems with the `resource` module the process also gets an
+address-space limit, so runaway allocations fail with MemoryError instead
+of swapping.
+
+The worker is started with `python worker.py`, not multiprocessing, so it
+never re-imports the Tk front end. Requests and replies are one JSON object
+per line over stdin/stdout, in UTF-8 whatever the locale:
+
+    -> {"id": 3, "expr": "factorial(20)"}
+    <- {"id": 3, "ok": true, "text": "2432902008176640000", "value": 2.43e+18}
+"""
+
+import json
+import os
+import queue
+import subprocess
+import sys
+import threading
+import time
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+WORKER_PATH = os.path.abspath(__file__)
+
+
+class Evaluator:
+    """Runs one evaluation at a time in a killable worker process."""
+
+    def __init__(self, timeout=5.0, memory_mb=512):
+        self.timeout = timeout
+        self.memory_mb = memory_mb
+        self.proc = None
+        self.replies = queue.Queue()
+        self.job = 0
+        self.deadline = None    # Set while a job is running
+
+    @property
+    def busy(self):
+        return self.deadline is not None
+
+    def start(self):
+        """Launch the worker process now, so the first result comes back quickly"""
+        if self.proc is None or self.proc.poll() is not None:
+            self.proc = subprocess.Popen(
+                [sys.executable, WORKER_PATH, "--memory", str(self.memory_mb)],
+                stdin=subprocess.PIPE, stdout=subprocess.PIPE, text=True, encoding="utf-8",
+                bufsize=1)
+            reader = threading.Thread(target=self._read_loop, args=(self.proc,), daemon=True)
+            reader.start()
+
+    def _read_loop(self, proc):
+        for line in proc.stdout:
+            try:
+                self.replies.put((proc, json.loads(line)))
+            except ValueError:
+                pass
+        # The worker died (or was killed): None tells poll() it is gone
+        self.replies.put((proc, None))
+
+    def submit(self, text):
+        """Start evaluating `text`, cancelling anything still running"""
+        if self.busy:
+            self.cancel()
+        self.start()
+        self.job += 1
+        self.deadline = time.monotonic() + self.timeout
+        try:
+            self.proc.stdin.write(json.dumps({"id": self.job, "expr": text}) + "\n")
+            self.proc.stdin.flush()
+        except OSError:
+            self.proc.kill()
+        return self.job
+
+    def poll(self):
+        """
+        Return (ok, text, value) once the current job finishes, else None.
+
+        `value` is the result as a float (None if it does not fit one).
+        A job past its time budget is killed and reported as "Timed out".
+        """
+        if not self.busy:
+            return None
+        while True:
+            try:
+                proc, reply = self.replies.get_nowait()
+            except queue.Empty:
+                break
+            if proc is not self.proc:
+                continue  # Left over from a worker that was killed
+            if reply is None:
+                self.deadline = None
+                self.proc = None
+                return False, "Error", None
+            if reply["id"] == self.job:
+                self.deadline = None
+                return reply["ok"], reply["text"], reply.get("value")
+        if time.monotonic() > self.deadline:
+            self.cancel()
+            return False, "Timed out", None
+        return None
+
+    def cancel(self):
+        """Abandon the current job; its worker is killed and restarted on demand"""
+        if self.busy and self.proc is not None:
+            self.proc.kill()
+            self.proc.wait()
+            self.proc = None
+        self.deadline = None
+
+    def close(self):
+        if self.proc is not None:
+            self.proc.kill()
+            self.proc.wait()
+            self.proc = None
+
+
+def limit_memory(megabytes):
+    """Cap this process's address space, where the platform allows it"""
+    if resource is None or not megabytes:
+        return
+    limit = megabytes * 1024 * 1024
+    try:
+        _, hard = resource.getrlimit(resource.RLIMIT_AS)
+        if hard != resource.RLIM_INFINITY:
+            limit = min(limit, hard)
+        resource.setrlimit(resource.RLIMIT_AS, (limit, hard))
+    except (ValueError, OSError):
+        pass  # e.g. macOS rejects RLIMIT_AS; the time limit still applies
+
+
+def serve(memory_mb):
+    """Worker side: evaluate requests from stdin until it closes"""
+    from calc_core import evaluate_text
+
+    limit_memory(memory_mb)
+    sys.stdin.reconfigure(encoding="utf-8")
+    sys.stdout.reconfigure(encoding="utf-8")
+    for line in sys.stdin:
+        request = json.loads(line)
+        ok, text, value = evaluate_text(request["expr"])
+        reply = {"id": request["id"], "ok": ok, "text": text, "value": value}
+        sys.stdout.write(json.dumps(reply) + "\n")
+        sys.stdout.flush()
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Calculator evaluation worker")
+    parser.add_argument("--memory", type=int, default=512, help="address space limit in MB")
+    serve(parser.parse_args().memory)